@@ -0,0 +1,56 @@
+"""Running many hot loops side by side in one event loop: total time and how long other tasks wait for a turn.
+
+Run from the repository root: python -m benchmarks.async_interpreter_benchmark
+"""
+import asyncio
+import time
+
+from benchmarks.interpreter_benchmark import generate_program
+from src.compiler.async_interpreter import interpret_async
+from src.compiler.bytecode import compile_bytecode, execute
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models import ast
+from src.models.SymTab import new_symtab
+
+
+async def run_concurrently(tree: ast.Expression, scripts: int, yield_every: int) -> float:
+    """Runs `scripts` copies of `tree` at once; returns the longest gap between
+    heartbeats, i.e. one round in which every script runs a slice."""
+    longest = 0.0
+
+    async def heartbeat() -> None:
+        nonlocal longest
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.gather(*(interpret_async(tree, new_symtab(), yield_every) for _ in range(scripts)))
+    beat.cancel()
+    return longest
+
+
+def main() -> None:
+    scripts = 50
+    tree = parse(tokenize_to_buffer(generate_program(20000, 4)))
+    bytecode = compile_bytecode(tree)
+    start = time.perf_counter()
+    for _ in range(scripts):
+        execute(bytecode, new_symtab())
+    blocking = time.perf_counter() - start
+    print(f"{scripts} scripts one after another: {blocking * 1000:6.1f} ms, "
+          f"event loop blocked up to {blocking / scripts * 1000:.1f} ms per script")
+    for yield_every in (100, 1000, 10000):
+        start = time.perf_counter()
+        longest = asyncio.run(run_concurrently(tree, scripts, yield_every))
+        total = time.perf_counter() - start
+        print(f"{scripts} scripts side by side, yield every {yield_every:5}: {total * 1000:6.1f} ms, "
+              f"rounds up to {longest * 1000:6.2f} ms, {longest / scripts * 1000:.3f} ms per slice")
+
+
+if __name__ == '__main__':
+    main()
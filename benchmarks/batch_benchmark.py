@@ -0,0 +1,48 @@
+"""Evaluating one program over many input rows, row by row with `interpret` and all at once with `interpret_batch`.
+
+Needs numpy. Run from the repository root: python -m benchmarks.batch_benchmark
+"""
+from typing import Any, List
+
+from benchmarks.bench_util import best_time
+from src.compiler.batch_interpreter import interpret_batch, np
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models import ast
+from src.models.SymTab import new_symtab
+from src.models.types import Int
+
+PROGRAMS = [
+    "if x % 3 == 0 then x * 2 + 1 else x - 7",
+    "{ var s = 0; var i = 0; while i < x % 16 do { s = s + i * i; i = i + 1; } s }",
+]
+
+
+def row_by_row(tree: ast.Expression, xs: List[int]) -> List[Any]:
+    results = []
+    for x in xs:
+        symtab = new_symtab()
+        symtab.define_variable('x', x, Int())
+        results.append(interpret(tree, symtab))
+    return results
+
+
+def main() -> None:
+    if np is None:
+        print("numpy is not installed")
+        return
+    rows = 100000
+    xs = np.arange(rows)
+    for source_code in PROGRAMS:
+        tree = parse(tokenize(source_code))
+        batch = interpret_batch(tree, new_symtab(), {'x': xs})
+        assert batch is not None and batch.tolist() == row_by_row(tree, xs.tolist())
+        rows_time = best_time(lambda: row_by_row(tree, xs.tolist()), repeat=1)
+        batch_time = best_time(lambda: interpret_batch(tree, new_symtab(), {'x': xs}), repeat=3)
+        print(f"{source_code}\n    {rows} rows: one by one {rows_time * 1000:7.1f} ms, "
+              f"batch {batch_time * 1000:6.2f} ms ({rows_time / batch_time:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import time
+from typing import Callable
+
+
+def best_time(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Returns the fastest of `repeat` wall-clock timings of `fn()`, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def generate_program(blocks: int, separator: str = "\n") -> str:
+    """A long, loop-heavy program in the course language.
+    Comments are only emitted when lines are separated by line breaks."""
+    comment = "  // block {}" if "\n" in separator else ""
+    lines = ["{"]
+    for i in range(blocks):
+        lines.append(f"    var x{i} = {i} * 2 + 1;" + comment.format(i))
+        lines.append(f"    while x{i} > 0 and not false do {{")
+        lines.append(f"        x{i} = x{i} - 1 % 7 <= 3;")
+        lines.append("    }")
+    lines.append("    0")
+    lines.append("}")
+    return separator.join(lines)
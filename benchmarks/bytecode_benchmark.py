@@ -0,0 +1,33 @@
+"""Running hot `while` loops with the tree-walking `interpret`, compiled closures and the bytecode VM.
+
+Run from the repository root: python -m benchmarks.bytecode_benchmark
+"""
+from benchmarks.bench_util import best_time
+from benchmarks.interpreter_benchmark import generate_program, walk_tree
+from src.compiler.bytecode import Bytecode, compile_bytecode, execute
+from src.compiler.closure_compiler import compile_closures
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models.SymTab import new_symtab
+
+
+def main() -> None:
+    iterations = 20000
+    for nesting in (0, 4, 16):
+        tree = parse(tokenize_to_buffer(generate_program(iterations, nesting)))
+        bytecode = compile_bytecode(tree)
+        assert walk_tree(tree, new_symtab()) == execute(bytecode, new_symtab())
+        tree_walker = best_time(lambda: walk_tree(tree, new_symtab()), repeat=3)
+        program = compile_closures(tree, new_symtab())
+        closures = best_time(program, repeat=3)
+        compile_time = best_time(lambda: compile_bytecode(tree), repeat=3)
+        vm = best_time(lambda: execute(bytecode, new_symtab()), repeat=3)
+        data = bytecode.dumps()
+        load_time = best_time(lambda: Bytecode.loads(data))
+        print(f"{iterations} iterations, body {nesting:2} blocks deep: tree walker {tree_walker * 1000:6.1f} ms, "
+              f"closures {closures * 1000:5.1f} ms, VM {vm * 1000:5.1f} ms ({tree_walker / vm:.1f}x); "
+              f"compile {compile_time * 1000:.2f} ms, {len(data)} bytes load in {load_time * 1e6:.0f} us")
+
+
+if __name__ == '__main__':
+    main()
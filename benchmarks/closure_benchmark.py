@@ -0,0 +1,28 @@
+"""Running hot `while` loops with the tree-walking `interpret` vs. compiled closures.
+
+Run from the repository root: python -m benchmarks.closure_benchmark
+"""
+from benchmarks.bench_util import best_time
+from benchmarks.interpreter_benchmark import generate_program, walk_tree
+from src.compiler.closure_compiler import compile_closures
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models.SymTab import new_symtab
+
+
+def main() -> None:
+    iterations = 20000
+    for nesting in (0, 4, 16):
+        tree = parse(tokenize_to_buffer(generate_program(iterations, nesting)))
+        assert walk_tree(tree, new_symtab()) == compile_closures(tree, new_symtab())()
+        tree_walker = best_time(lambda: walk_tree(tree, new_symtab()), repeat=3)
+        compile_time = best_time(lambda: compile_closures(tree, new_symtab()), repeat=3)
+        program = compile_closures(tree, new_symtab())
+        closures = best_time(program, repeat=3)
+        print(f"{iterations} iterations, body {nesting:2} blocks deep: tree walker {tree_walker * 1000:7.1f} ms, "
+              f"closures {closures * 1000:6.1f} ms + {compile_time * 1000:.2f} ms to compile "
+              f"({tree_walker / (closures + compile_time):.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
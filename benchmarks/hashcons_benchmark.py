@@ -0,0 +1,49 @@
+"""Memory of a parsed program with many repeated subexpressions, with and without hash-consing.
+
+Run from the repository root: python -m benchmarks.hashcons_benchmark
+"""
+import tracemalloc
+from typing import Optional, Tuple
+
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models import ast
+from src.models.ast_arena import AstArena
+from src.models.hashcons import HashConser
+from src.models.token_buffer import TokenBuffer
+
+
+def generate_program(blocks: int) -> str:
+    lines = ["{"]
+    for i in range(blocks):
+        lines.append(f"    while i < n do {{ x = x + 1; f(x + 1, i < n); i = i + {i % 10}; }}")
+    lines.append("    x")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def traced_parse(buffer: TokenBuffer, interner: Optional[HashConser] = None) -> Tuple[ast.Expression, int]:
+    tracemalloc.start()
+    tree = parse(buffer, interner=interner)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, size
+
+
+def main() -> None:
+    for blocks in (1000, 10000):
+        buffer = tokenize_to_buffer(generate_program(blocks))
+        tree, plain = traced_parse(buffer)
+        interner = HashConser()
+        shared, hash_consed = traced_parse(buffer, interner)
+        # An arena stores every distinct node once, so its length counts them
+        plain_arena, shared_arena = AstArena(), AstArena()
+        plain_arena.add(tree)
+        shared_arena.add(shared)
+        print(f"{blocks} loops: {len(plain_arena)} nodes, {plain / 2 ** 20:.1f} MiB; "
+              f"hash-consed {len(shared_arena)} distinct nodes, {hash_consed / 2 ** 20:.1f} MiB "
+              f"including the table")
+
+
+if __name__ == '__main__':
+    main()
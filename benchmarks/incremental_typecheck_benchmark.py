@@ -0,0 +1,43 @@
+"""Type checking after an edit in a large program: full check vs. IncrementalChecker on the reparsed tree.
+
+Run from the repository root: python -m benchmarks.incremental_typecheck_benchmark
+"""
+import sys
+import time
+
+from benchmarks.bench_util import best_time
+from benchmarks.typecheck_benchmark import generate_program
+from src.compiler.parser import parse
+from src.compiler.tokenizer import retokenize, tokenize_to_buffer
+from src.compiler.type_checker import IncrementalChecker, typecheck
+from src.models.scope_table import ScopeTable, builtin_snapshot
+
+
+def main() -> None:
+    sys.setrecursionlimit(10000)
+    for blocks in (2500, 12500):
+        source_code = generate_program(blocks)
+        buffer = tokenize_to_buffer(source_code)
+        tree = parse(buffer)
+        full = best_time(lambda: typecheck(tree, ScopeTable(builtin_snapshot())), repeat=3)
+        checker = IncrementalChecker()
+        checker.check(tree)
+
+        # A one-character edit inside a loop body in the middle of the program, then undone
+        offset = source_code.index(f"print_int({blocks // 2} * 2") + len(f"print_int({blocks // 2} * ")
+        check_times = []
+        for _ in range(10):
+            for edit in [(offset, 1, "3"), (offset, 1, "2")]:
+                tree = parse(buffer, previous=tree, changed=retokenize(buffer, *edit))
+                start = time.perf_counter()
+                checker.check(tree)
+                check_times.append(time.perf_counter() - start)
+        assert buffer.source_code == source_code
+        incremental = min(check_times)
+        print(f"{blocks} loops: full check {full * 1000:.1f} ms, incremental {incremental * 1000:.2f} ms "
+              f"({full / incremental:.0f}x; {checker.checked} nodes checked, "
+              f"{checker.reused} reused)")
+
+
+if __name__ == '__main__':
+    main()
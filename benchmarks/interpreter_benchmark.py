@@ -0,0 +1,91 @@
+"""Interpreting a hot `while` loop with variables in resolved frame slots vs. in the symtab's scope chain.
+
+Run from the repository root: python -m benchmarks.interpreter_benchmark
+"""
+from typing import Any, Callable
+
+from benchmarks.bench_util import best_time
+from src.compiler.interpreter import Value, interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models import ast
+from src.models.SymTab import SymTab, new_symtab
+
+
+def legacy_interpret(node: ast.Expression, symtab: SymTab) -> Any:
+    """The old `interpret`: every block is a symtab scope and every name is
+    looked up through the chain of scopes."""
+    match node:
+        case ast.Literal():
+            return node.value
+        case ast.BinaryOp():
+            if node.op == "=":
+                assert isinstance(node.left, ast.Identifier)
+                value = legacy_interpret(node.right, symtab)
+                symtab.update_variable(node.left.name, value)
+                return value
+            if node.op == 'and':
+                return legacy_interpret(node.left, symtab) and legacy_interpret(node.right, symtab)
+            if node.op == 'or':
+                return legacy_interpret(node.left, symtab) or legacy_interpret(node.right, symtab)
+            a = legacy_interpret(node.left, symtab)
+            b = legacy_interpret(node.right, symtab)
+            return symtab.lookup_variable(node.op)(a, b)
+        case ast.UnaryOp():
+            return symtab.lookup_variable(f"unary_{node.operator}")(legacy_interpret(node.operand, symtab))
+        case ast.IfExpr():
+            if legacy_interpret(node.condition, symtab):
+                return legacy_interpret(node.then_branch, symtab)
+            if node.else_branch is not None:
+                return legacy_interpret(node.else_branch, symtab)
+            return None
+        case ast.VarDecl():
+            value = legacy_interpret(node.value, symtab)
+            symtab.define_variable(node.name, value, node.type)
+            return value
+        case ast.Identifier():
+            return symtab.lookup_variable(node.name)
+        case ast.BlockExpr():
+            symtab.enter_scope()
+            for expr in node.expressions:
+                legacy_interpret(expr, symtab)
+            result = legacy_interpret(node.result_expression, symtab) if node.result_expression else None
+            symtab.leave_scope()
+            return result
+        case ast.WhileExpr():
+            while legacy_interpret(node.condition, symtab):
+                legacy_interpret(node.body, symtab)
+            return None
+
+
+def walk_tree(tree: ast.Expression, symtab: SymTab) -> Value:
+    """`interpret` without compiling hot loops, to measure the tree walker itself."""
+    return interpret(tree, symtab, hot_loop_threshold=None)
+
+
+def generate_program(iterations: int, nesting: int) -> str:
+    """A counting loop whose body sits `nesting` blocks below the variables."""
+    body = "{ s = s + i % 7; i = i + 1; }"
+    for _ in range(nesting):
+        body = "{ " + body + " }"
+    return f"{{ var i = 0; var s = 0; while i < {iterations} do {body} s }}"
+
+
+def main() -> None:
+    iterations = 20000
+    for nesting in (0, 4, 16):
+        tree = parse(tokenize_to_buffer(generate_program(iterations, nesting)))
+
+        def run(fn: Callable[[ast.Expression, SymTab], Any]) -> Any:
+            symtab = new_symtab()
+            return fn(tree, symtab)
+
+        assert run(legacy_interpret) == run(walk_tree)
+        legacy = best_time(lambda: run(legacy_interpret), repeat=3)
+        current = best_time(lambda: run(walk_tree), repeat=3)
+        print(f"{iterations} iterations, body {nesting:2} blocks deep: scope chain {legacy * 1000:7.1f} ms, "
+              f"frame slots {current * 1000:7.1f} ms ({legacy / current:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Executing a counting loop's IR in-process, to measure the cost of one IR instruction.
+
+Run from the repository root: python -m benchmarks.ir_executor_benchmark
+"""
+from benchmarks.bench_util import best_time
+from src.compiler.ir_executor import IRProgram
+from src.models.ir import Call, CondJump, IRVar, Jump, Label, LoadIntConst
+from src.models.types import SourceLocation
+
+L = SourceLocation()
+
+
+def counting_loop(n: int) -> list:
+    """IR summing 0..n-1, as `generate_ir` would emit for a `while` loop."""
+    i, s, n_var, one, cond = IRVar('i'), IRVar('s'), IRVar('n'), IRVar('one'), IRVar('cond')
+    start, body, end = Label(L, 'start'), Label(L, 'body'), Label(L, 'end')
+    return [
+        LoadIntConst(L, 0, i), LoadIntConst(L, 0, s), LoadIntConst(L, n, n_var), LoadIntConst(L, 1, one),
+        start,
+        Call(L, IRVar('<'), [i, n_var], cond),
+        CondJump(L, cond, body, end),
+        body,
+        Call(L, IRVar('+'), [s, i], s),
+        Call(L, IRVar('+'), [i, one], i),
+        Jump(L, start),
+        end,
+    ]
+
+
+def main() -> None:
+    for n in (1000, 100000):
+        instructions = counting_loop(n)
+        prepare = best_time(lambda: IRProgram(instructions))
+        program = IRProgram(instructions)
+        assert program.run()[IRVar('s')] == n * (n - 1) // 2
+        run = best_time(program.run, repeat=3)
+        print(f"n={n:6}: prepare {prepare * 1e6:5.1f} us, run {run * 1000:6.2f} ms, "
+              f"{program.executed} instructions, {run / program.executed * 1e9:.0f} ns/instruction")
+
+
+if __name__ == '__main__':
+    main()
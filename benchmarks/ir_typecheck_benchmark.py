@@ -0,0 +1,57 @@
+"""IR generation time on deeply nested blocks: checking once up front vs. checking every visited subtree.
+
+Run from the repository root: python -m benchmarks.ir_typecheck_benchmark
+"""
+import contextlib
+import io
+import sys
+from typing import Any
+
+from benchmarks.bench_util import best_time
+from src.compiler.ir_generator import generate_ir
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.compiler.type_checker import typecheck
+from src.models import ast
+from src.models.ir import IRVar, LoadIntConst
+from src.models.SymTab import new_symtab
+
+
+def legacy_generate_ir(root: ast.Expression) -> list:
+    """The old visiting scheme for blocks and integer literals: `typecheck` runs on every visited node."""
+    instructions = []
+    symtab = new_symtab()
+    next_var_id = 0
+
+    def visit(node: Any) -> IRVar:
+        nonlocal next_var_id
+        typecheck(node, symtab)
+        if isinstance(node, ast.Literal) and isinstance(node.value, int):
+            var = IRVar(f"x{next_var_id}")
+            next_var_id += 1
+            instructions.append(LoadIntConst(value=node.value, dest=var, location=node.location))
+            return var
+        symtab.enter_scope()
+        var = visit(node.result_expression)
+        symtab.leave_scope()
+        return var
+
+    visit(root)
+    return instructions
+
+
+def main() -> None:
+    sys.setrecursionlimit(100000)
+    for depth in (1000, 2000, 5000, 10000):
+        tree = parse(tokenize_to_buffer("{ " * depth + "1" + " }" * depth), explicit_stack=True)
+        # generate_ir prints debug output
+        with contextlib.redirect_stdout(io.StringIO()):
+            current = best_time(lambda: generate_ir(tree), repeat=3)
+        legacy = best_time(lambda: legacy_generate_ir(tree), repeat=1) if depth <= 2000 else None
+        legacy_text = f"{legacy * 1000:9.1f} ms" if legacy is not None else "  (skipped)"
+        print(f"depth {depth:5}: check every subtree {legacy_text}, "
+              f"check once {current * 1000:6.1f} ms ({current / depth * 1e6:.2f} us per level)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""The cost of metering: closures without a meter, with step counting and with timing.
+
+Run from the repository root: python -m benchmarks.meter_benchmark
+"""
+from benchmarks.bench_util import best_time
+from benchmarks.interpreter_benchmark import generate_program
+from src.compiler.interpreter import interpret
+from src.compiler.meter import Meter
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models.SymTab import new_symtab
+
+
+def main() -> None:
+    iterations = 20000
+    for nesting in (0, 4):
+        tree = parse(tokenize_to_buffer(generate_program(iterations, nesting)))
+        plain = best_time(lambda: interpret(tree, new_symtab(), backend='closures'), repeat=3)
+        counted = best_time(lambda: interpret(tree, new_symtab(), meter=Meter(timing=False)), repeat=3)
+        timed = best_time(lambda: interpret(tree, new_symtab(), meter=Meter()), repeat=3)
+        meter = Meter()
+        interpret(tree, new_symtab(), meter=meter)
+        print(f"{iterations} iterations, body {nesting:2} blocks deep, {meter.steps} steps: "
+              f"closures {plain * 1000:5.1f} ms, counted {counted * 1000:5.1f} ms ({counted / plain:.1f}x), "
+              f"timed {timed * 1000:5.1f} ms ({timed / plain:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
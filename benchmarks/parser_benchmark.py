@@ -0,0 +1,125 @@
+"""Parse time of long operator chains: precedence climbing vs. the old precedence-level descent.
+
+Run from the repository root: python -m benchmarks.parser_benchmark
+"""
+from typing import Callable
+
+from benchmarks.bench_util import best_time
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models import ast
+from src.models.types import Token
+
+legacy_precedence_levels = [
+    ['='],
+    ['or'],
+    ['and'],
+    ['==', '!='],
+    ['<', '<=', '>', '>='],
+    ['+', '-', '%'],
+    ['*', '/'],
+    ['not'],
+]
+
+
+def legacy_parse(tokens: list[Token]) -> ast.Expression:
+    """The expression subset of the old parser, as it was: one recursion
+    level per precedence level."""
+    pos = 0
+
+    def peek() -> Token:
+        if pos < len(tokens):
+            return tokens[pos]
+        else:
+            return Token(loc=tokens[-1].loc, type="end", text="")
+
+    def consume(expected: str | list[str] | None = None) -> Token:
+        nonlocal pos
+        token = peek()
+        if isinstance(expected, str) and token.text != expected:
+            raise Exception(f'{token.loc}: expected "{expected}"')
+        if isinstance(expected, list) and token.text not in expected:
+            comma_separated = ", ".join([f'"{e}"' for e in expected])
+            raise Exception(f'{token.loc}: expected one of: {comma_separated}')
+        pos += 1
+        return token
+
+    def parse_int_literal() -> ast.Literal:
+        if peek().type != 'integer':
+            raise Exception(f'{peek().loc}: expected an integer literal')
+        token = consume()
+        return ast.Literal(value=int(token.text), location=token.loc)
+
+    def parse_identifier() -> ast.Identifier:
+        if peek().type != 'identifier':
+            raise Exception(f'{peek().loc}: expected an identifier')
+        token = consume()
+        return ast.Identifier(name=token.text, location=token.loc)
+
+    def parse_binary_expression(level: int = 0) -> ast.Expression:
+        if level == len(legacy_precedence_levels):
+            return parse_unary_expression()
+
+        left_expr = parse_binary_expression(level + 1)
+        while peek().text in legacy_precedence_levels[level]:
+            op_token = consume()
+            if op_token.text == '=':
+                right_expr = parse_binary_expression(level)
+            else:
+                right_expr = parse_binary_expression(level + 1)
+            left_expr = ast.BinaryOp(left=left_expr, op=op_token.text, right=right_expr, location=op_token.loc)
+
+        return left_expr
+
+    def parse_unary_expression() -> ast.Expression:
+        if peek().text == 'not':
+            op_token = consume('not')
+            expr = parse_unary_expression()
+            return ast.UnaryOp(operator=op_token.text, operand=expr, location=op_token.loc)
+        else:
+            return parse_factor()
+
+    def parse_factor() -> ast.Expression:
+        # Blocks, if, while, calls, booleans and parentheses are not needed here
+        if peek().text == '(':
+            raise NotImplementedError
+        elif peek().text == '{':
+            raise NotImplementedError
+        elif peek().text == 'if':
+            raise NotImplementedError
+        elif peek().text == 'while':
+            raise NotImplementedError
+        elif peek().type == 'identifier':
+            next_pos = pos + 1
+            if next_pos < len(tokens) and tokens[next_pos].text == '(':
+                raise NotImplementedError
+            else:
+                return parse_identifier()
+        elif peek().type == 'bool':
+            raise NotImplementedError
+        elif peek().type == 'integer':
+            return parse_int_literal()
+        else:
+            raise Exception(f'{peek().loc}: unexpected token "{peek().text}"')
+
+    return parse_binary_expression()
+
+
+def main() -> None:
+    chains: dict[str, tuple[Callable[[int], str], int]] = {
+        "a + b + ...": (lambda n: " + ".join(f"x{i}" for i in range(n)), 5000),
+        "mixed precedence": (lambda n: " or ".join(f"x{i} * {i} + 1 < y and not z" for i in range(n)), 1000),
+        "a = b = ...": (lambda n: " = ".join(f"x{i}" for i in range(n)), 900),
+    }
+    for label, (make_chain, length) in chains.items():
+        sample = tokenize(make_chain(10))
+        assert repr(legacy_parse(sample)) == repr(parse(sample))
+        tokens = tokenize(make_chain(length))
+        legacy = best_time(lambda: legacy_parse(tokens), repeat=20)
+        current = best_time(lambda: parse(tokens), repeat=20)
+        print(f"{label} ({len(tokens)} tokens): legacy {legacy * 1000:.1f} ms, "
+              f"current {current * 1000:.1f} ms ({legacy / current:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""The overhead of the sampling profiler on hot `while` loops.
+
+Run from the repository root: python -m benchmarks.profiler_benchmark
+"""
+from benchmarks.bench_util import best_time
+from benchmarks.interpreter_benchmark import generate_program
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.profiler import profile
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models.SymTab import new_symtab
+
+
+def main() -> None:
+    iterations = 20000
+    for nesting in (0, 4):
+        source_code = generate_program(iterations, nesting)
+        for backend in ('tree', 'closures'):
+            # A fresh tree per run, so the tree walker's loops start cold every time
+            plain = best_time(lambda: interpret(parse(tokenize_to_buffer(source_code)), new_symtab(),
+                                                backend=backend), repeat=3)
+            profiled = best_time(lambda: profile(parse(tokenize_to_buffer(source_code)), new_symtab(),
+                                                 backend), repeat=3)
+            _, result = profile(parse(tokenize_to_buffer(source_code)), new_symtab(), backend)
+            print(f"{iterations} iterations, body {nesting:2} blocks deep, {backend:8}: "
+                  f"{plain * 1000:6.1f} ms, profiled {profiled * 1000:6.1f} ms ({profiled / plain:.2f}x), "
+                  f"{result.samples} samples")
+
+
+if __name__ == '__main__':
+    main()
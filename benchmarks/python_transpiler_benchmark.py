@@ -0,0 +1,37 @@
+"""Running hot `while` loops with the tree-walking `interpret`, the bytecode VM and transpiled Python code.
+
+Run from the repository root: python -m benchmarks.python_transpiler_benchmark
+"""
+from benchmarks.bench_util import best_time
+from benchmarks.interpreter_benchmark import generate_program, walk_tree
+from src.compiler.bytecode import compile_bytecode, execute
+from src.compiler.parser import parse
+from src.compiler.python_transpiler import _compile_source, compile_python, run_python, transpile
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models.SymTab import new_symtab
+
+
+def main() -> None:
+    iterations = 20000
+    for nesting in (0, 4, 16):
+        tree = parse(tokenize_to_buffer(generate_program(iterations, nesting)))
+        code = compile_python(tree)
+        assert walk_tree(tree, new_symtab()) == run_python(code, new_symtab())
+        tree_walker = best_time(lambda: walk_tree(tree, new_symtab()), repeat=3)
+        bytecode = compile_bytecode(tree)
+        vm = best_time(lambda: execute(bytecode, new_symtab()), repeat=3)
+        python = best_time(lambda: run_python(code, new_symtab()), repeat=3)
+        source = transpile(tree)
+        transpile_time = best_time(lambda: transpile(tree))
+        compile_time = best_time(lambda: compile(source, '<transpiled>', 'exec'))
+        # Compiling again hits the cache and costs only the transpilation
+        hits = _compile_source.cache_info().hits
+        compile_python(tree)
+        assert _compile_source.cache_info().hits == hits + 1
+        print(f"{iterations} iterations, body {nesting:2} blocks deep: tree walker {tree_walker * 1000:6.1f} ms, "
+              f"VM {vm * 1000:5.1f} ms, Python {python * 1000:5.2f} ms ({tree_walker / python:.0f}x); "
+              f"transpile {transpile_time * 1e6:.0f} us, compile {compile_time * 1e6:.0f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Cost of an edit in a large program: full parse vs. retokenize + incremental reparse.
+
+Run from the repository root: python -m benchmarks.reparse_benchmark
+"""
+import time
+
+from benchmarks.bench_util import best_time
+from src.compiler.parser import parse
+from src.compiler.tokenizer import retokenize, tokenize_to_buffer
+
+
+def generate_program(blocks: int) -> str:
+    """Like `bench_util.generate_program`, but `var` is only initialized with a
+    literal, as `parse_var_decl` requires."""
+    lines = ["{"]
+    for i in range(blocks):
+        lines.append(f"    var x{i} = {i};")
+        lines.append(f"    while x{i} > 0 and not false do {{")
+        lines.append(f"        x{i} = x{i} - 1 % 7 <= 3;")
+        lines.append("    }")
+    lines.append("    0")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    for blocks in (2500, 12500):
+        source_code = generate_program(blocks)
+        buffer = tokenize_to_buffer(source_code)
+        full = best_time(lambda: parse(buffer), repeat=3)
+        tree = parse(buffer)
+        lines = source_code.count("\n") + 1
+
+        # A one-character edit inside a loop body in the middle of the program,
+        # and one that adds tokens to a statement
+        middle = source_code.index(f"x{blocks // 2} - 1")
+        statement = source_code.index(f"    x{blocks // 2} = x")
+        for label, offset, removed, inserted in [("1 char in a loop body", middle + len(f"x{blocks // 2} - "), 1, "2"),
+                                                 ("2 tokens in a statement", statement + 4, 0, "y = ")]:
+            retokenize_times, reparse_times = [], []
+            for _ in range(10):
+                # Apply the edit and undo it, reparsing after each step
+                for edit in [(offset, removed, inserted), (offset, len(inserted), source_code[offset:offset + removed])]:
+                    start = time.perf_counter()
+                    changed = retokenize(buffer, *edit)
+                    middle_time = time.perf_counter()
+                    tree = parse(buffer, previous=tree, changed=changed)
+                    reparse_times.append(time.perf_counter() - middle_time)
+                    retokenize_times.append(middle_time - start)
+            assert buffer.source_code == source_code
+            reparse = min(reparse_times)
+            print(f"{lines} lines, {label}: full parse {full * 1000:.1f} ms, "
+                  f"reparse {reparse * 1000:.3f} ms ({full / reparse:,.0f}x), "
+                  f"retokenize {min(retokenize_times) * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
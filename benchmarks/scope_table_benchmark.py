@@ -0,0 +1,48 @@
+"""SymTab (a dict per scope) vs. ScopeTable (one dict and an undo log, builtins from a shared snapshot).
+
+Run from the repository root: python -m benchmarks.scope_table_benchmark
+"""
+from typing import Any
+
+from benchmarks.bench_util import best_time
+from src.models.scope_table import ScopeTable, builtin_snapshot
+from src.models.SymTab import SymTab, new_symtab
+
+
+def new_scope_table() -> ScopeTable:
+    return ScopeTable(builtin_snapshot())
+
+
+def scope_workload(table: Any, depth: int, iterations: int) -> None:
+    """What a checker or interpreter does per loop iteration: enter a block,
+    define a variable, look up a few operators, leave the block; `depth`
+    scopes are open around it."""
+    for _ in range(depth):
+        table.enter_scope()
+    for i in range(iterations):
+        table.enter_scope()
+        table.define_variable("i", i, None)
+        table.lookup_variable("+")
+        table.lookup_variable("<")
+        table.lookup_variable_type("i")
+        table.update_variable("i", i + 1)
+        table.leave_scope()
+
+
+def main() -> None:
+    count = 10000
+    setup_symtab = best_time(lambda: [new_symtab() for _ in range(count)])
+    setup_table = best_time(lambda: [new_scope_table() for _ in range(count)])
+    print(f"{count} environments with builtins: SymTab {setup_symtab * 1000:.1f} ms, "
+          f"ScopeTable {setup_table * 1000:.1f} ms ({setup_symtab / setup_table:.1f}x)")
+
+    iterations = 100000
+    for depth in (0, 8, 32):
+        symtab = best_time(lambda: scope_workload(new_symtab(), depth, iterations))
+        table = best_time(lambda: scope_workload(new_scope_table(), depth, iterations))
+        print(f"{iterations} blocks inside {depth:2} open scopes: SymTab {symtab * 1000:6.1f} ms, "
+              f"ScopeTable {table * 1000:6.1f} ms ({symtab / table:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
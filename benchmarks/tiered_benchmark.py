@@ -0,0 +1,31 @@
+"""The tree walker with and without hot loops compiled to Python code.
+
+Run from the repository root: python -m benchmarks.tiered_benchmark
+"""
+from typing import Optional
+
+from benchmarks.bench_util import best_time
+from benchmarks.interpreter_benchmark import generate_program
+from src.compiler.interpreter import HOT_LOOP_THRESHOLD, interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models.SymTab import new_symtab
+
+
+def run(source_code: str, threshold: Optional[int]) -> float:
+    """The time to parse and run `source_code` once, as a script would be run."""
+    return best_time(lambda: interpret(parse(tokenize_to_buffer(source_code)), new_symtab(),
+                                       hot_loop_threshold=threshold), repeat=3)
+
+
+def main() -> None:
+    for iterations, nesting in ((50, 4), (20000, 0), (20000, 4), (20000, 16)):
+        source_code = generate_program(iterations, nesting)
+        tree_walker = run(source_code, None)
+        tiered = run(source_code, HOT_LOOP_THRESHOLD)
+        print(f"{iterations:5} iterations, body {nesting:2} blocks deep: tree walker {tree_walker * 1000:6.1f} ms, "
+              f"tiered {tiered * 1000:6.2f} ms ({tree_walker / tiered:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
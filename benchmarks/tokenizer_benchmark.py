@@ -0,0 +1,61 @@
+"""Tokenizer throughput in tokens per second.
+
+Run from the repository root: python -m benchmarks.tokenizer_benchmark
+"""
+import re
+from typing import List
+
+from benchmarks.bench_util import best_time, generate_program
+from src.compiler.tokenizer import tokenize
+from src.models.types import Token, SourceLocation
+
+
+def legacy_tokenize(source_code: str) -> List[Token]:
+    """The original scanner: slices the text between matches and counts line breaks per token."""
+    source_code = source_code.replace('//', '#')
+    token_pattern = r'(\s+)|(\d+\.\d*|\.\d+|\d+)|(\b(True|False|true|false)\b)|([A-Za-z_][A-Za-z0-9_]*)|(\*\*|==|!=|<=|>=|&&|\|\||[\+\-*/%=<>!]{1,2})|([\(\)\{\},;:])|(//.*|#.*)'
+    tokens = []
+    line = 1
+    last_match_end = 0
+    for match in re.finditer(token_pattern, source_code):
+        text = match.group(0)
+        start, end = match.start(), match.end()
+        pre_text = source_code[last_match_end:start]
+        line_increment = pre_text.count('\n')
+        if line_increment:
+            line += line_increment
+            column = len(pre_text) - pre_text.rfind('\n') - 1
+            last_match_end = start - column + 1
+        else:
+            column = len(pre_text) + 1
+        if text.strip() == '' or text.startswith(("//", "#")):
+            continue
+        token_type = "unknown"
+        if match.group(2):
+            token_type = "float" if '.' in text else "integer"
+        elif match.group(4):
+            token_type = "bool"
+        elif match.group(5):
+            token_type = "identifier"
+        elif match.group(6):
+            token_type = "operator"
+        elif match.group(7):
+            token_type = "punctuation"
+        tokens.append(Token(text=text, type=token_type, loc=SourceLocation(file="<unknown>", line=line, column=column)))
+    return tokens
+
+
+def main() -> None:
+    for label, source_code in [("short lines", generate_program(2000)),
+                               ("one long line", generate_program(2000, separator=" "))]:
+        count = len(tokenize(source_code))
+        assert legacy_tokenize(source_code) == tokenize(source_code)
+        legacy = best_time(lambda: legacy_tokenize(source_code))
+        current = best_time(lambda: tokenize(source_code))
+        print(f"{label}: {count} tokens")
+        print(f"  legacy:  {count / legacy:12,.0f} tokens/s")
+        print(f"  current: {count / current:12,.0f} tokens/s  ({legacy / current:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Type checking time with interned types compared by `is` vs. fresh types compared via str()/type().
+
+Run from the repository root: python -m benchmarks.typecheck_benchmark
+"""
+import sys
+from typing import Any, List
+
+from benchmarks.bench_util import best_time
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.compiler.type_checker import typecheck
+from src.models import ast
+from src.models.SymTab import SymTab, new_symtab
+
+
+# The type classes as they were before interning: every call makes a new object
+class LegacyInt:
+    def __repr__(self) -> str:
+        return "Int"
+
+
+class LegacyBool:
+    def __repr__(self) -> str:
+        return "Bool"
+
+
+class LegacyUnit:
+    def __repr__(self) -> str:
+        return "Unit"
+
+
+class LegacyFunctionType:
+    def __init__(self, param_types: List[Any], return_type: Any) -> None:
+        self.param_types = param_types
+        self.return_type = return_type
+
+
+def legacy_symtab() -> SymTab:
+    symtab: SymTab[Any] = SymTab()
+    for op in ['+', '-', '*', '/', '%']:
+        symtab.define_variable(op, None, LegacyFunctionType([LegacyInt(), LegacyInt()], LegacyInt()))
+    for op in ['==', '!=', '<', '<=', '>', '>=']:
+        symtab.define_variable(op, None, LegacyFunctionType([LegacyInt(), LegacyInt()], LegacyBool()))
+    for op in ['and', 'or']:
+        symtab.define_variable(op, None, LegacyFunctionType([LegacyBool(), LegacyBool()], LegacyBool()))
+    symtab.define_variable("unary_not", None, LegacyFunctionType([LegacyBool()], LegacyBool()))
+    symtab.define_variable("print_int", None, LegacyFunctionType([LegacyInt()], LegacyUnit()))
+    return symtab
+
+
+def legacy_typecheck(node: ast.Expression, symtab: SymTab) -> Any:
+    """The old `typecheck` without its debug output, for the node kinds in the generated program."""
+    match node:
+        case ast.Literal(value=bool()):
+            return LegacyBool()
+        case ast.Literal(value=int()):
+            return LegacyInt()
+        case ast.Identifier():
+            return symtab.lookup_variable_type(node.name)
+        case ast.UnaryOp():
+            operand_type = legacy_typecheck(node.operand, symtab)
+            op_type = symtab.lookup_variable_type(f"unary_{node.operator}")
+            if isinstance(op_type, LegacyFunctionType) and str(operand_type) == str(op_type.param_types[0]):
+                return op_type.return_type
+            raise TypeError(f"Unsupported unary operation: {node.operator} for {operand_type}")
+        case ast.BinaryOp():
+            if node.op == "=":
+                raise NotImplementedError
+            symtab.lookup_variable(node.op)
+            op_type = symtab.lookup_variable_type(node.op)
+            left_type = legacy_typecheck(node.left, symtab)
+            right_type = legacy_typecheck(node.right, symtab)
+            if isinstance(op_type, LegacyFunctionType) and \
+                    [type(left_type), type(right_type)] != [type(t) for t in op_type.param_types]:
+                raise TypeError(f"Operand type mismatch for operator '{node.op}'")
+            return op_type.return_type
+        case ast.IfExpr():
+            if not isinstance(legacy_typecheck(node.condition, symtab), LegacyBool):
+                raise TypeError("Condition in 'if' must be a Bool")
+            then_type = legacy_typecheck(node.then_branch, symtab)
+            if node.else_branch is None:
+                return LegacyUnit()
+            else_type = legacy_typecheck(node.else_branch, symtab)
+            if type(then_type) != type(else_type):
+                raise TypeError("'then' and 'else' branches must have the same type")
+            return then_type
+        case ast.FunctionCall():
+            func_type = symtab.lookup_variable_type(node.name)
+            if not isinstance(func_type, LegacyFunctionType) or len(node.arguments) != len(func_type.param_types):
+                raise TypeError("Incorrect number of arguments")
+            for arg, param_type in zip(node.arguments, func_type.param_types):
+                if type(legacy_typecheck(arg, symtab)) != type(param_type):
+                    raise TypeError("Argument type mismatch")
+            return func_type.return_type
+        case ast.BlockExpr():
+            symtab.enter_scope()
+            for expr in node.expressions:
+                legacy_typecheck(expr, symtab)
+            result_type = LegacyUnit() if not node.result_expression else legacy_typecheck(node.result_expression, symtab)
+            symtab.leave_scope()
+            return result_type
+        case ast.WhileExpr():
+            if not isinstance(legacy_typecheck(node.condition, symtab), LegacyBool):
+                raise TypeError("Condition in 'while' must be a Bool")
+            legacy_typecheck(node.body, symtab)
+            return LegacyUnit()
+
+
+def generate_program(blocks: int) -> str:
+    lines = ["{"]
+    for i in range(blocks):
+        lines.append(f"    while {i} < 10 and not false do {{")
+        lines.append(f"        print_int({i} * 2 + 1 % 7);")
+        lines.append(f"        if {i} >= 3 or true then {i} - 1 else 2 * {i};")
+        lines.append("    }")
+    lines.append("    0")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    sys.setrecursionlimit(10000)
+    for blocks in (1000, 10000):
+        tree = parse(tokenize_to_buffer(generate_program(blocks)))
+
+        def current() -> Any:
+            symtab = new_symtab()
+            return typecheck(tree, symtab)
+
+        assert repr(legacy_typecheck(tree, legacy_symtab())) == repr(current())
+        legacy = best_time(lambda: legacy_typecheck(tree, legacy_symtab()))
+        interned = best_time(current)
+        print(f"{blocks} loops: fresh types {legacy * 1000:.1f} ms, "
+              f"interned {interned * 1000:.1f} ms ({legacy / interned:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Running many small programs: one process per file vs. a pool of warm worker processes.
+
+Run from the repository root: python -m benchmarks.worker_pool_benchmark
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.compiler.worker_pool import RUN, _process, run_batch, source_files
+
+
+def write_programs(directory: str, count: int) -> None:
+    for i in range(count):
+        with open(os.path.join(directory, f"p{i}.txt"), 'w', encoding='utf-8') as file:
+            file.write(f"{{ var i = 0; var s = 0; while i < {100 + i} do {{ s = s + i; i = i + 1; }} s }}")
+
+
+def main() -> None:
+    files = 400
+    with tempfile.TemporaryDirectory() as directory:
+        write_programs(directory, files)
+        paths = source_files(directory)
+
+        sample = paths[:10]
+        start = time.perf_counter()
+        for path in sample:
+            subprocess.run([sys.executable, '-c', f"from src.compiler.worker_pool import RUN, _process; "
+                                                  f"_process({path!r}, RUN, 'tree')"], check=True)
+        per_process = (time.perf_counter() - start) / len(sample)
+
+        start = time.perf_counter()
+        for path in paths:
+            _process(path, RUN, 'tree')
+        in_process = time.perf_counter() - start
+
+        print(f"{files} files: one process per file {per_process * files * 1000:7.0f} ms "
+              f"(estimated from {len(sample)}), in this process {in_process * 1000:5.0f} ms")
+        for workers in (1, 2, 4):
+            start = time.perf_counter()
+            results = list(run_batch(paths, workers=workers))
+            elapsed = time.perf_counter() - start
+            assert len(results) == files and all(result.error is None for result in results)
+            print(f"    pool of {workers} workers: {elapsed * 1000:5.0f} ms "
+                  f"({per_process * files / elapsed:.0f}x faster than a process per file)")
+
+
+if __name__ == '__main__':
+    main()
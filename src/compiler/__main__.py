@@ -0,0 +1,73 @@
+import argparse
+import sys
+
+from src.compiler.cache import CompileCache, DEFAULT_MAX_BYTES
+from src.compiler.interpreter import BACKENDS
+from src.compiler.parser import parse
+from src.compiler.pipeline import STAGES, format_result, run_stage
+from src.compiler.profiler import DEFAULT_INTERVAL, profile
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.compiler.worker_pool import RUN, run_batch, source_files
+from src.models.SymTab import new_symtab
+
+
+def main() -> int:
+    argparser = argparse.ArgumentParser(prog='compiler', description="Runs the compiler up to the given stage, "
+                                        "runs the program under the sampling profiler ('profile'), or processes "
+                                        "many files in worker processes ('batch').")
+    argparser.add_argument('stage', choices=STAGES + ('profile', 'batch'))
+    argparser.add_argument('input_file', nargs='?',
+                           help="source file, stdin if omitted; for 'batch' a directory or a manifest of paths")
+    argparser.add_argument('--cache-dir', help="directory of the on-disk stage cache")
+    argparser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES,
+                           help="maximum cache size in bytes")
+    argparser.add_argument('--cache-stats', action='store_true',
+                           help="print cache hits and misses per stage to stderr")
+    argparser.add_argument('--backend', choices=('tree',) + tuple(BACKENDS),
+                           help="interpreter backend: for 'profile' tree or closures (the default; the tree "
+                                "walker's compiled loops show as one line), for 'batch' any (default tree)")
+    argparser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                           help="seconds between profiler samples")
+    argparser.add_argument('--flamegraph', help="write the profile as collapsed stacks to this file")
+    argparser.add_argument('--batch-stage', choices=STAGES + (RUN,), default=RUN,
+                           help="what 'batch' does with each file: compile it up to a stage or run it")
+    argparser.add_argument('--pattern', default='*', help="files of the directory that 'batch' processes")
+    argparser.add_argument('--workers', type=int, help="number of 'batch' worker processes")
+    args = argparser.parse_args()
+
+    if args.stage == 'batch':
+        if not args.input_file:
+            argparser.error("batch needs a directory or a manifest")
+        failed = False
+        # 按完成顺序输出, 每个文件一行 JSON
+        for result in run_batch(source_files(args.input_file, args.pattern, args.cache_dir), args.batch_stage,
+                                args.backend or 'tree', args.workers, args.cache_dir, args.cache_size):
+            print(result.to_json(), flush=True)
+            failed = failed or result.error is not None
+        return 1 if failed else 0
+
+    if args.input_file:
+        with open(args.input_file, encoding='utf-8') as file:
+            source_code = file.read()
+    else:
+        source_code = sys.stdin.read()
+
+    cache = CompileCache(args.cache_dir, args.cache_size) if args.cache_dir else None
+    if args.stage == 'profile':
+        symtab = new_symtab()
+        tree = parse(tokenize_to_buffer(source_code, args.input_file or '<stdin>'))
+        _, report = profile(tree, symtab, args.backend or 'closures', args.interval)
+        if args.flamegraph:
+            with open(args.flamegraph, 'w', encoding='utf-8') as file:
+                file.write(report.collapsed())
+        print(f"{report.samples} samples")
+        print(report.hot_lines(source_code))
+    else:
+        print(format_result(args.stage, run_stage(source_code, args.stage, cache)))
+    if cache is not None and args.cache_stats:
+        print(cache.stats(), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
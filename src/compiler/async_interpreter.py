@@ -0,0 +1,30 @@
+import asyncio
+
+from src.compiler.bytecode import compile_bytecode, execute_steps
+from src.compiler.interpreter import Value
+from src.models import ast
+from src.models.SymTab import SymbolTable
+
+DEFAULT_YIELD_EVERY = 1000
+
+
+async def interpret_async(node: ast.Expression, symtab: SymbolTable, yield_every: int = DEFAULT_YIELD_EVERY) -> Value:
+    """Evaluates `node` like `interpret`, on the bytecode VM, giving control
+    back to the event loop after every `yield_every` loop iterations, so that
+    many programs can run side by side in one thread.
+
+    Cancelling the task (or `asyncio.wait_for` timing out) stops the program
+    at its next pause. Functions that the program calls still block the
+    event loop while they run."""
+    if yield_every < 1:
+        raise ValueError("yield_every must be positive")
+    steps = execute_steps(compile_bytecode(node), symtab, yield_every)
+    try:
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+            await asyncio.sleep(0)
+    finally:
+        steps.close()
@@ -0,0 +1,152 @@
+from typing import Any, Dict, List, Mapping, Optional
+
+from src.compiler.resolver import resolve
+from src.models import ast
+from src.models.SymTab import SymbolTable
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for batch evaluation
+    np = None  # type: ignore[assignment]
+
+# The builtins of `add_builtin_symbols` as numpy ufuncs, by name
+_UFUNCS = {
+    '+': 'add', '-': 'subtract', '*': 'multiply', '/': 'true_divide', '%': 'mod',
+    '==': 'equal', '!=': 'not_equal', '<': 'less', '<=': 'less_equal', '>': 'greater', '>=': 'greater_equal',
+    'unary_not': 'logical_not', 'unary_-': 'negative',
+}
+
+
+def interpret_batch(node: ast.Expression, symtab: SymbolTable, inputs: Mapping[str, Any]) -> Optional[Any]:
+    """Evaluates `node` once per lane, for all lanes at once, and returns
+    an array with the result of every lane (None if the program has no
+    value).
+
+    `inputs` binds names that the program does not declare to equally long
+    one-dimensional arrays, one element per lane; other free names are read
+    from `symtab` and have the same value in every lane. Operators are the
+    numpy ufuncs of the builtins, so integers are 64-bit.
+
+    Every lane runs the same code, with a mask of the lanes it applies to:
+    the branches of an `if` and the right side of `and`/`or` see only the
+    lanes that take them, and a `while` runs until its condition is false in
+    every lane, masking out the lanes that have left the loop. Assignments
+    only change the lanes in the mask. Assignments to free names change the
+    lanes' copies and leave `symtab` unchanged. Function calls cannot be
+    batched."""
+    if np is None:
+        raise ImportError("interpret_batch needs numpy")
+    env: Dict[str, Any] = {name: np.asarray(values) for name, values in inputs.items()}
+    shapes = {values.shape for values in env.values()}
+    if len(shapes) > 1 or any(len(shape) != 1 for shape in shapes):
+        raise ValueError("inputs must be one-dimensional arrays of the same length")
+    size = shapes.pop()[0] if shapes else 1
+    ufuncs = {name: getattr(np, ufunc) for name, ufunc in _UFUNCS.items()}
+    resolve(node)
+    frames: List[List[Any]] = []
+
+    def store(old: Any, new: Any, mask: Any) -> Any:
+        # 只改变掩码中的通道
+        return new if old is None else np.where(mask, new, old)
+
+    def evaluate(node: Optional[ast.Expression], mask: Any) -> Any:
+        match node:
+            case None:
+                return None
+
+            case ast.Literal():
+                return node.value
+
+            case ast.Identifier():
+                if node.depth >= 0:
+                    return frames[node.depth][node.slot]
+                if node.name in env:
+                    return env[node.name]
+                return symtab.lookup_variable(node.name)
+
+            case ast.BinaryOp(op='='):
+                if not isinstance(node.left, ast.Identifier):
+                    raise TypeError("Left side of assignment must be an identifier.")
+                value = evaluate(node.right, mask)
+                target = node.left
+                if target.depth >= 0:
+                    frame = frames[target.depth]
+                    frame[target.slot] = store(frame[target.slot], value, mask)
+                else:
+                    old = env[target.name] if target.name in env else symtab.lookup_variable(target.name)
+                    env[target.name] = store(old, value, mask)
+                return value
+
+            case ast.BinaryOp(op='and'):
+                left = evaluate(node.left, mask)
+                # 右侧只在左侧为真的通道中求值
+                right = evaluate(node.right, np.logical_and(mask, left))
+                return np.where(left, right, False)
+
+            case ast.BinaryOp(op='or'):
+                left = evaluate(node.left, mask)
+                right = evaluate(node.right, np.logical_and(mask, np.logical_not(left)))
+                return np.where(left, True, right)
+
+            case ast.BinaryOp():
+                if node.op not in ufuncs:
+                    raise TypeError(f"Cannot batch operator '{node.op}'")
+                a = evaluate(node.left, mask)
+                b = evaluate(node.right, mask)
+                if node.op in ('/', '%'):
+                    if np.any(np.logical_and(mask, np.equal(b, 0))):
+                        raise ZeroDivisionError("division by zero")
+                    # Lanes outside the mask may divide by zero; their results are discarded
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        return ufuncs[node.op](a, b)
+                return ufuncs[node.op](a, b)
+
+            case ast.UnaryOp():
+                name = f"unary_{node.operator}"
+                if name not in ufuncs:
+                    raise TypeError(f"Cannot batch operator '{node.operator}'")
+                return ufuncs[name](evaluate(node.operand, mask))
+
+            case ast.IfExpr():
+                condition = evaluate(node.condition, mask)
+                then_mask = np.logical_and(mask, condition)
+                else_mask = np.logical_and(mask, np.logical_not(condition))
+                then_value = evaluate(node.then_branch, then_mask) if then_mask.any() else None
+                else_value = evaluate(node.else_branch, else_mask) if else_mask.any() else None
+                if node.else_branch is None:
+                    return None
+                if then_value is None or else_value is None:
+                    return else_value if then_value is None else then_value
+                return np.where(condition, then_value, else_value)
+
+            case ast.FunctionCall():
+                raise TypeError(f"Cannot batch call to '{node.name}'")
+
+            case ast.VarDecl():
+                value = evaluate(node.value, mask)
+                if node.slot >= 0:
+                    frames[-1][node.slot] = store(frames[-1][node.slot], value, mask)
+                else:
+                    env[node.name] = store(env.get(node.name), value, mask)
+                return value
+
+            case ast.BlockExpr():
+                frames.append([None] * node.frame_size)
+                for expr in node.expressions:
+                    evaluate(expr, mask)
+                result = evaluate(node.result_expression, mask)
+                frames.pop()
+                return result
+
+            case ast.WhileExpr():
+                active = np.logical_and(mask, evaluate(node.condition, mask))
+                while active.any():
+                    evaluate(node.body, active)
+                    active = np.logical_and(active, evaluate(node.condition, active))
+                return None
+
+            case _:
+                raise TypeError(f"Cannot batch {type(node).__name__}")
+
+    result = evaluate(node, np.ones(size, dtype=bool))
+    return None if result is None else np.array(np.broadcast_to(result, (size,)))
@@ -0,0 +1,381 @@
+import operator
+import pickle
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, List, Optional, Set, Tuple
+
+from src.compiler.resolver import resolve
+from src.models import ast
+from src.models.SymTab import SymbolTable
+
+# Opcodes and their operands; `r` operands are register numbers, `k` operands
+# index `Bytecode.names`, jump targets are absolute offsets into the code.
+BINARY = 0          # r_dest, function, r_left, r_right
+MOVE = 1            # r_dest, r_source
+JUMP_IF_FALSE = 2   # r_condition, target
+JUMP = 3            # target
+UNARY = 4           # r_dest, function, r_operand
+JUMP_IF_TRUE = 5    # r_condition, target
+LOAD_GLOBAL = 6     # r_dest, k_name
+STORE_GLOBAL = 7    # k_name, r_source
+DEFINE_GLOBAL = 8   # k_name, k_type, r_source
+CALL = 9            # r_dest, k_name, argument count, r_argument...
+RETURN = 10         # r_source
+
+OPCODE_NAMES = ('BINARY', 'MOVE', 'JUMP_IF_FALSE', 'JUMP', 'UNARY', 'JUMP_IF_TRUE',
+                'LOAD_GLOBAL', 'STORE_GLOBAL', 'DEFINE_GLOBAL', 'CALL', 'RETURN')
+
+# The operators of `add_builtin_symbols`; `and` and `or` are jumps
+BINARY_OPERATORS: Tuple[str, ...] = ('+', '-', '*', '/', '%', '==', '!=', '<', '<=', '>', '>=')
+BINARY_FUNCTIONS: Tuple[Callable[[Any, Any], Any], ...] = (
+    operator.add, operator.sub, operator.mul, operator.truediv, operator.mod,
+    operator.eq, operator.ne, operator.lt, operator.le, operator.gt, operator.ge,
+)
+UNARY_OPERATORS: Tuple[str, ...] = ('not', '-')
+UNARY_FUNCTIONS: Tuple[Callable[[Any], Any], ...] = (operator.not_, operator.neg)
+
+
+@dataclass
+class Bytecode:
+    """A compiled program: `code` holds each instruction as its opcode
+    followed by its operands. The first `len(constants)` registers start out
+    holding the constants, the others None; the program returns with
+    RETURN."""
+    code: array
+    constants: List[Any]
+    names: List[Any]
+    register_count: int
+
+    def dumps(self) -> bytes:
+        return pickle.dumps(self, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def loads(data: bytes) -> 'Bytecode':
+        bytecode = pickle.loads(data)
+        if not isinstance(bytecode, Bytecode):
+            raise TypeError(f"not bytecode: {type(bytecode).__name__}")
+        return bytecode
+
+    def disassemble(self) -> str:
+        lines = []
+        pc = 0
+        code = self.code
+        while pc < len(code):
+            op = code[pc]
+            width = 4 + code[pc + 3] if op == CALL else _WIDTHS[op]
+            operands = ", ".join(str(operand) for operand in code[pc + 1:pc + width])
+            lines.append(f"{pc:5}  {OPCODE_NAMES[op]:<14}{operands}")
+            pc += width
+        return "\n".join(lines)
+
+
+# Instruction lengths including the opcode; CALL is 4 + its argument count
+_WIDTHS = (5, 3, 3, 2, 4, 3, 3, 3, 4, 4, 2)
+
+
+def _assigning_nodes(root: ast.Expression) -> Set[int]:
+    """The ids of the nodes whose subtree contains an assignment."""
+    result: Set[int] = set()
+    stack: List[Tuple[ast.Expression, bool]] = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        children = ast.children(node)
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+        elif (isinstance(node, ast.BinaryOp) and node.op == '=') or any(id(child) in result for child in children):
+            result.add(id(node))
+    return result
+
+
+def compile_bytecode(root: ast.Expression) -> Bytecode:
+    """Lowers a tree to register bytecode.
+
+    Constants and block variables get registers of their own for the whole
+    program (the language has no functions, so no block is active twice at
+    once); intermediate values use registers above them that are reused as
+    soon as the value has been consumed. Names that the resolver leaves
+    unresolved are accessed in the symtab with the *_GLOBAL instructions."""
+    resolve(root)
+    assigning = _assigning_nodes(root)
+    code = array('q')
+    constants: List[Any] = []
+    constant_registers: Dict[Tuple[type, Any], int] = {}
+    names: List[Any] = []
+    name_indices: Dict[Tuple[type, Any], int] = {}
+    # Per open block, the registers of its slots
+    block_registers: List[List[int]] = []
+    # Registers are numbered after the program is lowered: constants first,
+    # then variables, then temporaries. Until then operands refer to them as
+    # `kind << 32 | index`.
+    variable_count = 0
+    temporaries = 0
+    temporary_count = 0
+
+    def constant(value: Any) -> int:
+        key = (type(value), value)
+        if key not in constant_registers:
+            constant_registers[key] = len(constants)
+            constants.append(value)
+        return _CONSTANT << 32 | constant_registers[key]
+
+    def name_index(value: Any) -> int:
+        key = (type(value), value)
+        if key not in name_indices:
+            name_indices[key] = len(names)
+            names.append(value)
+        return name_indices[key]
+
+    def temporary() -> int:
+        nonlocal temporaries, temporary_count
+        temporaries += 1
+        temporary_count = max(temporary_count, temporaries)
+        return _TEMPORARY << 32 | (temporaries - 1)
+
+    last_instruction = -1
+
+    def emit(*words: int) -> int:
+        nonlocal last_instruction
+        last_instruction = len(code)
+        code.extend(words)
+        return len(code)
+
+    def store(dest: int, source: int) -> None:
+        """Copies `source` to `dest`, or makes the instruction that just
+        computed the temporary `source` write to `dest` directly."""
+        if (source >> 32) == _TEMPORARY and code[last_instruction] in _COMPUTING and \
+                code[last_instruction + 1] == source:
+            code[last_instruction + 1] = dest
+        elif dest != source:
+            emit(MOVE, dest, source)
+
+    def patch(position: int, target: int) -> None:
+        code[position] = target
+
+    def keep(register: int, later: List[ast.Expression]) -> int:
+        """`register`, or a copy of it if it is a variable that one of the
+        `later` operands may assign before the value is used."""
+        if (register >> 32) == _VARIABLE and any(id(operand) in assigning for operand in later):
+            copy = temporary()
+            emit(MOVE, copy, register)
+            return copy
+        return register
+
+    def lower(node: Optional[ast.Expression]) -> int:
+        """Emits the code for `node` and returns the register holding its value."""
+        nonlocal temporaries, variable_count
+        match node:
+            case None:
+                return constant(None)
+
+            case ast.Literal():
+                return constant(node.value)
+
+            case ast.Identifier():
+                if node.depth >= 0:
+                    return block_registers[node.depth][node.slot]
+                dest = temporary()
+                emit(LOAD_GLOBAL, dest, name_index(node.name))
+                return dest
+
+            case ast.BinaryOp(op='='):
+                if not isinstance(node.left, ast.Identifier):
+                    raise TypeError("Left side of assignment must be an identifier.")
+                source = lower(node.right)
+                if node.left.depth >= 0:
+                    dest = block_registers[node.left.depth][node.left.slot]
+                    store(dest, source)
+                    return dest
+                emit(STORE_GLOBAL, name_index(node.left.name), source)
+                return source
+
+            case ast.BinaryOp(op='and' | 'or'):
+                # 左侧决定结果时不求值右侧
+                saved = temporaries
+                dest = temporary()
+                left = lower(node.left)
+                emit(JUMP_IF_FALSE if node.op == 'and' else JUMP_IF_TRUE, left, -1)
+                short_circuit = len(code) - 1
+                right = lower(node.right)
+                emit(MOVE, dest, right)
+                end = emit(JUMP, -1) - 1
+                patch(short_circuit, len(code))
+                emit(MOVE, dest, constant(node.op == 'or'))
+                patch(end, len(code))
+                temporaries = saved + 1
+                return dest
+
+            case ast.BinaryOp():
+                if node.op not in BINARY_OPERATORS:
+                    raise TypeError(f"Operator '{node.op}' not defined")
+                saved = temporaries
+                left = keep(lower(node.left), [node.right])
+                right = lower(node.right)
+                temporaries = saved
+                dest = temporary()
+                emit(BINARY, dest, BINARY_OPERATORS.index(node.op), left, right)
+                return dest
+
+            case ast.UnaryOp():
+                if node.operator not in UNARY_OPERATORS:
+                    raise TypeError(f"Unsupported unary operation: {node.operator}")
+                saved = temporaries
+                operand = lower(node.operand)
+                temporaries = saved
+                dest = temporary()
+                emit(UNARY, dest, UNARY_OPERATORS.index(node.operator), operand)
+                return dest
+
+            case ast.IfExpr():
+                saved = temporaries
+                dest = temporary()
+                condition = lower(node.condition)
+                else_jump = emit(JUMP_IF_FALSE, condition, -1) - 1
+                emit(MOVE, dest, lower(node.then_branch))
+                end_jump = emit(JUMP, -1) - 1
+                patch(else_jump, len(code))
+                emit(MOVE, dest, lower(node.else_branch))
+                patch(end_jump, len(code))
+                temporaries = saved + 1
+                return dest
+
+            case ast.WhileExpr():
+                saved = temporaries
+                start = len(code)
+                condition = lower(node.condition)
+                exit_jump = emit(JUMP_IF_FALSE, condition, -1) - 1
+                lower(node.body)
+                emit(JUMP, start)
+                patch(exit_jump, len(code))
+                temporaries = saved
+                return constant(None)
+
+            case ast.FunctionCall():
+                saved = temporaries
+                arguments = [keep(lower(argument), node.arguments[i + 1:])
+                             for i, argument in enumerate(node.arguments)]
+                temporaries = saved
+                dest = temporary()
+                emit(CALL, dest, name_index(node.name), len(arguments), *arguments)
+                return dest
+
+            case ast.VarDecl():
+                source = lower(node.value)
+                if node.slot >= 0:
+                    dest = block_registers[-1][node.slot]
+                    store(dest, source)
+                    return dest
+                emit(DEFINE_GLOBAL, name_index(node.name), name_index(node.type), source)
+                return source
+
+            case ast.BlockExpr():
+                block_registers.append([_VARIABLE << 32 | (variable_count + i) for i in range(node.frame_size)])
+                variable_count += node.frame_size
+                saved = temporaries
+                for expr in node.expressions:
+                    lower(expr)
+                    temporaries = saved
+                result = lower(node.result_expression)
+                block_registers.pop()
+                return result
+
+            case _:
+                raise TypeError(f"Cannot compile {type(node).__name__}")
+
+    emit(RETURN, lower(root))
+
+    # Number the registers
+    bases = {_CONSTANT: 0, _VARIABLE: len(constants), _TEMPORARY: len(constants) + variable_count}
+    pc = 0
+    while pc < len(code):
+        op = code[pc]
+        for position in _register_operands(code, pc):
+            operand = code[position]
+            code[position] = bases[operand >> 32] + (operand & 0xFFFFFFFF)
+        pc += 4 + code[pc + 3] if op == CALL else _WIDTHS[op]
+    return Bytecode(code, constants, names, len(constants) + variable_count + temporary_count)
+
+
+_CONSTANT, _VARIABLE, _TEMPORARY = 1, 2, 3
+
+# Instructions that compute their first operand from the others, so that
+# their destination can be changed
+_COMPUTING = (BINARY, UNARY, CALL, LOAD_GLOBAL)
+
+# Offsets of the register operands of each opcode (CALL: see `_register_operands`)
+_REGISTER_OPERANDS = ((1, 3, 4), (1, 2), (1,), (), (1, 3), (1,), (1,), (2,), (3,), (1,), (1,))
+
+
+def _register_operands(code: array, pc: int) -> List[int]:
+    op = code[pc]
+    if op == CALL:
+        return [pc + 1] + [pc + 4 + i for i in range(code[pc + 3])]
+    return [pc + offset for offset in _REGISTER_OPERANDS[op]]
+
+
+def execute(bytecode: Bytecode, symtab: SymbolTable) -> Any:
+    """Runs `bytecode`; names that are not block variables are read and
+    written in `symtab`, and called functions are looked up in it. The
+    operators are those of `add_builtin_symbols` and are built into the VM,
+    so redefining them in `symtab` has no effect here."""
+    try:
+        next(execute_steps(bytecode, symtab))
+    except StopIteration as stop:
+        return stop.value
+    raise AssertionError("execute_steps paused without yield_every")
+
+
+def execute_steps(bytecode: Bytecode, symtab: SymbolTable, yield_every: int = 0) -> Generator[None, None, Any]:
+    """Like `execute`, as a generator that pauses after every `yield_every`
+    jumps (every loop iteration jumps once) and returns the program's value;
+    0 never pauses. The VM keeps all its state in the generator, so the
+    program can be resumed later or abandoned with `close()`."""
+    countdown = yield_every
+    code = bytecode.code.tolist()
+    regs = list(bytecode.constants) + [None] * (bytecode.register_count - len(bytecode.constants))
+    names = bytecode.names
+    binary, unary = BINARY_FUNCTIONS, UNARY_FUNCTIONS
+    functions: Dict[int, Callable[..., Any]] = {}
+    pc = 0
+    while True:
+        op = code[pc]
+        if op == BINARY:
+            regs[code[pc + 1]] = binary[code[pc + 2]](regs[code[pc + 3]], regs[code[pc + 4]])
+            pc += 5
+        elif op == MOVE:
+            regs[code[pc + 1]] = regs[code[pc + 2]]
+            pc += 3
+        elif op == JUMP_IF_FALSE:
+            pc = pc + 3 if regs[code[pc + 1]] else code[pc + 2]
+        elif op == JUMP:
+            pc = code[pc + 1]
+            countdown -= 1
+            if not countdown:
+                countdown = yield_every
+                yield
+        elif op == UNARY:
+            regs[code[pc + 1]] = unary[code[pc + 2]](regs[code[pc + 3]])
+            pc += 4
+        elif op == JUMP_IF_TRUE:
+            pc = code[pc + 2] if regs[code[pc + 1]] else pc + 3
+        elif op == LOAD_GLOBAL:
+            regs[code[pc + 1]] = symtab.lookup_variable(names[code[pc + 2]])
+            pc += 3
+        elif op == STORE_GLOBAL:
+            symtab.update_variable(names[code[pc + 1]], regs[code[pc + 2]])
+            pc += 3
+        elif op == DEFINE_GLOBAL:
+            symtab.define_variable(names[code[pc + 1]], regs[code[pc + 3]], names[code[pc + 2]])
+            pc += 4
+        elif op == CALL:
+            name = code[pc + 2]
+            function = functions.get(name)
+            if function is None:
+                function = functions[name] = symtab.lookup_variable(names[name])
+            count = code[pc + 3]
+            regs[code[pc + 1]] = function(*[regs[register] for register in code[pc + 4:pc + 4 + count]])
+            pc += 4 + count
+        elif op == RETURN:
+            return regs[code[pc + 1]]
+        else:
+            raise ValueError(f"bad opcode {op} at {pc}")
@@ -0,0 +1,171 @@
+import hashlib
+import marshal
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.models.ast_arena import AstArena
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SOURCE_ROOT = Path(__file__).resolve().parent.parent
+
+
+@lru_cache(maxsize=None)
+def compiler_version() -> str:
+    """A hash of the compiler's own source files, so that any change to the
+    compiler invalidates the entries it wrote."""
+    digest = hashlib.sha256()
+    # Transpiled code objects only load into the Python version that compiled them
+    digest.update(sys.implementation.cache_tag.encode())
+    for package in ('compiler', 'models'):
+        for path in sorted((_SOURCE_ROOT / package).glob('*.py')):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def source_key(source_code: str, version: Optional[str] = None) -> str:
+    """The hash of `source_code` and the compiler version (`compiler_version()`
+    by default) that a program's cached results are stored under."""
+    digest = hashlib.sha256((version if version is not None else compiler_version()).encode())
+    digest.update(b'\0')
+    digest.update(source_code.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def _encode_tree(tree: Any) -> Tuple[AstArena, int]:
+    # Pickling the dataclasses directly recurses once per nesting level
+    arena = AstArena()
+    return arena, arena.add(tree)
+
+
+def _decode_tree(value: Tuple[AstArena, int]) -> Any:
+    arena, root = value
+    return arena.to_tree(root)
+
+
+# stage -> (to picklable value, from picklable value)
+_CODECS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+    'ast': (_encode_tree, _decode_tree),
+    'typed_ast': (_encode_tree, _decode_tree),
+    'pycode': (marshal.dumps, marshal.loads),
+}
+
+
+class CompileCache:
+    """Content-addressed on-disk cache of compiler stage results.
+
+    An entry is keyed by the hash of the source text and `compiler_version()`
+    plus the stage name, and stored as a zlib-compressed pickle (ASTs go
+    through an `AstArena`). Entries are written to a temporary file and
+    renamed into place, so concurrent processes never see a partial entry.
+    When the directory grows beyond `max_bytes`, the least recently used
+    entries are removed; a hit refreshes the entry's modification time.
+    The directory is only scanned when the running size estimate exceeds
+    `max_bytes`, so entries that other processes store meanwhile can push it
+    past the limit until the next scan. An entry that cannot be decoded is
+    a miss and is deleted."""
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int = DEFAULT_MAX_BYTES,
+                 version: Optional[str] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.version = version if version is not None else compiler_version()
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        # Bytes in the directory as of the last scan plus what this object
+        # stored since; None until the first store scans the directory
+        self._size: Optional[int] = None
+
+    def key(self, source_code: str) -> str:
+        return source_key(source_code, self.version)
+
+    def _path(self, key: str, stage: str) -> Path:
+        return self.directory / f"{key}.{stage}"
+
+    def load(self, key: str, stage: str) -> Optional[Any]:
+        """The cached result of `stage` or None, counting the hit or miss."""
+        path = self._path(key, stage)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses[stage] += 1
+            return None
+        codec = _CODECS.get(stage)
+        try:
+            value = pickle.loads(zlib.decompress(data))
+            if codec:
+                value = codec[1](value)
+        except Exception:
+            # Written by an incompatible compiler or damaged: treat as a miss
+            self.misses[stage] += 1
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # evicted by another process meanwhile
+            pass
+        self.hits[stage] += 1
+        return value
+
+    def store(self, key: str, stage: str, value: Any) -> None:
+        codec = _CODECS.get(stage)
+        data = zlib.compress(pickle.dumps(codec[0](value) if codec else value, pickle.HIGHEST_PROTOCOL))
+        fd, temp_name = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            os.fchmod(fd, 0o644)  # mkstemp creates the file private to this user
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp_name, self._path(key, stage))
+        except BaseException:
+            self._remove(Path(temp_name))
+            raise
+        # Scan the directory only once the estimate exceeds the limit. An
+        # overwritten entry is counted twice, which only brings the scan forward.
+        if self._size is not None:
+            self._size += len(data)
+        if self._size is None or self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache fits in
+        `max_bytes`, and takes the size of what is left as the new estimate."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.tmp-'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            total += stat.st_size
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                self._remove(Path(path))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._size = total
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> str:
+        """One line per stage, e.g. `ast: 3 hits, 1 misses`."""
+        stages = sorted(set(self.hits) | set(self.misses))
+        return "\n".join(f"{stage}: {self.hits[stage]} hits, {self.misses[stage]} misses" for stage in stages)
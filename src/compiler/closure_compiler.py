@@ -0,0 +1,146 @@
+from typing import Any, Callable, List, Optional
+
+from src.compiler.resolver import resolve
+from src.models import ast
+from src.models.SymTab import SymbolTable
+
+# A compiled expression: calling it evaluates the expression
+Thunk = Callable[[], Any]
+# Wraps the thunk of a node, e.g. to count its runs
+Instrument = Callable[[ast.Expression, Thunk], Thunk]
+
+
+def compile_closures(root: ast.Expression, symtab: SymbolTable, instrument: Optional[Instrument] = None) -> Thunk:
+    """Turns `root` into nested closures that evaluate it like `interpret`.
+
+    All dispatch happens here, once: operators and functions are looked up in
+    `symtab` while compiling and bound into the closures, and every variable
+    declared in a block gets a one-element list (a cell) that the closures
+    of its declaration, reads and assignments share. Names that are not
+    declared in the tree are still looked up in `symtab` when they run.
+
+    The language has no functions, so a block is never active twice at the
+    same time and one cell per variable is enough: each time the block runs,
+    its `var` stores a new value before anything reads it. The returned
+    thunk must therefore not be called again while it runs, e.g. from
+    another thread.
+
+    With `instrument`, the closure of every node is replaced by
+    `instrument(node, closure)`, e.g. `Meter.instrument`."""
+    resolve(root)
+    # The cells of the blocks around the node being compiled, outermost first
+    cells: List[List[List[Any]]] = []
+
+    def compile_node(node: Optional[ast.Expression]) -> Thunk:
+        thunk = compile_expression(node)
+        return thunk if instrument is None or node is None else instrument(node, thunk)
+
+    def compile_expression(node: Optional[ast.Expression]) -> Thunk:
+        match node:
+            case None:
+                return lambda: None
+
+            case ast.Literal():
+                value = node.value
+                return lambda: value
+
+            case ast.Identifier():
+                if node.depth >= 0:
+                    cell = cells[node.depth][node.slot]
+                    return lambda: cell[0]
+                name = node.name
+                lookup = symtab.lookup_variable
+                return lambda: lookup(name)
+
+            case ast.BinaryOp(op='='):
+                if not isinstance(node.left, ast.Identifier):
+                    raise TypeError("Left side of assignment must be an identifier.")
+                right = compile_node(node.right)
+                if node.left.depth >= 0:
+                    cell = cells[node.left.depth][node.left.slot]
+
+                    def assign() -> Any:
+                        cell[0] = value = right()
+                        return value
+                else:
+                    name = node.left.name
+                    update = symtab.update_variable
+
+                    def assign() -> Any:
+                        value = right()
+                        update(name, value)
+                        return value
+                return assign
+
+            case ast.BinaryOp(op='and'):
+                left, right = compile_node(node.left), compile_node(node.right)
+                # 左侧为假时不求值右侧
+                return lambda: right() if left() else False
+
+            case ast.BinaryOp(op='or'):
+                left, right = compile_node(node.left), compile_node(node.right)
+                return lambda: True if left() else right()
+
+            case ast.BinaryOp():
+                op_func = symtab.lookup_variable(node.op)
+                left, right = compile_node(node.left), compile_node(node.right)
+                return lambda: op_func(left(), right())
+
+            case ast.UnaryOp():
+                op_func = symtab.lookup_variable(f"unary_{node.operator}")
+                operand = compile_node(node.operand)
+                return lambda: op_func(operand())
+
+            case ast.IfExpr():
+                condition = compile_node(node.condition)
+                then_branch, else_branch = compile_node(node.then_branch), compile_node(node.else_branch)
+                return lambda: then_branch() if condition() else else_branch()
+
+            case ast.FunctionCall():
+                function = symtab.lookup_variable(node.name)
+                arguments = [compile_node(argument) for argument in node.arguments]
+                return lambda: function(*[argument() for argument in arguments])
+
+            case ast.VarDecl():
+                initializer = compile_node(node.value)
+                if node.slot >= 0:
+                    cell = cells[-1][node.slot]
+
+                    def declare() -> Any:
+                        cell[0] = result = initializer()
+                        return result
+                else:
+                    name, var_type = node.name, node.type
+                    define = symtab.define_variable
+
+                    def declare() -> Any:
+                        result = initializer()
+                        define(name, result, var_type)
+                        return result
+                return declare
+
+            case ast.BlockExpr():
+                cells.append([[None] for _ in range(node.frame_size)])
+                statements = [compile_node(expr) for expr in node.expressions]
+                result = compile_node(node.result_expression)
+                cells.pop()
+
+                def block() -> Any:
+                    for statement in statements:
+                        statement()
+                    return result()
+                return block
+
+            case ast.WhileExpr():
+                condition, body = compile_node(node.condition), compile_node(node.body)
+
+                def loop() -> None:
+                    while condition():
+                        body()
+                    return None
+                return loop
+
+            case _:
+                raise TypeError(f"Cannot compile {type(node).__name__}")
+
+    return compile_node(root)
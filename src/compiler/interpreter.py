@@ -1,16 +1,52 @@
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional
 
+from src.compiler.bytecode import compile_bytecode, execute
+from src.compiler.closure_compiler import compile_closures
+from src.compiler.meter import Meter
+from src.compiler.python_transpiler import compile_loop, compile_python, run_python
+from src.compiler.resolver import resolve
 from src.models import ast
-from src.models.SymTab import SymTab
+from src.models.SymTab import SymbolTable
 
 # Value = int | bool | None
 from typing import Union, Callable, Any
 
 Value = Union[int, bool, None, Callable[..., Any]]
 
-
-def interpret(node: ast.IfExpr, symtab: SymTab) -> Value:
-    # symtab = SymTab()
+# Iterations after which the tree walker compiles a loop and runs the rest in Python
+HOT_LOOP_THRESHOLD = 100
+
+
+def interpret(node: ast.Expression, symtab: SymbolTable, frames: Optional[List[List[Value]]] = None,
+              backend: str = 'tree', meter: Optional[Meter] = None,
+              hot_loop_threshold: Optional[int] = HOT_LOOP_THRESHOLD) -> Value:
+    """Evaluates `node`. Variables declared in blocks live in `frames`, one
+    list per enclosing block, at the addresses computed by `resolve`; the
+    outermost call resolves the tree and starts with no frames. Builtins and
+    unresolved names are looked up in `symtab`.
+
+    `backend` selects how the outermost call runs the program: 'tree' walks
+    the AST, the others are listed in `BACKENDS`. The tree walker counts the
+    iterations of every `while`; after `hot_loop_threshold` of them the loop
+    is compiled to Python code (`compile_loop`), which continues it on the
+    same frames, and later runs of the loop start in the compiled code.
+    With `hot_loop_threshold=None` every loop is walked, and loops compiled
+    by earlier runs are not used.
+
+    With a `meter`, the program runs as closures that count every step in
+    it (see `Meter`); the backend must then be 'tree' or 'closures', since
+    the others cannot count steps."""
+    if frames is None:
+        if meter is not None:
+            if backend not in ('tree', 'closures'):
+                raise ValueError(f"backend '{backend}' cannot be metered")
+            return compile_closures(node, symtab, meter.instrument)()
+        if backend != 'tree':
+            if backend not in BACKENDS:
+                raise ValueError(f"unknown backend '{backend}'")
+            return BACKENDS[backend](node, symtab)
+        resolve(node)
+        frames = []
 
     match node:
         case ast.Literal():
@@ -37,71 +73,103 @@ def interpret(node: ast.IfExpr, symtab: SymTab) -> Value:
                 # 确保左侧是标识符
                 if isinstance(node.left, ast.Identifier):
                     # 计算右侧表达式的值
-                    value = interpret(node.right, symtab)
+                    value = interpret(node.right, symtab, frames, hot_loop_threshold=hot_loop_threshold)
                     # 更新现有变量的值
-                    symtab.update_variable(node.left.name, value)
+                    if node.left.depth >= 0:
+                        frames[node.left.depth][node.left.slot] = value
+                    else:
+                        symtab.update_variable(node.left.name, value)
                     return value
                 else:
                     raise TypeError("Left side of assignment must be an identifier.")
             if node.op == 'and':
-                left_value = interpret(node.left, symtab)
+                left_value = interpret(node.left, symtab, frames, hot_loop_threshold=hot_loop_threshold)
                 if not left_value:  # 如果左侧为假，则不需要评估右侧
                     return False
-                return interpret(node.right, symtab)
+                return interpret(node.right, symtab, frames, hot_loop_threshold=hot_loop_threshold)
             elif node.op == 'or':
-                left_value = interpret(node.left, symtab)
+                left_value = interpret(node.left, symtab, frames, hot_loop_threshold=hot_loop_threshold)
                 if left_value:  # 如果左侧为真，则不需要评估右侧
                     return True
-                return interpret(node.right, symtab)
+                return interpret(node.right, symtab, frames, hot_loop_threshold=hot_loop_threshold)
             else:
-                a: Value = interpret(node.left, symtab)
-                b: Value = interpret(node.right, symtab)
+                a: Value = interpret(node.left, symtab, frames, hot_loop_threshold=hot_loop_threshold)
+                b: Value = interpret(node.right, symtab, frames, hot_loop_threshold=hot_loop_threshold)
                 op_func = symtab.lookup_variable(node.op)
                 return op_func(a, b)
         # 处理其他二元操作符
 
         case ast.UnaryOp():
-            a: Value = interpret(node.operand, symtab)
+            a = interpret(node.operand, symtab, frames, hot_loop_threshold=hot_loop_threshold)
             op_func = symtab.lookup_variable(f"unary_{node.operator}")
             return op_func(a)
 
         case ast.IfExpr():
-            if interpret(node.condition,symtab):
-                return interpret(node.then_branch,symtab)
-            else:
-                return interpret(node.else_branch,symtab)
+            if interpret(node.condition, symtab, frames, hot_loop_threshold=hot_loop_threshold):
+                return interpret(node.then_branch, symtab, frames, hot_loop_threshold=hot_loop_threshold)
+            elif node.else_branch is not None:
+                return interpret(node.else_branch, symtab, frames, hot_loop_threshold=hot_loop_threshold)
+            return None
         # Handle Literal, BinaryOp, and IfExpr as before
         # Add new cases for variable declaration and block expression
 
 
         case ast.VarDecl():
             # 变量声明应该只在当前作用域中定义新变量
-            value = interpret(node.value, symtab)
-            symtab.define_variable(node.name, value,node.type)
+            value = interpret(node.value, symtab, frames, hot_loop_threshold=hot_loop_threshold)
+            if node.slot >= 0:
+                frames[-1][node.slot] = value
+            else:
+                symtab.define_variable(node.name, value, node.type)
             return value
 
         case ast.Identifier():
+            if node.depth >= 0:
+                return frames[node.depth][node.slot]
             return symtab.lookup_variable(node.name)
 
         case ast.BlockExpr():
-            symtab.enter_scope()
+            # 每个块一个定长的帧, 变量按 resolve 算出的下标存取
+            frames.append([None] * node.frame_size)
             for expr in node.expressions:
-                interpret(expr, symtab)
+                interpret(expr, symtab, frames, hot_loop_threshold=hot_loop_threshold)
             if node.result_expression is not None:
-                result = interpret(node.result_expression, symtab)
+                result = interpret(node.result_expression, symtab, frames,
+                                   hot_loop_threshold=hot_loop_threshold)
             else:
                 result = None
-            symtab.leave_scope()
+            frames.pop()
             return result
 
         case ast.WhileExpr():
-            while interpret(node.condition, symtab):
-                interpret(node.body, symtab)
+            # 热循环编译成 Python 代码, 在同一组帧上继续执行
+            if hot_loop_threshold is None:
+                while interpret(node.condition, symtab, frames, hot_loop_threshold=None):
+                    interpret(node.body, symtab, frames, hot_loop_threshold=None)
+                return None
+            if node.compiled is not None and node.compiled[0] == len(frames):
+                return node.compiled[1](symtab, frames)
+            while interpret(node.condition, symtab, frames, hot_loop_threshold=hot_loop_threshold):
+                interpret(node.body, symtab, frames, hot_loop_threshold=hot_loop_threshold)
+                node.iterations += 1
+                if node.iterations >= hot_loop_threshold:
+                    node.compiled = (len(frames), compile_loop(node, len(frames)))
+                    return node.compiled[1](symtab, frames)
             return None
 
-        # case ast.FunctionCall():
-        #     # 例子：调用内置函数
-        #     if node.name in builtin_functions:
-        #         arguments = [interpret(arg, symtab) for arg in node.arguments]
-        #         return builtin_functions[node.name](*arguments)
-        #     # 添加对用户定义函数的支持...
+        case ast.FunctionCall():
+            # 函数只能是符号表中的内置函数
+            arguments = [interpret(arg, symtab, frames, hot_loop_threshold=hot_loop_threshold)
+                         for arg in node.arguments]
+            return symtab.lookup_variable(node.name)(*arguments)
+
+    # None, e.g. a missing else branch
+    return None
+
+
+# Execution backends other than the tree walker: (tree, symtab) -> value
+BACKENDS: Dict[str, Callable[[ast.Expression, SymbolTable], Value]] = {
+    'closures': lambda node, symtab: compile_closures(node, symtab)(),
+    'bytecode': lambda node, symtab: execute(compile_bytecode(node), symtab),
+    'python': lambda node, symtab: run_python(compile_python(node), symtab),
+}
@@ -0,0 +1,144 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.models import ir
+
+
+def _divide(a: int, b: int) -> int:
+    # Like x86 idiv: the quotient is truncated towards zero
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+
+def _remainder(a: int, b: int) -> int:
+    return a - b * _divide(a, b)
+
+
+# The functions a `Call` may name, with the semantics of the compiled program
+IR_BUILTINS: Dict[str, Callable[..., Any]] = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': _divide,
+    '%': _remainder,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    # Both operands are already evaluated in the IR
+    'and': lambda a, b: a and b,
+    'or': lambda a, b: a or b,
+    'unary_not': lambda a: not a,
+    'unary_-': lambda a: -a,
+    'print_int': print,
+    'print_bool': lambda value: print('true' if value else 'false'),
+}
+
+# Operations of the prepared program; every operation is a 5-tuple
+_CONST, _COPY, _CALL1, _CALL2, _CALL, _JUMP, _COND_JUMP = range(7)
+
+
+class IRProgram:
+    """An IR instruction list prepared for repeated execution.
+
+    Preparing builds the label table once, gives every `IRVar` a register
+    number and binds each `Call` to its function from `functions` (by
+    default `IR_BUILTINS`), so `run` is a flat loop over tuples with no
+    lookups by name. Labels take no step of their own."""
+
+    def __init__(self, instructions: List[ir.Instruction],
+                 functions: Optional[Dict[str, Callable[..., Any]]] = None):
+        functions = IR_BUILTINS if functions is None else functions
+        self.registers: Dict[ir.IRVar, int] = {}
+
+        def register(var: ir.IRVar) -> int:
+            return self.registers.setdefault(var, len(self.registers))
+
+        # 标签指向它后面的第一条指令
+        labels: Dict[str, int] = {}
+        position = 0
+        for insn in instructions:
+            if isinstance(insn, ir.Label):
+                if insn.name in labels:
+                    raise ValueError(f"label '{insn.name}' is defined twice")
+                labels[insn.name] = position
+            else:
+                position += 1
+
+        def target(label: ir.Label) -> int:
+            if label.name not in labels:
+                raise ValueError(f"jump to undefined label '{label.name}'")
+            return labels[label.name]
+
+        program: List[Tuple[int, Any, Any, Any, Any]] = []
+        for insn in instructions:
+            match insn:
+                case ir.Label():
+                    continue
+                case ir.LoadIntConst() | ir.LoadBoolConst():
+                    program.append((_CONST, register(insn.dest), insn.value, None, None))
+                case ir.Copy():
+                    program.append((_COPY, register(insn.dest), register(insn.source), None, None))
+                case ir.Call():
+                    # `fun` is an IRVar for functions and a plain string for operators
+                    name = str(insn.fun)
+                    if name not in functions:
+                        raise ValueError(f"call to unknown function '{name}'")
+                    args = [register(arg) for arg in insn.args]
+                    dest = register(insn.dest)
+                    if len(args) == 1:
+                        program.append((_CALL1, dest, functions[name], args[0], None))
+                    elif len(args) == 2:
+                        program.append((_CALL2, dest, functions[name], args[0], args[1]))
+                    else:
+                        program.append((_CALL, dest, functions[name], tuple(args), None))
+                case ir.Jump():
+                    program.append((_JUMP, target(insn.label), None, None, None))
+                case ir.CondJump():
+                    program.append((_COND_JUMP, register(insn.cond), target(insn.then_label),
+                                    target(insn.else_label), None))
+                case _:
+                    raise ValueError(f"cannot execute {type(insn).__name__}")
+        self.program = program
+        # Instructions executed by the last `run`, e.g. to compute the cost per instruction
+        self.executed = 0
+
+    def run(self) -> Dict[ir.IRVar, Any]:
+        """Executes the program and returns the final value of every variable."""
+        program = self.program
+        end = len(program)
+        regs: List[Any] = [None] * len(self.registers)
+        pc = 0
+        executed = 0
+        while pc < end:
+            op, a, b, c, d = program[pc]
+            executed += 1
+            if op == _CALL2:
+                regs[a] = b(regs[c], regs[d])
+                pc += 1
+            elif op == _COND_JUMP:
+                pc = b if regs[a] else c
+            elif op == _COPY:
+                regs[a] = regs[b]
+                pc += 1
+            elif op == _CONST:
+                regs[a] = b
+                pc += 1
+            elif op == _JUMP:
+                pc = a
+            elif op == _CALL1:
+                regs[a] = b(regs[c])
+                pc += 1
+            else:
+                regs[a] = b(*[regs[i] for i in c])
+                pc += 1
+        self.executed = executed
+        return {var: regs[index] for var, index in self.registers.items()}
+
+
+def execute_ir(instructions: List[ir.Instruction],
+               functions: Optional[Dict[str, Callable[..., Any]]] = None) -> Dict[ir.IRVar, Any]:
+    """Runs `instructions` in-process, without assembling them; returns the
+    final value of every variable."""
+    return IRProgram(instructions, functions).run()
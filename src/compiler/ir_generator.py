@@ -2,15 +2,33 @@
 from typing import List, Type
 
 from src.compiler.type_checker import typecheck
-from src.models.ast import TypeExpr, Literal, BinaryOp, VarDecl, Identifier, IfExpr, FunctionCall, BlockExpr, WhileExpr
+from src.models.ast import Expression, TypeExpr, Literal, BinaryOp, VarDecl, Identifier, IfExpr, FunctionCall, BlockExpr, WhileExpr
 from src.models.ir import (
     IRVar, Instruction, LoadIntConst, LoadBoolConst, Call, Copy, Label, Jump, CondJump
 )
+from src.models.hashcons import HashConser
 from src.models.SymTab import SymTab, add_builtin_symbols
+from src.models.scope_table import ScopeTable, builtin_snapshot
 from src.models.types import Unit, Int, Bool, SourceLocation
 
 
-def generate_ir(ast_root: TypeExpr) -> List[Instruction]:
+# Instructions without side effects; structurally equal ones may be shared
+PURE_INSTRUCTIONS = (LoadIntConst, LoadBoolConst, Copy)
+PURE_FUNCTIONS = frozenset({'+', '-', '*', '/', '%', '==', '!=', '<', '<=', '>', '>=', 'and', 'or'})
+
+
+def is_pure(insn: Instruction) -> bool:
+    if isinstance(insn, Call):
+        return str(insn.fun) in PURE_FUNCTIONS
+    return isinstance(insn, PURE_INSTRUCTIONS)
+
+
+def generate_ir(ast_root: Expression, interner: HashConser | None = None,
+                typechecked: bool = False) -> List[Instruction]:
+    """Reads the types of the nodes from their `type` field. Unless
+    `typechecked` is set, `typecheck` is run once on the whole tree first.
+    With an `interner`, structurally equal pure instructions in the result
+    are one shared object."""
 
     instructions: List[Instruction] = []
     symtab = SymTab()
@@ -25,6 +43,10 @@ def generate_ir(ast_root: TypeExpr) -> List[Instruction]:
     var_unit = IRVar("unit")
     var_types[var_unit] = Unit()
 
+    if not typechecked:
+        # A table of its own: the checker defines and updates variables as it goes
+        typecheck(ast_root, ScopeTable(builtin_snapshot()))
+
     # 新变量的创建和类型记录
     def new_var(t: Type) -> IRVar:
         nonlocal next_var_id, var_types
@@ -45,9 +67,7 @@ def generate_ir(ast_root: TypeExpr) -> List[Instruction]:
 
         # print( 'vis', node)
         location = node.location
-        # var_type = node.type  # 假设AST节点已包含类型注解
-        # print('bf check',node)
-        var_type = typecheck(node, symtab)
+        var_type = node.type  # annotated by typecheck
 
 
         if isinstance(node, Literal):
@@ -155,8 +175,10 @@ def generate_ir(ast_root: TypeExpr) -> List[Instruction]:
 
             instructions.append(loop_start_label)
             symtab, cond_var = visit(symtab,node.condition)
-            instructions.append(CondJump(cond=cond_var, then_label=Label(name=new_label_name(), location=location),
+            loop_body_label = Label(name=new_label_name(), location=location)
+            instructions.append(CondJump(cond=cond_var, then_label=loop_body_label,
                                          else_label=loop_end_label, location=location))
+            instructions.append(loop_body_label)
             # print('sym', symtab.scopes)
             visit(symtab,node.body)
 
@@ -172,11 +194,13 @@ def generate_ir(ast_root: TypeExpr) -> List[Instruction]:
 
     print(var_final_result)
     if 'src.models.ast' not in str(type(var_final_result)):
-        if str(var_types[var_final_result]) == 'Int':
+        if var_types[var_final_result] is Int():
             instructions.append(Call(fun=print_int_irvar, args=[var_final_result], dest=var_unit, location=L))
-        elif str(var_types[var_final_result]) == 'Bool':
+        elif var_types[var_final_result] is Bool():
             instructions.append(Call(fun=print_bool_irvar, args=[var_final_result], dest=var_unit, location=L))
 
+    if interner is not None:
+        instructions = [interner(insn) if is_pure(insn) else insn for insn in instructions]
     return instructions
 
 
@@ -0,0 +1,82 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.models import ast
+
+Thunk = Callable[[], Any]
+
+
+class StepBudgetExceeded(RuntimeError):
+    """Raised when a metered program evaluates more nodes than its budget allows."""
+
+
+@dataclass
+class NodeStats:
+    hits: int = 0
+    # Seconds spent evaluating the node, including its children
+    time: float = 0.0
+
+
+class Meter:
+    """Counts the work of a program run by `interpret(..., meter=meter)`.
+
+    Every evaluation of a node is one step; once `steps` would exceed
+    `budget`, the run stops with `StepBudgetExceeded`. Each node also has
+    a hit count and, with `timing`, its cumulative time. The counting is
+    compiled into the program (see `compile_closures`), so programs run
+    without a meter pay nothing for it. A meter can be reused for several
+    runs; the counts and the budget then cover all of them."""
+
+    def __init__(self, budget: Optional[int] = None, timing: bool = True):
+        self.budget = budget
+        self.timing = timing
+        self.steps = 0
+        self.nodes: Dict[int, Tuple[ast.Expression, NodeStats]] = {}
+
+    def instrument(self, node: ast.Expression, thunk: Thunk) -> Thunk:
+        """Wraps the compiled `thunk` of `node` so that it counts its runs."""
+        _, stats = self.nodes.setdefault(id(node), (node, NodeStats()))
+        budget = float('inf') if self.budget is None else self.budget
+        meter = self
+
+        def exceeded() -> StepBudgetExceeded:
+            return StepBudgetExceeded(f"step budget of {budget} exceeded at {type(node).__name__} "
+                                      f"(line {node.location.line}, column {node.location.column})")
+
+        if not self.timing:
+            def counted() -> Any:
+                meter.steps += 1
+                if meter.steps > budget:
+                    raise exceeded()
+                stats.hits += 1
+                return thunk()
+            return counted
+
+        clock = time.perf_counter
+
+        def timed() -> Any:
+            meter.steps += 1
+            if meter.steps > budget:
+                raise exceeded()
+            stats.hits += 1
+            start = clock()
+            try:
+                return thunk()
+            finally:
+                stats.time += clock() - start
+        return timed
+
+    def report(self) -> List[Dict[str, Any]]:
+        """One entry per node that ran, the most expensive first."""
+        entries: List[Dict[str, Any]] = [
+            {'node': type(node).__name__, 'file': node.location.file, 'line': node.location.line,
+             'column': node.location.column, 'hits': stats.hits, 'time': stats.time}
+            for node, stats in self.nodes.values() if stats.hits
+        ]
+        entries.sort(key=lambda entry: (-entry['time'], -entry['hits']))
+        return entries
+
+    def to_json(self) -> str:
+        return json.dumps({'steps': self.steps, 'budget': self.budget, 'nodes': self.report()})
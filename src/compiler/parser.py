@@ -1,192 +1,410 @@
-from src.models import ast
-from src.models.types import Token
-
-precedence_levels = [
-    ['='],
-    ['or'],
-    ['and'],
-    ['==', '!='],
-    ['<', '<=', '>', '>='],
-    ['+', '-', '%'],
-    ['*', '/'],
-    ['not'],  # 一元操作符的优先级
-]
-
-def parse(tokens: list[Token], right_associative=False) -> ast.Expression:
-
-    # This keeps track of which token we're looking at.
-
-    pos = 0
+import copy
+from bisect import bisect_right
+from collections import deque
+from dataclasses import fields
+from typing import Any, Generator, Iterable, TypeVar
 
-    def peek() -> Token:
-        if pos < len(tokens):
-            return tokens[pos]
+from src.models import ast
+from src.models.hashcons import HashConser
+from src.models.token_buffer import TokenBuffer, TOKEN_TYPES
+from src.models.types import Token, SourceLocation
+
+# A node type; `finish` returns the node it is given
+_Node = TypeVar('_Node', bound=ast.Expression)
+
+# Precedence table for `parse_binary_expression`:
+# operator -> (precedence, right associative). Higher binds tighter.
+binary_operators: dict[str, tuple[int, bool]] = {
+    '=': (1, True),
+    'or': (2, False),
+    'and': (3, False),
+    '==': (4, False), '!=': (4, False),
+    '<': (5, False), '<=': (5, False), '>': (5, False), '>=': (5, False),
+    '+': (6, False), '-': (6, False), '%': (6, False),
+    '*': (7, False), '/': (7, False),
+}
+
+# The same table as (left binding power, right binding power): an operator
+# waiting for its right operand takes it when the next operator's left power
+# is lower than its right power. Same-precedence operators to the right
+# have a lower left power for left associative operators and a higher
+# one for right associative ones. Tokens that are not operators have 0.
+_BINDING_POWERS: dict[str, tuple[int, int]] = {
+    op: (2 * precedence, 2 * precedence - 1 if right_assoc else 2 * precedence + 1)
+    for op, (precedence, right_assoc) in binary_operators.items()
+}
+_NO_OPERATOR = (0, 0)
+
+# Identifiers that cannot start an operand of a binary operator by themselves
+_NOT_NAMES = frozenset({'not', 'if', 'while'})
+
+# A suspended parsing function in explicit-stack mode. It yields the frame of
+# each sub-expression it needs and is sent back the parsed expression.
+ParseFrame = Generator['ParseFrame', ast.Expression, ast.Expression]
+
+
+def run_frames(root: ParseFrame) -> ast.Expression:
+    """Runs `root` and the frames it yields on an explicit stack instead of
+    the Python call stack, so nesting depth is only bounded by memory."""
+    stack = [root]
+    value: Any = None
+    while stack:
+        try:
+            child = stack[-1].send(value)
+        except StopIteration as done:
+            stack.pop()
+            value = done.value
         else:
-            return Token(loc=tokens[-1].loc, type="end", text="")
-
-    def consume(expected:  str | list[str] | None = None) -> Token:
-        nonlocal pos
-        token = peek()
-        if isinstance(expected, str) and token.text != expected:
-            raise Exception(f'{token.loc}: expected "{expected}"')
-        if isinstance(expected, list) and token.text not in expected:
+            stack.append(child)
+            value = None
+    return value
+
+
+def parse(tokens: Iterable[Token] | TokenBuffer, right_associative: bool = False,
+          explicit_stack: bool = False, token_range: tuple[int, int] | None = None,
+          previous: ast.Expression | None = None,
+          changed: tuple[int, int, int] | None = None,
+          interner: HashConser | None = None) -> ast.Expression:
+    """Parses a token list, a lazy token stream (e.g. from `tokenize_stream`)
+    or a `TokenBuffer`. Tokens are pulled from a stream only as far as the
+    lookahead needs them, and a buffer is read in place without creating
+    `Token` objects.
+
+    With `explicit_stack=True` nested expressions are parsed by the `*_frame`
+    generators driven by `run_frames`, so arbitrarily deep nesting does not
+    hit the recursion limit. That mode does not support `right_associative`.
+
+    For a `TokenBuffer`, `token_range=(start, end)` parses only tokens
+    `start:end`. Passing the `previous` tree of the buffer together with the
+    `changed` token range returned by `retokenize` reparses incrementally,
+    see `reparse`.
+
+    With an `interner`, structurally equal subtrees are built only once and
+    shared (see `HashConser`). Shared nodes do not record token ranges, so
+    such a tree cannot be reparsed incrementally."""
+    if explicit_stack and right_associative:
+        raise ValueError("explicit_stack mode does not support right_associative")
+    if previous is not None:
+        if interner is not None:
+            raise ValueError("a tree with shared subtrees cannot be reparsed incrementally")
+        if not isinstance(tokens, TokenBuffer) or changed is None:
+            raise ValueError("incremental parsing needs a TokenBuffer and the changed token range")
+        return reparse(tokens, previous, changed, right_associative, explicit_stack)
+
+    # Text and type of the token we're looking at, updated by `advance()`.
+    # The parsing functions read these directly because they are consulted
+    # several times per token.
+    current_text = ""
+    current_type = "end"
+
+    if isinstance(tokens, TokenBuffer):
+        buffer = tokens
+        texts, text_ids, kinds = buffer.texts, buffer.text_ids, buffer.kinds
+        starts, resolve_location = buffer.starts, buffer.lines.location
+        first, count = token_range if token_range is not None else (0, len(buffer))
+        pos = first - 1
+
+        def peek_text(offset: int) -> str:
+            i = pos + offset
+            return texts[text_ids[i]] if i < count else ""
+
+        def peek_loc() -> SourceLocation:
+            if pos < count:
+                return resolve_location(starts[pos])
+            return resolve_location(starts[count - 1]) if count > first else SourceLocation()
+
+        def consume_loc() -> SourceLocation:
+            # The location of the current token, which is consumed
+            location = resolve_location(starts[pos])
+            advance()
+            return location
+
+        def advance() -> None:
+            nonlocal pos, current_text, current_type
+            pos += 1
+            if pos < count:
+                current_text = texts[text_ids[pos]]
+                current_type = TOKEN_TYPES[kinds[pos]]
+            else:
+                current_text = ""
+                current_type = "end"
+    else:
+        token_iter = iter(tokens)
+        current_token: Token | None = None
+        # Tokens after the current one that have been read from the stream already.
+        lookahead: deque[Token] = deque()
+        last_loc = SourceLocation()
+        pos = -1
+
+        def peek_text(offset: int) -> str:
+            while len(lookahead) < offset:
+                token = next(token_iter, None)
+                if token is None:
+                    return ""
+                lookahead.append(token)
+            return lookahead[offset - 1].text
+
+        def peek_loc() -> SourceLocation:
+            return current_token.loc if current_token is not None else last_loc
+
+        def consume_loc() -> SourceLocation:
+            # `advance()` written out, since it runs for almost every token
+            nonlocal pos, current_token, current_text, current_type, last_loc
+            location = last_loc
+            pos += 1
+            if lookahead:
+                current_token = lookahead.popleft()
+            else:
+                current_token = next(token_iter, None)
+            if current_token is not None:
+                current_text = current_token.text
+                current_type = current_token.type
+                last_loc = current_token.loc
+            else:
+                current_text = ""
+                current_type = "end"
+            return location
+
+        def advance() -> None:
+            nonlocal pos, current_token, current_text, current_type, last_loc
+            pos += 1
+            if lookahead:
+                current_token = lookahead.popleft()
+            else:
+                current_token = next(token_iter, None)
+            if current_token is not None:
+                current_text = current_token.text
+                current_type = current_token.type
+                last_loc = current_token.loc
+            else:
+                current_text = ""
+                current_type = "end"
+
+    def consume(expected:  str | list[str] | None = None) -> str:
+        text = current_text
+        if expected is None:
+            pass
+        elif isinstance(expected, str) and text != expected:
+            raise Exception(f'{peek_loc()}: expected "{expected}"')
+        if isinstance(expected, list) and text not in expected:
             comma_separated = ", ".join([f'"{e}"' for e in expected])
-            raise Exception(f'{token.loc}: expected one of: {comma_separated}')
-        pos += 1
-        return token
-
+            raise Exception(f'{peek_loc()}: expected one of: {comma_separated}')
+        advance()
+        return text
+
+    def finish(node: _Node, start: int, *children: ast.Expression | None) -> _Node:
+        """Records that `node` covers the tokens from index `start` up to the
+        current one. Children hold absolute offsets until their parent finishes."""
+        if interner is not None:
+            return interner(node)
+        for child in children:
+            if isinstance(child, ast.Expression):
+                child.token_offset -= start
+        node.token_offset = start
+        node.token_count = pos - start
+        return node
 
     def parse_int_literal() -> ast.Literal:
-        if peek().type != 'integer' :
-            raise Exception(f'{peek().loc}: expected an integer literal')
-        token = consume()
-        return ast.Literal(value=int(token.text),location=token.loc)
+        if current_type != 'integer' :
+            raise Exception(f'{peek_loc()}: expected an integer literal')
+        location = peek_loc()
+        start = pos
+        return finish(ast.Literal(value=int(consume()),location=location), start)
 
     def parse_bool_literal() -> ast.Literal:
-        if peek().type != 'bool':
-            raise Exception(f'{peek().loc}: expected an integer literal')
-        token = consume()
-        if 'rue' in token.text:
+        if current_type != 'bool':
+            raise Exception(f'{peek_loc()}: expected an integer literal')
+        location = peek_loc()
+        start = pos
+        if 'rue' in consume():
             value = True
         else:
             value = False
-        return ast.Literal(value=value,location=token.loc)
+        return finish(ast.Literal(value=value,location=location), start)
 
     def parse_identifier() -> ast.Identifier:
-        if peek().type != 'identifier':
-            raise Exception(f'{peek().loc}: expected an identifier')
-        token = consume()
-        return ast.Identifier(name=token.text,location=token.loc)
+        if current_type != 'identifier':
+            raise Exception(f'{peek_loc()}: expected an identifier')
+        location = peek_loc()
+        start = pos
+        return finish(ast.Identifier(name=consume(),location=location), start)
 
     def parse_term() -> ast.Expression:
         # 处理乘法和除法
+        start = pos
         left = parse_factor()
-        while peek().text in ['*', '/']:
-            operator_token = consume()
-            operator = operator_token.text
+        while current_text in ['*', '/']:
+            location = peek_loc()
+            operator = consume()
             right = parse_factor()
-            left = ast.BinaryOp(left=left, op=operator, right=right,location=operator_token.loc)
+            left = finish(ast.BinaryOp(left=left, op=operator, right=right,location=location), start, left, right)
         return left
 
-    def parse_binary_expression(level=0) -> ast.Expression:
-        if level == len(precedence_levels):
-            return parse_unary_expression()
-
-        left_expr = parse_binary_expression(level + 1)
-        while peek().text in precedence_levels[level]:
-            op_token = consume()
-            if op_token.text == '=':
-                # Special handling for right associativity of assignment
-                right_expr = parse_binary_expression(level)  # Use the same level for right associativity
+    def parse_binary_expression() -> ast.Expression:
+        # Precedence climbing on an explicit stack, driven by `binary_operators`:
+        # one loop iteration per operand instead of a call per precedence level.
+        # Operators still waiting for their right operand, with their left
+        # operand: (left, first token of left, right binding power, op, location)
+        waiting: list[tuple[ast.Expression, int, int, str, SourceLocation]] = []
+        while True:
+            start = pos
+            # Names and integers are by far the most common operands, so they are
+            # built here, with positional arguments because that is faster
+            if current_type == 'identifier' and current_text not in _NOT_NAMES:
+                name = current_text
+                location = consume_loc()
+                if current_text == '(':
+                    operand = parse_call_arguments(name, location, start)
+                else:
+                    operand = ast.Identifier(location, name)
+                    if interner is None:
+                        operand.token_offset = start
+                        operand.token_count = 1
+                    else:
+                        operand = interner(operand)
+            elif current_type == 'integer':
+                value = int(current_text)
+                operand = ast.Literal(consume_loc(), value)
+                if interner is None:
+                    operand.token_offset = start
+                    operand.token_count = 1
+                else:
+                    operand = interner(operand)
+            elif current_text == 'not':
+                operand = parse_unary_expression()
             else:
-                right_expr = parse_binary_expression(level + 1)
-            left_expr = ast.BinaryOp(left=left_expr,op=op_token.text, right=right_expr,location=op_token.loc)
-
-        return left_expr
+                operand = parse_factor()
+
+            op = current_text
+            left_power, right_power = _BINDING_POWERS.get(op, _NO_OPERATOR)
+            # Waiting operators that bind tighter than `op` take the operand now
+            while waiting and waiting[-1][2] > left_power:
+                left, left_start, _, left_op, location = waiting.pop()
+                node = ast.BinaryOp(location, left, left_op, operand)
+                # `finish` written out
+                if interner is None:
+                    left.token_offset -= left_start
+                    operand.token_offset -= left_start
+                    node.token_offset = left_start
+                    node.token_count = pos - left_start
+                    operand = node
+                else:
+                    operand = interner(node)
+                start = left_start
+            if not left_power:
+                return operand
+            waiting.append((operand, start, right_power, op, consume_loc()))
 
     def parse_unary_expression() -> ast.Expression:
-        if peek().text == 'not':
-            op_token = consume('not')
+        if current_text == 'not':
+            start = pos
+            location = consume_loc()
             expr = parse_unary_expression()  # 递归以支持链式一元操作符
-            return ast.UnaryOp(operator=op_token.text, operand=expr,location=op_token.loc)
+            return finish(ast.UnaryOp(operator='not', operand=expr,location=location), start, expr)
         else:
             return parse_factor()
 
     def parse_factor() -> ast.Expression:
-        if peek().text == '(':
+        # Literals and identifiers come first: they are by far the most common
+        if current_type == 'integer':
+            return parse_int_literal()
+        elif current_type == 'identifier' and current_text != 'if' and current_text != 'while':
+            start = pos
+            name = current_text
+            location = consume_loc()
+            if current_text == '(':
+                return parse_call_arguments(name, location, start)
+            return finish(ast.Identifier(name=name, location=location), start)
+        elif current_text == '(':
             return parse_parenthesized()
-        elif peek().text == '{':
+        elif current_text == '{':
             return parse_block()
-        elif peek().text == 'if':
+        elif current_text == 'if':
             return parse_if_expr()
-        elif peek().text == 'while':
+        elif current_text == 'while':
             return parse_while_expr()
-        elif peek().type == 'identifier':
-            next_pos = pos + 1
-            if next_pos < len(tokens) and tokens[next_pos].text == '(':
-                return parse_function_call()
-            else:
-                return parse_identifier()
-        elif peek().type == 'bool':
+        elif current_type == 'bool':
             return parse_bool_literal()
-        elif peek().type == 'integer':
-            return parse_int_literal()
         else:
-            raise Exception(f'{peek().loc}: unexpected token "{peek().text}"')
+            raise Exception(f'{peek_loc()}: unexpected token "{current_text}"')
 
 
     def parse_block() -> ast.BlockExpr:
         # consume('{')
-        opening_brace_token = consume('{')
-        opening_brace_location = opening_brace_token.loc
+        opening_brace_location = peek_loc()
+        start = pos
+        consume('{')
         expressions = []
         result_expression = None
 
-        while not peek().text == '}':
+        while not current_text == '}':
 
-            if peek().text in ['if', 'while', '{']:  # Starting a new block or control structure
+            if current_text in ['if', 'while', '{']:  # Starting a new block or control structure
                 expr = parse_expression()
                 expressions.append(expr)
                 # Check if next token is '}', in which case, this block/expression might be the result_expression
-                if peek().text == '}':
+                if current_text == '}':
                     result_expression = expressions.pop()  # Last expression is result_expression
-                elif peek().text == ';':  # Optional semicolon after a block/control structure
+                elif current_text == ';':  # Optional semicolon after a block/control structure
                     consume(';')
             else:
-                if peek().text == 'var':
+                if current_text == 'var':
                     expr = parse_var_decl()
                 else:
                     expr = parse_expression()
-                if peek().text == ';':
+                if current_text == ';':
                     consume(';')
                     expressions.append(expr)
-                elif peek().text == '}':
+                elif current_text == '}':
                     result_expression = expr  # Last expression is result_expression
-                elif peek().text in ['if', 'while', '{']:  # No semicolon required before these
+                elif current_text in ['if', 'while', '{']:  # No semicolon required before these
                     expressions.append(expr)
 
                 else:
-                    raise Exception(f"{peek().loc}: Expected ';' or '}}' but found '{peek().text}'")
+                    raise Exception(f"{peek_loc()}: Expected ';' or '}}' but found '{current_text}'")
 
         consume('}')
         # return BlockExpr(expressions, result_expression)
-        return ast.BlockExpr(expressions=expressions, result_expression=result_expression,location=opening_brace_location)
+        return finish(ast.BlockExpr(expressions=expressions, result_expression=result_expression,location=opening_brace_location),
+                      start, *expressions, result_expression)
 
-    def parse_function_call() -> ast.Expression:
-        name_token = consume()  # Consume the function name token, capturing the function name
-        function_location = name_token.loc
+    def parse_call_arguments(name: str, function_location: SourceLocation, start: int) -> ast.Expression:
+        # The function name has been consumed already
         consume('(')  # 消费左括号
         arguments = []
-        if peek().text != ')':
+        if current_text != ')':
             while True:
                 arg = parse_expression()
                 arguments.append(arg)
-                if peek().text == ',':
+                if current_text == ',':
                     consume(',')  # 消费逗号，继续读取下一个参数
                 else:
                     break
         consume(')')  # 消费右括号
-        return ast.FunctionCall(name=name_token.text, arguments=arguments,location=function_location)
+        return finish(ast.FunctionCall(name=name, arguments=arguments,location=function_location), start, *arguments)
 
     def parse_if_expr() -> ast.Expression:
-        name_token = consume('if')  # Consume the function name token, capturing the function name
-        function_location = name_token.loc
+        function_location = peek_loc()
+        start = pos
+        consume('if')
         condition = parse_expression()
         consume('then')
         then_branch = parse_expression()
         else_branch = None
-        if peek().text == 'else':
+        if current_text == 'else':
             consume('else')
             else_branch = parse_expression()
-        return ast.IfExpr(condition=condition, then_branch=then_branch, else_branch=else_branch,location=function_location)
+        return finish(ast.IfExpr(condition=condition, then_branch=then_branch, else_branch=else_branch,location=function_location),
+                      start, condition, then_branch, else_branch)
 
     def parse_while_expr() -> ast.Expression:
-        name_token = consume('while')  # Consume the 'while' keyword
-        function_location = name_token.loc
+        function_location = peek_loc()
+        start = pos
+        consume('while')  # Consume the 'while' keyword
         condition = parse_expression()
         consume('do')  # Consume the 'do' keyword
         body = parse_expression()
-        return ast.WhileExpr(condition=condition, body=body, location=function_location)
+        return finish(ast.WhileExpr(condition=condition, body=body, location=function_location), start, condition, body)
 
 
     def parse_parenthesized() -> ast.Expression:
@@ -205,67 +423,315 @@ def parse(tokens: list[Token], right_associative=False) -> ast.Expression:
     #     value = parse_expression()  # Parse the initialization expression
     #     return ast.VarDecl(name=name_token.text, value=value,location=function_location)
 
-    def parse_expression_right() -> ast.Expression:
-        left = parse_term()
-
-        if peek().text in ['+', '-']:
-            operator_token = consume()
-            operator = operator_token.text
-
-            # 通过递归调用 `parse_expression` 来解析右边的表达式，
-            # 实现右结合性
-            right = parse_expression()
-
-            # 构建并返回一个二元操作的AST节点，左边是`left`，右边是`right`的结果
-            return ast.BinaryOp(left=left,op=operator,right=right,location=operator_token.loc)
-        else:
-            return left
-
-
     # 根据 right_associative 参数选择解析函数
     def parse_expression() -> ast.Expression:
         if right_associative:
             return parse_expression_right()
         else:
-            return parse_binary_expression(0)
+            return parse_binary_expression()
 
 
     # 右结合解析逻辑
     def parse_expression_right() -> ast.Expression:
         # 之前的 parse_expression_right() 代码
+        start = pos
         left = parse_term()
-        if peek().text in ['+', '-']:
-            operator_token = consume()
-            operator = operator_token.text
+        if current_text in ['+', '-']:
+            location = peek_loc()
+            operator = consume()
             right = parse_expression()  # 注意这里递归调用 parse_expression()
-            return ast.BinaryOp(left=left, op=operator, right=right,location=operator_token.loc)
+            return finish(ast.BinaryOp(left=left, op=operator, right=right,location=location), start, left, right)
         else:
             return left
 
-    def parse_type_expr(token: Token) -> ast.TypeExpr:
-        if token.text == "Int":
-            return ast.IntTypeExpr(location=token.loc)
-        elif token.text == "Bool":
-            return ast.BoolTypeExpr(location=token.loc)
+    def parse_type_expr() -> ast.TypeExpr:
+        location = peek_loc()
+        text = consume()
+        if text == "Int":
+            return ast.IntTypeExpr(location=location)
+        elif text == "Bool":
+            return ast.BoolTypeExpr(location=location)
         else:
-            raise Exception(f"Unknown type: {token.text}")
+            raise Exception(f"Unknown type: {text}")
 
     def parse_var_decl() -> ast.VarDecl:
-        name_token = consume('var')  # Consume the function name token, capturing the function name
-        function_location = name_token.loc
-        name = consume().text
+        function_location = peek_loc()
+        start = pos
+        consume('var')
+        name = consume()
         type_annotation = None
-        if peek().text == ":":
+        if current_text == ":":
             consume(":")
-            type_annotation = parse_type_expr(consume())
+            type_annotation = parse_type_expr()
         consume("=")
-        value = parse_expression().value
+        value = parse_expression()
         # bool or int
-        return ast.VarDecl(name=name, type_annotation=type_annotation, value=value, location=function_location)
+        return finish(ast.VarDecl(name=name, type_annotation=type_annotation, value=value, location=function_location),
+                      start, value)
 
-    res = parse_expression()
-    if peek().type != 'end':
-        raise Exception(f"Unexpected token at {peek().loc}: '{peek().text}'")
+    # Explicit-stack mode: the same grammar as above, but every recursive call
+    # becomes a `yield` of the callee's frame, handled by `run_frames`.
+
+    def parse_leaf() -> ast.Expression | None:
+        # Literals and plain identifiers are parsed without pushing a frame
+        if current_type == 'integer':
+            return parse_int_literal()
+        elif current_type == 'bool':
+            return parse_bool_literal()
+        elif current_type == 'identifier' and current_text not in ['not', 'if', 'while'] and peek_text(1) != '(':
+            return parse_identifier()
+        return None
+
+    def parse_binary_expression_frame(min_precedence: int = 1) -> ParseFrame:
+        start = pos
+        left_expr = parse_leaf()
+        if left_expr is None:
+            if current_text == 'not':
+                left_expr = yield parse_unary_expression_frame()
+            else:
+                left_expr = yield parse_factor_frame()
+        while True:
+            binding = binary_operators.get(current_text)
+            if binding is None or binding[0] < min_precedence:
+                return left_expr
+            precedence, right_assoc = binding
+            location = peek_loc()
+            op = current_text
+            advance()
+            right_expr = yield parse_binary_expression_frame(precedence if right_assoc else precedence + 1)
+            left_expr = finish(ast.BinaryOp(left=left_expr, op=op, right=right_expr, location=location),
+                               start, left_expr, right_expr)
+
+    def parse_unary_expression_frame() -> ParseFrame:
+        location = peek_loc()
+        start = pos
+        operator = consume('not')
+        expr = parse_leaf()
+        if expr is None:
+            if current_text == 'not':
+                expr = yield parse_unary_expression_frame()
+            else:
+                expr = yield parse_factor_frame()
+        return finish(ast.UnaryOp(operator=operator, operand=expr, location=location), start, expr)
+
+    def parse_factor_frame() -> ParseFrame:
+        if current_type == 'identifier' and current_text != 'if' and current_text != 'while':
+            return (yield parse_function_call_frame())
+        elif current_text == '(':
+            consume('(')
+            expr = yield parse_binary_expression_frame()
+            consume(')')
+            return expr
+        elif current_text == '{':
+            return (yield parse_block_frame())
+        elif current_text == 'if':
+            return (yield parse_if_expr_frame())
+        elif current_text == 'while':
+            return (yield parse_while_expr_frame())
+        else:
+            raise Exception(f'{peek_loc()}: unexpected token "{current_text}"')
+
+    def parse_block_frame() -> ParseFrame:
+        opening_brace_location = peek_loc()
+        start = pos
+        consume('{')
+        expressions = []
+        result_expression = None
+
+        while not current_text == '}':
+            if current_text in ['if', 'while', '{']:
+                expr = yield parse_binary_expression_frame()
+                expressions.append(expr)
+                if current_text == '}':
+                    result_expression = expressions.pop()
+                elif current_text == ';':
+                    consume(';')
+            else:
+                if current_text == 'var':
+                    expr = yield parse_var_decl_frame()
+                else:
+                    expr = yield parse_binary_expression_frame()
+                if current_text == ';':
+                    consume(';')
+                    expressions.append(expr)
+                elif current_text == '}':
+                    result_expression = expr
+                elif current_text in ['if', 'while', '{']:
+                    expressions.append(expr)
+                else:
+                    raise Exception(f"{peek_loc()}: Expected ';' or '}}' but found '{current_text}'")
+
+        consume('}')
+        return finish(ast.BlockExpr(expressions=expressions, result_expression=result_expression,location=opening_brace_location),
+                      start, *expressions, result_expression)
+
+    def parse_function_call_frame() -> ParseFrame:
+        function_location = peek_loc()
+        start = pos
+        name = consume()
+        consume('(')
+        arguments = []
+        if current_text != ')':
+            while True:
+                arg = yield parse_binary_expression_frame()
+                arguments.append(arg)
+                if current_text == ',':
+                    consume(',')
+                else:
+                    break
+        consume(')')
+        return finish(ast.FunctionCall(name=name, arguments=arguments,location=function_location), start, *arguments)
+
+    def parse_if_expr_frame() -> ParseFrame:
+        function_location = peek_loc()
+        start = pos
+        consume('if')
+        condition = yield parse_binary_expression_frame()
+        consume('then')
+        then_branch = yield parse_binary_expression_frame()
+        else_branch = None
+        if current_text == 'else':
+            consume('else')
+            else_branch = yield parse_binary_expression_frame()
+        return finish(ast.IfExpr(condition=condition, then_branch=then_branch, else_branch=else_branch,location=function_location),
+                      start, condition, then_branch, else_branch)
+
+    def parse_while_expr_frame() -> ParseFrame:
+        function_location = peek_loc()
+        start = pos
+        consume('while')
+        condition = yield parse_binary_expression_frame()
+        consume('do')
+        body = yield parse_binary_expression_frame()
+        return finish(ast.WhileExpr(condition=condition, body=body, location=function_location), start, condition, body)
+
+    def parse_var_decl_frame() -> ParseFrame:
+        function_location = peek_loc()
+        start = pos
+        consume('var')
+        name = consume()
+        type_annotation = None
+        if current_text == ":":
+            consume(":")
+            type_annotation = parse_type_expr()
+        consume("=")
+        value = yield parse_binary_expression_frame()
+        return finish(ast.VarDecl(name=name, type_annotation=type_annotation, value=value, location=function_location),
+                      start, value)
+
+    advance()
+    if explicit_stack:
+        res = run_frames(parse_binary_expression_frame())
+    else:
+        res = parse_expression()
+    if current_type != 'end':
+        raise Exception(f"Unexpected token at {peek_loc()}: '{current_text}'")
 
     return res
 
+
+
+# Tokens that can follow an if/while expression without being absorbed by it,
+# whatever its last branch parses to.
+_CLOSING_TOKENS = frozenset({';', ')', ',', '}'})
+
+
+def _child_at(node: ast.Expression, offset: int) -> ast.Expression | None:
+    """The last child of `node` that starts at or before the relative `offset`."""
+    found = None
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if isinstance(value, list) and value:
+            # Lists hold expressions in source order, so bisect instead of scanning a long block
+            i = bisect_right(value, offset, key=lambda item: item.token_offset) - 1
+            value = value[i] if i >= 0 else None
+        if isinstance(value, ast.Expression) and value.token_offset <= offset:
+            if found is None or value.token_offset > found.token_offset:
+                found = value
+    return found
+
+
+def _replace_child(node: ast.Expression, old: ast.Expression, new: ast.Expression,
+                   delta: int) -> ast.Expression:
+    """A copy of `node` with the child `old` replaced by `new`, which covers
+    `delta` tokens more. The children after it are shifted by `delta`."""
+    node = copy.copy(node)
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if value is old:
+            setattr(node, f.name, new)
+        elif isinstance(value, ast.Expression):
+            if delta and value.token_offset > old.token_offset:
+                value.token_offset += delta
+        elif isinstance(value, list) and value:
+            i = bisect_right(value, old.token_offset, key=lambda item: item.token_offset)
+            if i and value[i - 1] is old:
+                value = value.copy()
+                value[i - 1] = new
+                setattr(node, f.name, value)
+            if delta:
+                for item in value[i:]:
+                    item.token_offset += delta
+    node.token_count += delta
+    return node
+
+
+def reparse(buffer: TokenBuffer, previous: ast.Expression, changed: tuple[int, int, int],
+            right_associative: bool = False, explicit_stack: bool = False) -> ast.Expression:
+    """Updates `previous`, the tree of `buffer` before an edit, after tokens
+    `first:old_end` were replaced by tokens `first:new_end` (as returned by
+    `retokenize`).
+
+    Only the smallest block, if or while expression that encloses the edit is
+    parsed again; if its new text does not parse to the same kind of node in
+    the same context, the next enclosing one is tried, and at last the whole
+    buffer. Subtrees outside of the reparsed node are reused as they are, and
+    only its ancestors are copied. The token offsets of reused nodes after the
+    edit are updated in place, so `previous` must not be used afterwards.
+    Their locations are not updated: if the edit added or removed lines, the
+    line numbers of the nodes after it are stale."""
+    first, old_end, new_end = changed
+    if first == old_end == new_end:
+        return previous
+    delta = new_end - old_end
+
+    # The nodes from the root down to the smallest one containing the edit,
+    # with their absolute start.
+    path = [(previous, previous.token_offset)]
+    node, start = path[0]
+    while True:
+        child = _child_at(node, first - start)
+        if child is None:
+            break
+        child_start = start + child.token_offset
+        if old_end > child_start + child.token_count:
+            break
+        node, start = child, child_start
+        path.append((node, start))
+
+    for depth in range(len(path) - 1, -1, -1):
+        node, start = path[depth]
+        end = start + node.token_count
+        if isinstance(node, ast.BlockExpr):
+            # The braces must survive, then the block parses the same anywhere
+            if not start < first or not old_end < end:
+                continue
+        elif isinstance(node, (ast.IfExpr, ast.WhileExpr)):
+            follower = end + delta
+            if not start < first or (follower < len(buffer) and buffer.text(follower) not in _CLOSING_TOKENS):
+                continue
+        else:
+            continue
+        try:
+            new = parse(buffer, right_associative, explicit_stack, token_range=(start, end + delta))
+        except Exception:
+            continue
+        if type(new) is not type(node):
+            continue
+        new.token_offset = node.token_offset
+        for parent, _ in reversed(path[:depth]):
+            new = _replace_child(parent, node, new, delta)
+            node = parent
+        return new
+
+    return parse(buffer, right_associative, explicit_stack)
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from types import CodeType
+from typing import Any, Callable, Dict, Optional
+
+from src.compiler.assembly_generator import generate_assembly
+from src.compiler.cache import CompileCache, source_key
+from src.compiler.ir_generator import generate_ir
+from src.compiler.parser import parse
+from src.compiler.python_transpiler import compile_python
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.compiler.type_checker import typecheck
+from src.models.scope_table import ScopeTable, builtin_snapshot
+
+# Compiler stages in order; each one is computed from the result of the previous one.
+STAGES = ('tokens', 'ast', 'typed_ast', 'ir', 'asm')
+
+
+def _typecheck(tree: Any) -> Any:
+    typecheck(tree, ScopeTable(builtin_snapshot()))
+    return tree
+
+
+_STAGE_FUNCTIONS: Dict[str, Callable[[Any], Any]] = {
+    'tokens': tokenize_to_buffer,
+    'ast': parse,
+    'typed_ast': _typecheck,
+    'ir': lambda tree: generate_ir(tree, typechecked=True),
+    'asm': generate_assembly,
+}
+
+
+def run_stage(source_code: str, stage: str, cache: Optional[CompileCache] = None) -> Any:
+    """Compiles `source_code` up to and including `stage` and returns its result.
+
+    With a cache, the latest stage that has a cached result is loaded and
+    only the stages after it are run; their results are stored."""
+    if stage not in STAGES:
+        raise ValueError(f"unknown stage '{stage}'")
+    last = STAGES.index(stage)
+    key = cache.key(source_code) if cache is not None else ''
+
+    value: Any = source_code
+    first = 0
+    if cache is not None:
+        for i in range(last, -1, -1):
+            cached = cache.load(key, STAGES[i])
+            if cached is not None:
+                value, first = cached, i + 1
+                break
+
+    for name in STAGES[first:last + 1]:
+        value = _STAGE_FUNCTIONS[name](value)
+        if cache is not None:
+            cache.store(key, name, value)
+    return value
+
+
+# Code objects of `compile_python_source` by program key, least recently used first
+_python_code: 'OrderedDict[str, CodeType]' = OrderedDict()
+_PYTHON_CODE_LIMIT = 256
+
+
+def compile_python_source(source_code: str, cache: Optional[CompileCache] = None) -> CodeType:
+    """`compile_python` of the parsed `source_code`, looked up by the hash
+    of the source before anything else runs: a program compiled before in
+    this process is neither parsed nor transpiled again. With a cache, the
+    code object is also stored there as stage 'pycode' for other processes."""
+    key = cache.key(source_code) if cache is not None else source_key(source_code)
+    code = _python_code.get(key)
+    if code is not None:
+        _python_code.move_to_end(key)
+        return code
+    code = cache.load(key, 'pycode') if cache is not None else None
+    if code is None:
+        code = compile_python(run_stage(source_code, 'ast', cache))
+        if cache is not None:
+            cache.store(key, 'pycode', code)
+    _python_code[key] = code
+    if len(_python_code) > _PYTHON_CODE_LIMIT:
+        _python_code.popitem(last=False)
+    return code
+
+
+def format_result(stage: str, value: Any) -> str:
+    if stage == 'tokens':
+        return "\n".join(f"{token.type} {token.text}" for token in value)
+    if stage == 'ir':
+        return "\n".join(str(insn) for insn in value)
+    if stage == 'asm':
+        return value
+    return repr(value)
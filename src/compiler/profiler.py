@@ -0,0 +1,130 @@
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.compiler.closure_compiler import Thunk, compile_closures
+from src.compiler.interpreter import HOT_LOOP_THRESHOLD, interpret
+from src.models import ast
+from src.models.SymTab import SymbolTable
+
+DEFAULT_INTERVAL = 0.001
+
+# Samples taken inside a loop that the tree walker compiled to Python code
+_COMPILED_LOOP = "(compiled loop)"
+
+
+def _profiled(node: ast.Expression, thunk: Thunk) -> Thunk:
+    # The node is a local of the wrapper, so the sampler can read it from the frame
+    def profiled(node: ast.Expression = node) -> Any:
+        return thunk()
+    return profiled
+
+
+_PROFILED_CODE = _profiled(None, None).__code__  # type: ignore[arg-type]
+
+
+def _label(node: ast.Expression) -> str:
+    return f"{type(node).__name__} {node.location.file}:{node.location.line}"
+
+
+class Profile:
+    """Samples of the AST nodes a program was evaluating.
+
+    Each sample is the stack of nodes being evaluated, outermost first, as
+    labels like `WhileExpr prog.txt:3`."""
+
+    def __init__(self) -> None:
+        self.stacks: Counter[Tuple[str, ...]] = Counter()
+        # (file, line) -> samples with the line innermost / anywhere on the stack
+        self.self_samples: Counter[Tuple[str, int]] = Counter()
+        self.total_samples: Counter[Tuple[str, int]] = Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def add(self, nodes: List[ast.Expression], compiled: bool) -> None:
+        if not nodes:
+            return
+        labels = tuple(_label(node) for node in nodes)
+        self.stacks[labels + (_COMPILED_LOOP,) if compiled else labels] += 1
+        lines = {(node.location.file, node.location.line) for node in nodes}
+        self.total_samples.update(lines)
+        self.self_samples[nodes[-1].location.file, nodes[-1].location.line] += 1
+
+    def collapsed(self) -> str:
+        """The stacks in the collapsed format of flamegraph.pl and speedscope:
+        one line per stack, frames separated by `;`, then the sample count."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def hot_lines(self, source_code: Optional[str] = None, limit: int = 20) -> str:
+        """A table of the lines with the most samples, with their source text."""
+        source_lines = source_code.splitlines() if source_code is not None else []
+        total = self.samples or 1
+        rows = ["  self%  total%  line  source"]
+        lines = sorted(self.total_samples, key=lambda key: (-self.total_samples[key], -self.self_samples[key], key))
+        for file, line in lines[:limit]:
+            count = self.total_samples[file, line]
+            text = source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ""
+            rows.append(f"{100 * self.self_samples[file, line] / total:6.1f}% {100 * count / total:6.1f}% "
+                        f"{line:5}  {text}")
+        return "\n".join(rows)
+
+
+def _node_stack(frame: Optional[FrameType], tree_code: Any) -> Tuple[List[ast.Expression], bool]:
+    """The nodes that the frames from `frame` outwards are evaluating, outermost
+    first, and whether the innermost code is a compiled loop."""
+    nodes: List[ast.Expression] = []
+    compiled = False
+    while frame is not None:
+        code = frame.f_code
+        if code is tree_code or code is _PROFILED_CODE:
+            nodes.append(frame.f_locals['node'])
+        elif code.co_filename == '<transpiled>' and not nodes:
+            compiled = True
+        frame = frame.f_back
+    nodes.reverse()
+    return nodes, compiled
+
+
+def profile(node: ast.Expression, symtab: SymbolTable, backend: str = 'tree',
+            interval: float = DEFAULT_INTERVAL,
+            hot_loop_threshold: Optional[int] = HOT_LOOP_THRESHOLD) -> Tuple[Any, Profile]:
+    """Runs `node` like `interpret` while another thread samples, every
+    `interval` seconds, which nodes it is evaluating; returns the result and
+    the samples.
+
+    The sampler reads the nodes from the Python frames of the running
+    program, so the program itself does no bookkeeping. Only backends whose
+    frames know their nodes can be profiled: 'tree', and 'closures', whose
+    closures are wrapped in one extra call per node. Time spent in a loop
+    the tree walker compiled is attributed to the loop; `hot_loop_threshold`
+    is passed to `interpret`, and None keeps every loop walked. Samples can only
+    be taken when the running thread releases the GIL, so they are at
+    least `sys.getswitchinterval()` apart."""
+    runners: Dict[str, Callable[[], Any]] = {
+        'tree': lambda: interpret(node, symtab, hot_loop_threshold=hot_loop_threshold),
+        'closures': lambda: compile_closures(node, symtab, _profiled)(),
+    }
+    if backend not in runners:
+        raise ValueError(f"backend '{backend}' cannot be profiled")
+    result = Profile()
+    target = threading.get_ident()
+    done = threading.Event()
+    tree_code = interpret.__code__
+
+    def sample() -> None:
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            result.add(*_node_stack(frame, tree_code))
+
+    sampler = threading.Thread(target=sample, name='profiler', daemon=True)
+    sampler.start()
+    try:
+        value = runners[backend]()
+    finally:
+        done.set()
+        sampler.join()
+    return value, result
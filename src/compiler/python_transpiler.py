@@ -0,0 +1,244 @@
+import re
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.compiler.resolver import resolve
+from src.models import ast
+from src.models.SymTab import SymbolTable
+
+# Operators translated to the Python operator with the semantics of the builtin
+_BINARY_OPERATORS = {
+    '+': '+', '-': '-', '*': '*', '/': '/', '%': '%',
+    '==': '==', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>=',
+}
+_UNARY_OPERATORS = {'not': 'not ', '-': '-'}
+
+_INDENT = '    '
+
+
+def transpile(root: ast.Expression, outer_frames: int = 0) -> str:
+    """Translates `root` into the source of a Python module that defines
+    `program(symtab)`, which evaluates the tree like `interpret`.
+
+    Every variable declared in a block becomes a local variable of
+    `program`, named after its address from `resolve`; `while`, `if`,
+    `and` and `or` become their Python counterparts, and the arithmetic and
+    comparison operators are the Python operators, like the builtins.
+    Expressions that need statements (blocks with statements, loops and
+    branches containing them) are evaluated into temporaries first, in the
+    order `interpret` evaluates them. Names that are not declared in the
+    tree are looked up in and assigned to `symtab`; top-level `var`s are
+    defined there without a type.
+
+    With `outer_frames`, `root` is a subtree of a tree that `interpret` has
+    resolved and is running inside that many blocks. The variables of those
+    blocks stay in the interpreter's frames, which the generated
+    `program(symtab, frames)` reads and writes in place."""
+    if not outer_frames:
+        resolve(root)
+    temporaries = 0
+    # The interpreter frames the generated code uses
+    used_frames = set()
+    # The statements of the Python block being generated
+    body: List[str] = []
+
+    def temporary() -> str:
+        nonlocal temporaries
+        temporaries += 1
+        return f"_t{temporaries}"
+
+    def local(name: str, depth: int, slot: int) -> str:
+        if depth < outer_frames:
+            used_frames.add(depth)
+            return f"_f{depth}[{slot}]"
+        return f"{name}_{depth}_{slot}"
+
+    def assign(variable: str, right: str) -> str:
+        if variable.isidentifier():
+            return f"({variable} := {right})"
+        # 帧中的变量不能用 := 赋值
+        t = temporary()
+        body.append(f"{t} = {right}")
+        body.append(f"{variable} = {t}")
+        return t
+
+    def is_constant(expression: str) -> bool:
+        # Literals and temporaries cannot change while other code runs
+        return re.fullmatch(r'_t\d+', expression) is not None or expression in ('True', 'False', 'None') \
+            or expression.isdigit()
+
+    def nested(node: Optional[ast.Expression], for_effect: bool = False) -> Tuple[List[str], str]:
+        """The statements needed before `node` can be evaluated, and its value."""
+        nonlocal body
+        outer, body = body, []
+        try:
+            if for_effect:
+                statement(node)
+                return body, 'None'
+            return body, value(node)
+        finally:
+            body = outer
+
+    def emit_block(header: str, statements: List[str]) -> None:
+        body.append(header)
+        body.extend(_INDENT + statement for statement in statements or ['pass'])
+
+    def operands(nodes: Sequence[ast.Expression]) -> List[str]:
+        values: List[str] = []
+        for node in nodes:
+            mark = len(body)
+            result = value(node)
+            if len(body) > mark:
+                # 后面的操作数需要语句: 先把前面的操作数存入临时变量
+                for i, earlier in enumerate(values):
+                    if not is_constant(earlier):
+                        t = temporary()
+                        body.insert(mark, f"{t} = {earlier}")
+                        mark += 1
+                        values[i] = t
+            values.append(result)
+        return values
+
+    def conditional(condition: str, then_node: Optional[ast.Expression],
+                    else_node: Optional[ast.Expression]) -> str:
+        then_body, then_value = nested(then_node)
+        else_body, else_value = nested(else_node)
+        if not then_body and not else_body:
+            return f"({then_value} if {condition} else {else_value})"
+        t = temporary()
+        emit_block(f"if {condition}:", then_body + [f"{t} = {then_value}"])
+        emit_block("else:", else_body + [f"{t} = {else_value}"])
+        return t
+
+    def value(node: Optional[ast.Expression]) -> str:
+        match node:
+            case None:
+                return 'None'
+
+            case ast.Literal():
+                return repr(node.value)
+
+            case ast.Identifier():
+                if node.depth >= 0:
+                    return local(node.name, node.depth, node.slot)
+                return f"_lookup({node.name!r})"
+
+            case ast.BinaryOp(op='='):
+                if not isinstance(node.left, ast.Identifier):
+                    raise TypeError("Left side of assignment must be an identifier.")
+                right = value(node.right)
+                if node.left.depth >= 0:
+                    return assign(local(node.left.name, node.left.depth, node.left.slot), right)
+                t = temporary()
+                body.append(f"{t} = {right}")
+                body.append(f"_update({node.left.name!r}, {t})")
+                return t
+
+            case ast.BinaryOp(op='and'):
+                # 左侧为假时不求值右侧
+                return conditional(value(node.left), node.right, ast.Literal(location=node.location, value=False))
+
+            case ast.BinaryOp(op='or'):
+                return conditional(value(node.left), ast.Literal(location=node.location, value=True), node.right)
+
+            case ast.BinaryOp():
+                if node.op not in _BINARY_OPERATORS:
+                    raise TypeError(f"Cannot transpile operator '{node.op}'")
+                left, right = operands([node.left, node.right])
+                return f"({left} {_BINARY_OPERATORS[node.op]} {right})"
+
+            case ast.UnaryOp():
+                if node.operator not in _UNARY_OPERATORS:
+                    raise TypeError(f"Cannot transpile operator '{node.operator}'")
+                return f"({_UNARY_OPERATORS[node.operator]}{value(node.operand)})"
+
+            case ast.IfExpr():
+                return conditional(value(node.condition), node.then_branch, node.else_branch)
+
+            case ast.FunctionCall():
+                arguments = operands(node.arguments)
+                return f"_lookup({node.name!r})({', '.join(arguments)})"
+
+            case ast.VarDecl():
+                initial = value(node.value)
+                if node.slot >= 0:
+                    return assign(local(node.name, outer_frames + len(blocks) - 1, node.slot), initial)
+                t = temporary()
+                body.append(f"{t} = {initial}")
+                body.append(f"_define({node.name!r}, {t}, None)")
+                return t
+
+            case ast.BlockExpr():
+                blocks.append(node)
+                for expr in node.expressions:
+                    statement(expr)
+                result = value(node.result_expression)
+                blocks.pop()
+                return result
+
+            case ast.WhileExpr():
+                condition_body, condition = nested(node.condition)
+                loop_body, _ = nested(node.body, for_effect=True)
+                if condition_body:
+                    emit_block("while True:", condition_body + [f"if not {condition}:", _INDENT + "break"]
+                               + loop_body)
+                else:
+                    emit_block(f"while {condition}:", loop_body)
+                return 'None'
+
+            case _:
+                raise TypeError(f"Cannot transpile {type(node).__name__}")
+
+    def statement(node: Optional[ast.Expression]) -> None:
+        """Evaluates `node` for its effects only."""
+        if isinstance(node, ast.VarDecl) and node.slot >= 0:
+            initial = value(node.value)
+            body.append(f"{local(node.name, outer_frames + len(blocks) - 1, node.slot)} = {initial}")
+        elif isinstance(node, ast.BinaryOp) and node.op == '=' and isinstance(node.left, ast.Identifier) \
+                and node.left.depth >= 0:
+            right = value(node.right)
+            body.append(f"{local(node.left.name, node.left.depth, node.left.slot)} = {right}")
+        else:
+            result = value(node)
+            if not is_constant(result) and not result.isidentifier():
+                body.append(result)
+
+    # The blocks around the node being translated, outermost first
+    blocks: List[ast.BlockExpr] = []
+    result = value(root)
+    lines = ["def program(symtab, frames):" if outer_frames else "def program(symtab):",
+             _INDENT + "_lookup = symtab.lookup_variable",
+             _INDENT + "_update = symtab.update_variable",
+             _INDENT + "_define = symtab.define_variable"]
+    lines.extend(_INDENT + f"_f{depth} = frames[{depth}]" for depth in sorted(used_frames))
+    lines.extend(_INDENT + statement for statement in body)
+    lines.append(_INDENT + f"return {result}")
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=256)
+def _compile_source(source: str) -> CodeType:
+    return compile(source, '<transpiled>', 'exec')
+
+
+def compile_python(root: ast.Expression) -> CodeType:
+    """The code object of `transpile(root)`. Identical Python sources share
+    one code object, but the tree is resolved and transpiled on every call;
+    `compile_python_source` looks a program up by its hash first."""
+    return _compile_source(transpile(root))
+
+
+def run_python(code: CodeType, symtab: SymbolTable) -> Any:
+    """Runs a module compiled by `compile_python` on the CPython eval loop."""
+    namespace: Dict[str, Any] = {}
+    exec(code, namespace)
+    return namespace['program'](symtab)
+
+
+def compile_loop(node: ast.WhileExpr, outer_frames: int) -> Callable[[SymbolTable, List[List[Any]]], None]:
+    """Compiles a loop that `interpret` is running inside `outer_frames`
+    blocks into a function that continues it on the interpreter's frames."""
+    namespace: Dict[str, Any] = {}
+    exec(_compile_source(transpile(node, outer_frames)), namespace)
+    return namespace['program']
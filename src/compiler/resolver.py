@@ -0,0 +1,71 @@
+import copy
+from dataclasses import fields
+from typing import Dict, List, Set
+
+from src.models import ast
+
+
+def resolve(root: ast.Expression) -> None:
+    """Gives every variable declared in a block a slot in that block's frame
+    and stores in each `Identifier` the (depth, slot) of the declaration it
+    refers to, so that `interpret` can read variables by index instead of
+    searching the scope chain.
+
+    The depth is the block nesting depth counted from `root`. A name that is
+    declared again in the same block keeps its slot. Identifiers that refer to
+    no declaration in the tree (builtins, variables defined in the symtab by
+    the caller, top-level `var`s outside any block) keep depth -1 and are
+    still looked up by name.
+
+    The addresses are written into the nodes. A node that the tree shares
+    between several places (see `HashConser`) may need different addresses
+    in each of them, so every place but the first gets its own copy of it."""
+    scopes: List[Dict[str, int]] = []
+    # ids of the nodes reached so far
+    seen: Set[int] = set()
+
+    def visit(node: ast.Expression) -> ast.Expression:
+        if id(node) in seen:
+            # 共享的节点: 这个位置用自己的副本, 编译过的循环属于原来的位置
+            node = copy.copy(node)
+            if isinstance(node, ast.WhileExpr):
+                node.iterations, node.compiled = 0, None
+        seen.add(id(node))
+        match node:
+            case ast.BlockExpr():
+                scopes.append({})
+                node.expressions = [visit(expr) for expr in node.expressions]
+                if node.result_expression is not None:
+                    node.result_expression = visit(node.result_expression)
+                node.frame_size = len(scopes.pop())
+
+            case ast.VarDecl():
+                # 初始值在变量定义之前求值: `var x = x` 指向外层的 x
+                node.value = visit(node.value)
+                if scopes:
+                    scope = scopes[-1]
+                    node.slot = scope.setdefault(node.name, len(scope))
+                else:
+                    node.slot = -1
+
+            case ast.Identifier():
+                node.depth = node.slot = -1
+                for depth in range(len(scopes) - 1, -1, -1):
+                    slot = scopes[depth].get(node.name)
+                    if slot is not None:
+                        node.depth, node.slot = depth, slot
+                        break
+
+            case _:
+                for f in fields(node):
+                    value = getattr(node, f.name)
+                    if isinstance(value, ast.Expression):
+                        child = visit(value)
+                        if child is not value:
+                            setattr(node, f.name, child)
+                    elif isinstance(value, list):
+                        setattr(node, f.name, [visit(item) if isinstance(item, ast.Expression) else item
+                                               for item in value])
+        return node
+
+    visit(root)
@@ -1,48 +1,143 @@
+import codecs
 import re
-from typing import List
-from src.models.types import Token, SourceLocation
+from array import array
+from bisect import bisect_left
+from typing import IO, Callable, Iterator, List, Tuple, Union
+from src.models.token_buffer import TokenBuffer, TOKEN_TYPE_CODES
+from src.models.types import Token, LineIndex
 
-def tokenize(source_code: str) -> List[Token]:
-    source_code = source_code.replace('//','#')
-    token_pattern = r'(\s+)|(\d+\.\d*|\.\d+|\d+)|(\b(True|False|true|false)\b)|([A-Za-z_][A-Za-z0-9_]*)|(\*\*|==|!=|<=|>=|&&|\|\||[\+\-*/%=<>!]{1,2})|([\(\)\{\},;:])|(//.*|#.*)'
-    # token_pattern = r'(\s+)|(\d+\.\d*|\.\d+|\d+)|(\b(True|False|true|false)\b)|(\b(and|or|not)\b)|([A-Za-z_][A-Za-z0-9_]*)|(\*\*|==|!=|<=|>=|&&|\|\||[\+\-*/=<>!])|([\(\)\{\},;])|(//.*|#.*)'
+# The name of the matching group is the token type, so every match is
+# classified in one step via `match.lastgroup`.
+# `//` comments are matched before the operator group, and an operator never
+# swallows the first `/` of a `//`, so the source does not need to be rewritten
+# to `#` comments before scanning.
+token_pattern = re.compile(
+    r'(?P<whitespace>\s+)'
+    r'|(?P<float>\d+\.\d*|\.\d+)'
+    r'|(?P<integer>\d+)'
+    r'|(?P<bool>\b(?:True|False|true|false)\b)'
+    r'|(?P<identifier>[A-Za-z_][A-Za-z0-9_]*)'
+    r'|(?P<comment>//.*|#.*)'
+    r'|(?P<operator>\*\*|==|!=|<=|>=|&&|\|\||(?:(?!//)[\+\-*/%=<>!]){1,2})'
+    r'|(?P<punctuation>[\(\)\{\},;:])'
+)
+
+SKIPPED_TOKEN_TYPES = frozenset({'whitespace', 'comment'})
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+Source = Union[str, IO[str], IO[bytes]]
+
+
+def _scan(source_code: str, lines: LineIndex) -> Iterator[Token]:
+    location = lines.location
+    for match in token_pattern.finditer(source_code):
+        token_type = match.lastgroup
+        assert token_type is not None  # every alternative of the pattern is a named group
+        if token_type in SKIPPED_TOKEN_TYPES:
+            continue
+        yield Token(text=match.group(), type=token_type, loc=location(match.start()))
+
+
+def _read_chunks(source: Source, chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+
+    # Binary files and mmap objects hand out bytes; a multi-byte character may be
+    # split between two reads, so decode incrementally.
+    decoder = None
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, (bytes, bytearray)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
 
-    tokens = []
+
+def tokenize_stream(source: Source, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    file: str = "<unknown>") -> Iterator[Token]:
+    """Lazily tokenizes a string, a text/binary file object or an mmap.
+
+    The source is read `chunk_size` characters (or bytes) at a time and only
+    complete lines are scanned, because no token spans a line break. Memory use
+    is therefore bounded by the chunk size plus the longest line, not by the
+    size of the program."""
     line = 1
-    last_match_end = 0
+    pending = ''
+    for chunk in _read_chunks(source, chunk_size):
+        pending += chunk
+        cut = pending.rfind('\n') + 1
+        if not cut:
+            continue
+        segment, pending = pending[:cut], pending[cut:]
+        # Each segment gets its own line table so the index does not grow with the file
+        lines = LineIndex(segment, file, first_line=line)
+        yield from _scan(segment, lines)
+        line += len(lines.line_starts) - 1
+    if pending:
+        yield from _scan(pending, LineIndex(pending, file, first_line=line))
 
-    for match in re.finditer(token_pattern, source_code):
-        text = match.group(0)
 
-        start, end = match.start(), match.end()
-        # Update line and column based on the content since the last match
-        pre_text = source_code[last_match_end:start]
-        line_increment = pre_text.count('\n')
-        if line_increment:
-            line += line_increment
-            column = len(pre_text) - pre_text.rfind('\n') - 1
-            last_match_end = start - column + 1
-        else:
-            column = len(pre_text) + 1
+def tokenize(source_code: str) -> List[Token]:
+    return list(_scan(source_code, LineIndex(source_code)))
 
 
-        if text.strip() == '' or text.startswith(("//", "#")):  # Skip whitespace or comments
+def _scan_into(kinds: array, starts: array, ends: array, text_ids: array,
+               intern: Callable[[str], int], source_code: str, pos: int, endpos: int) -> None:
+    for match in token_pattern.finditer(source_code, pos, endpos):
+        token_type = match.lastgroup
+        assert token_type is not None  # every alternative of the pattern is a named group
+        if token_type in SKIPPED_TOKEN_TYPES:
             continue
+        kinds.append(TOKEN_TYPE_CODES[token_type])
+        starts.append(match.start())
+        ends.append(match.end())
+        text_ids.append(intern(match.group()))
+
+
+def tokenize_to_buffer(source_code: str, file: str = "<unknown>") -> TokenBuffer:
+    """Tokenizes into a compact `TokenBuffer` without creating `Token` objects."""
+    buffer = TokenBuffer(source_code, file)
+    _scan_into(buffer.kinds, buffer.starts, buffer.ends, buffer.text_ids, buffer.intern,
+               source_code, 0, len(source_code))
+    return buffer
+
+
+def retokenize(buffer: TokenBuffer, offset: int, removed: int, inserted: str) -> Tuple[int, int, int]:
+    """Applies a text edit to `buffer` in place: `removed` characters at `offset`
+    are replaced by `inserted`.
+
+    No token spans a line break, so only the lines touched by the edit are
+    re-scanned; the tokens after them are kept and their offsets shifted.
+    Returns `(first, old_end, new_end)`: tokens `first:old_end` of the old
+    stream were replaced by tokens `first:new_end` of the new one."""
+    old_source = buffer.source_code
+    if offset < 0 or removed < 0 or offset + removed > len(old_source):
+        raise ValueError(f"edit at {offset}+{removed} is outside of the source")
+    new_source = old_source[:offset] + inserted + old_source[offset + removed:]
+    delta = len(inserted) - removed
 
-        # Determine token type
-        token_type = "unknown"
-        if match.group(2):
-            token_type = "float" if '.' in text else "integer"
-        elif match.group(4):
-            token_type = "bool"  # 处理布尔类型
-        elif match.group(5):
-            token_type = "identifier"
-        elif match.group(6):
-            token_type = "operator"
-        elif match.group(7):
-            token_type = "punctuation"
+    region_start = old_source.rfind('\n', 0, offset) + 1
+    old_region_end = old_source.find('\n', offset + removed)
+    old_region_end = len(old_source) if old_region_end == -1 else old_region_end + 1
+    new_region_end = old_region_end + delta
 
+    first = bisect_left(buffer.starts, region_start)
+    old_end = bisect_left(buffer.starts, old_region_end)
 
-        tokens.append(Token(text=text, type=token_type, loc=SourceLocation(file="<unknown>", line=line, column=column)))
+    kinds, starts, ends, text_ids = array('B'), array('q'), array('q'), array('l')
+    _scan_into(kinds, starts, ends, text_ids, buffer.intern, new_source, region_start, new_region_end)
 
-    return tokens
+    buffer.splice(first, old_end, kinds, starts, ends, text_ids, delta)
+    buffer.lines.edit(region_start, old_region_end, new_source[region_start:new_region_end], delta)
+    buffer.source_code = new_source
+    return first, old_end, first + len(kinds)
@@ -1,18 +1,25 @@
 # from src.compiler.interpreter import interpret
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
 from src.models import ast, types
-from src.models.SymTab import SymTab
+from src.models.scope_table import ScopeTable, Snapshot, builtin_snapshot
+from src.models.SymTab import SymbolTable
 from src.models.types import FunctionType, Type
 
-def typecheck_var_decl(node: ast.VarDecl, symtab: SymTab) -> types.Type:
+# Types are interned, so the checker binds them once and compares with `is`
+INT, BOOL, UNIT = types.Int(), types.Bool(), types.Unit()
+
+def typecheck_var_decl(node: ast.VarDecl, symtab: SymbolTable) -> types.Type:
     value_type = typecheck(node.value, symtab)
     annotated_type = 0
     if node.type_annotation:
         # Map AST type expression to type checker's type
         annotated_type = map_ast_type_expr_to_type(node.type_annotation)
-        if type(value_type) != type(annotated_type):
+        if value_type is not annotated_type:
             raise TypeError(f"Type of initializer does not match variable type annotation in declaration of '{node.name}'")
     symtab.define_variable(node.name,node.value, annotated_type)
-    return types.Unit()
+    return UNIT
 
 def map_ast_type_expr_to_type(type_expr: ast.TypeExpr) -> types.Type:
     if isinstance(type_expr, ast.IntTypeExpr):
@@ -22,16 +29,23 @@ def map_ast_type_expr_to_type(type_expr: ast.TypeExpr) -> types.Type:
     else:
         raise Exception("Unknown type expression")
 
-# def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
-#     node.type = _determine_type(node, symtab)
-#     return node.type
+def typecheck(node: ast.Expression, symtab: SymbolTable) -> Type:
+    """Checks `node` and stores the type of it and of every sub-expression in
+    their `type` field, so later stages can read the types without checking
+    again. Each node is visited once."""
+    if isinstance(node, _UNITS) and isinstance(symtab, _DependencyTracker):
+        node_type = symtab.check_unit(node)
+    else:
+        node_type = _determine_type(node, symtab)
+    node.type = node_type
+    return node_type
 
-def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
+def _determine_type(node: ast.Expression, symtab: SymbolTable) -> Type:
     match node:
         case ast.Literal(value=bool()):
-            return types.Bool()
+            return BOOL
         case ast.Literal(value=int()):
-            return types.Int()
+            return INT
         case ast.Identifier():
             # print('idn',node)
             var_type = symtab.lookup_variable_type(node.name)
@@ -43,7 +57,7 @@ def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
             operand_type = typecheck(node.operand, symtab)
             op_type = symtab.lookup_variable_type(f"unary_{node.operator}")
 
-            if isinstance(op_type, FunctionType) and str(operand_type) == str(op_type.param_types[0]):
+            if isinstance(op_type, FunctionType) and operand_type is op_type.param_types[0]:
                 return op_type.return_type
             else:
                 raise TypeError(f"Unsupported unary operation: {node.operator} for {operand_type}")
@@ -57,7 +71,7 @@ def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
                     # print('val',value)
                     # 检查类型是否一致
                     # print('ini',symtab.lookup_variable_type(node.left.name),value)
-                    if str(symtab.lookup_variable_type(node.left.name)) != str(value):
+                    if symtab.lookup_variable_type(node.left.name) is not value:
                     # if not isinstance(symtab.lookup_variable_type(node.left.name),value):
                         raise TypeError("Left side of assignment must be isinstance with right side")
                     # 在符号表中更新或定义变量
@@ -72,8 +86,8 @@ def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
 
             if isinstance(op_type, FunctionType):
                 # Validate operand types
-                print('type(left_type), type(right_type)',type(left_type), type(right_type))
-                if [type(left_type), type(right_type)] != [type(t) for t in op_type.param_types]:
+                param_types = op_type.param_types
+                if len(param_types) != 2 or left_type is not param_types[0] or right_type is not param_types[1]:
                     raise TypeError(f"Operand type mismatch for operator '{node.op}'")
                 return op_type.return_type
 
@@ -84,17 +98,17 @@ def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
             cond_type = typecheck(node.condition, symtab)
 
             # print('in if', node.condition,cond_type)
-            if not isinstance(cond_type, types.Bool):
+            if cond_type is not BOOL:
                 raise TypeError("Condition in 'if' must be a Bool")
             then_type = typecheck(node.then_branch, symtab)
             if node.else_branch is None:
                 # if not isinstance(then_type, types.Unit):
                 #     raise TypeError("Then branch of 'if' without 'else' must not produce a value")
-                return types.Unit()
+                return UNIT
             else:
                 # 处理有else分支的情况
                 else_type = typecheck(node.else_branch, symtab)
-                if type(then_type) != type(else_type):
+                if then_type is not else_type:
                     raise TypeError("'then' and 'else' branches must have the same type")
                 return then_type
 
@@ -109,7 +123,7 @@ def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
 
             for arg, param_type in zip(node.arguments, func_type.param_types):
                 arg_type = typecheck(arg, symtab)
-                if type(arg_type) != type(param_type):
+                if arg_type is not param_type:
                     raise TypeError("Argument type mismatch")
 
             return func_type.return_type
@@ -119,7 +133,7 @@ def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
             # for expr in node.expressions[:-1]:
             for expr in node.expressions:
                 typecheck(expr, symtab)  # Discard types of non-final expressions
-            result_type = types.Unit() if not node.result_expression else typecheck(node.result_expression, symtab)
+            result_type = UNIT if not node.result_expression else typecheck(node.result_expression, symtab)
             symtab.leave_scope()
             return result_type
 
@@ -128,13 +142,171 @@ def typecheck(node: ast.Expression, symtab: SymTab) -> Type:
 
         case ast.WhileExpr():
             cond_type = typecheck(node.condition, symtab)
-            print('con',cond_type)
-            if not isinstance(cond_type, types.Bool):
+            if cond_type is not BOOL:
                 raise TypeError("Condition in 'while' must be a Bool")
             body_type = typecheck(node.body, symtab)
-            print('body',body_type)
             # if not isinstance(body_type, types.Unit):
             #     raise TypeError("Body of 'while' must not produce a value")
-            return types.Unit()
+            return UNIT
+
+
+# The nodes that `IncrementalChecker` remembers: the units that an incremental
+# reparse replaces. None of them defines names outside of itself.
+_UNITS = (ast.BlockExpr, ast.IfExpr, ast.WhileExpr)
+
+
+@dataclass(slots=True)
+class _UnitResult:
+    node: ast.Expression
+    # The outer names the unit reads, with the types they had
+    reads: Dict[str, Type]
+    type: Type
+    # Results of the units directly nested in this one
+    inner: List['_UnitResult']
+
+
+class _DependencyTracker:
+    """Wraps a `ScopeTable` for one run of `IncrementalChecker.check`:
+    records which outer names each unit reads and reuses the results of
+    units from the previous run whose reads still have the same types."""
+
+    def __init__(self, table: SymbolTable, previous: Dict[int, _UnitResult]):
+        self.table = table
+        self.previous = previous
+        self.results: Dict[int, _UnitResult] = {}
+        self.checked = 0
+        self.reused = 0
+        # name -> the scope depths that define it, innermost last; builtins are at depth -1
+        self._definitions: Dict[str, List[int]] = {}
+        self._defined_in_scope: List[List[str]] = [[]]
+        # Per unit being checked: the scope depth around it, the outer names
+        # it read as name -> (depth of their definition, type), and the
+        # results of the units nested in it
+        self._unit_depths: List[int] = [-1]
+        self._reads: List[Dict[str, Tuple[int, Type]]] = [{}]
+        self._inner: List[List[_UnitResult]] = [[]]
+
+    def _record(self, name: str, name_type: Type) -> None:
+        definitions = self._definitions.get(name)
+        defined_at = definitions[-1] if definitions else -1
+        if defined_at <= self._unit_depths[-1]:
+            self._reads[-1].setdefault(name, (defined_at, name_type))
+
+    def lookup_variable(self, name: str) -> Any:
+        value = self.table.lookup_variable(name)
+        self._record(name, self.table.lookup_variable_type(name))
+        return value
+
+    def lookup_variable_type(self, name: str) -> Any:
+        name_type = self.table.lookup_variable_type(name)
+        self._record(name, name_type)
+        return name_type
+
+    def update_variable(self, name: str, value: Any) -> None:
+        self.table.update_variable(name, value)
+
+    def define_variable(self, name: str, value: Any, var_type: Any) -> None:
+        self.table.define_variable(name, value, var_type)
+        depth = len(self._defined_in_scope) - 1
+        definitions = self._definitions.setdefault(name, [])
+        if not definitions or definitions[-1] != depth:
+            definitions.append(depth)
+            self._defined_in_scope[-1].append(name)
+
+    def enter_scope(self) -> None:
+        self.table.enter_scope()
+        self._defined_in_scope.append([])
+
+    def leave_scope(self) -> None:
+        self.table.leave_scope()
+        for name in self._defined_in_scope.pop():
+            definitions = self._definitions[name]
+            definitions.pop()
+            if not definitions:
+                del self._definitions[name]
+
+    def _reuse(self, node: ast.Expression) -> Optional[_UnitResult]:
+        """The result of the last check of `node` if the outer names it reads
+        still have the same types; its reads are then recorded for the
+        enclosing unit."""
+        result = self.results.get(id(node)) or self.previous.get(id(node))
+        if result is None or result.node is not node:
+            return None
+        lookup = self.table.lookup_variable_type
+        for name, name_type in result.reads.items():
+            try:
+                if lookup(name) is not name_type:
+                    return None
+            except KeyError:
+                return None
+        outer_depth = self._unit_depths[-1]
+        outer_reads = self._reads[-1]
+        for name, name_type in result.reads.items():
+            # 外层已经读过的名字指向同一个定义
+            if name not in outer_reads:
+                definitions = self._definitions.get(name)
+                defined_at = definitions[-1] if definitions else -1
+                if defined_at <= outer_depth:
+                    outer_reads[name] = (defined_at, name_type)
+        return result
+
+    def check_unit(self, node: ast.Expression) -> Type:
+        result = self._reuse(node)
+        if result is not None:
+            self.reused += 1
+            # 嵌套的单元没有被访问, 但下一次仍然可以复用
+            stack = [result]
+            while stack:
+                reused = stack.pop()
+                self.results[id(reused.node)] = reused
+                stack.extend(reused.inner)
+        else:
+            self.checked += 1
+            self._unit_depths.append(len(self._defined_in_scope) - 1)
+            self._reads.append({})
+            self._inner.append([])
+            node_type = _determine_type(node, self)
+            self._unit_depths.pop()
+            reads = self._reads.pop()
+            result = _UnitResult(node, {name: t for name, (_, t) in reads.items()}, node_type, self._inner.pop())
+            self.results[id(node)] = result
+            # What the unit reads from outside of the enclosing unit is read by that one as well
+            outer_depth = self._unit_depths[-1]
+            outer_reads = self._reads[-1]
+            for name, (defined_at, name_type) in reads.items():
+                if defined_at <= outer_depth:
+                    outer_reads.setdefault(name, (defined_at, name_type))
+        self._inner[-1].append(result)
+        return result.type
+
+
+class IncrementalChecker:
+    """Type checks successive versions of a tree, e.g. the results of
+    incremental reparses, and re-checks only what an edit may have changed.
+
+    For every block, `if` and `while` the checker remembers its type and the
+    types of the names from outside of it that it reads. Such a node that is
+    the same object as in the previous version (reparsing reuses unchanged
+    subtrees) and whose outer names still have the same types is not visited
+    again; the `type` fields in it are still those of the last check. So
+    after an edit only the edited node, the ones around it and the ones that
+    read a name whose type changed are checked.
+
+    Checking starts from `base` (the builtins by default) in a fresh
+    `ScopeTable` each time. After a failed check, the results of the last
+    successful one are kept. `checked` and `reused` count the nodes of the
+    last check that were visited and skipped."""
 
+    def __init__(self, base: Optional[Snapshot] = None):
+        self.base = base if base is not None else builtin_snapshot()
+        self._results: Dict[int, _UnitResult] = {}
+        self.checked = 0
+        self.reused = 0
 
+    def check(self, tree: ast.Expression) -> Type:
+        tracker = _DependencyTracker(ScopeTable(self.base), self._results)
+        tree_type = typecheck(tree, tracker)
+        self._results = tracker.results
+        self.checked = tracker.checked
+        self.reused = tracker.reused
+        return tree_type
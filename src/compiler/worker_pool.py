@@ -0,0 +1,130 @@
+import codecs
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional
+
+from src.compiler.cache import CompileCache, DEFAULT_MAX_BYTES
+from src.compiler.interpreter import interpret
+from src.compiler.pipeline import STAGES, compile_python_source, format_result, run_stage
+from src.compiler.python_transpiler import run_python
+from src.models.scope_table import ScopeTable, builtin_snapshot
+
+# The job that parses and interprets a program instead of compiling it up to a stage
+RUN = 'run'
+
+
+@dataclass
+class FileResult:
+    path: str
+    # The program's value for RUN, else the formatted result of the stage
+    value: Any = None
+    # What the program or the compiler printed
+    output: str = ""
+    error: Optional[str] = None
+    # Time spent on the file in the worker, without queueing
+    seconds: float = 0.0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def _is_text(path: Path) -> bool:
+    # Like git: a file is binary if its first block has a NUL byte, or here if it is not UTF-8
+    with open(path, 'rb') as file:
+        head = file.read(8192)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head)
+    except UnicodeDecodeError:
+        return False
+    return b'\0' not in head
+
+
+def source_files(target: str | os.PathLike, pattern: str = '*',
+                 exclude: Optional[str | os.PathLike] = None) -> List[str]:
+    """The files to process: the files matching `pattern` below a directory,
+    or the paths listed in a manifest file, one per line, relative to the
+    manifest. Blank lines and lines starting with `#` are skipped.
+
+    Below a directory, hidden files and directories, everything below
+    `exclude` (e.g. the cache directory) and binary files are skipped."""
+    target = Path(target)
+    if target.is_dir():
+        excluded = Path(exclude).resolve() if exclude is not None else None
+        paths = []
+        for path in target.rglob(pattern):
+            if any(part.startswith('.') for part in path.relative_to(target).parts) or not path.is_file():
+                continue
+            if excluded is not None and path.resolve().is_relative_to(excluded):
+                continue
+            if _is_text(path):
+                paths.append(str(path))
+        return sorted(paths)
+    paths = []
+    with open(target, encoding='utf-8') as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(str(target.parent / line))
+    return paths
+
+
+# Set in each worker by `_warm_up`
+_cache: Optional[CompileCache] = None
+
+
+def _warm_up(cache_dir: Optional[str], cache_size: int) -> None:
+    global _cache
+    # 每个进程只构建一次内置符号
+    builtin_snapshot()
+    _cache = CompileCache(cache_dir, cache_size) if cache_dir else None
+
+
+def _process(path: str, stage: str, backend: str) -> FileResult:
+    start = time.perf_counter()
+    output = io.StringIO()
+    value, error = None, None
+    try:
+        with open(path, encoding='utf-8') as file:
+            source_code = file.read()
+        with contextlib.redirect_stdout(output):
+            if stage == RUN:
+                if backend == 'python':
+                    # 按源码哈希缓存编译好的代码对象, 不必每次都解析和转译
+                    value = run_python(compile_python_source(source_code, _cache), ScopeTable(builtin_snapshot()))
+                else:
+                    value = interpret(run_stage(source_code, 'ast', _cache), ScopeTable(builtin_snapshot()),
+                                      backend=backend)
+                if not isinstance(value, (int, float, str, type(None))):
+                    value = repr(value)  # e.g. a builtin function, which cannot be sent back
+            else:
+                value = format_result(stage, run_stage(source_code, stage, _cache))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return FileResult(path, value, output.getvalue(), error, time.perf_counter() - start)
+
+
+def run_batch(paths: Iterable[str], stage: str = RUN, backend: str = 'tree', workers: Optional[int] = None,
+              cache_dir: Optional[str] = None, cache_size: int = DEFAULT_MAX_BYTES) -> Iterator[FileResult]:
+    """Compiles each file up to `stage`, or runs it with `backend` for RUN,
+    in a pool of `workers` processes, and yields the results as the files
+    finish.
+
+    Every worker imports the compiler and builds the builtin symbols once,
+    when it starts, and shares the on-disk cache in `cache_dir`. An error in
+    one file is reported in its result and does not stop the others. When
+    the caller stops iterating, the files not yet started are dropped."""
+    if stage != RUN and stage not in STAGES:
+        raise ValueError(f"unknown stage '{stage}'")
+    pool = ProcessPoolExecutor(workers, initializer=_warm_up, initargs=(cache_dir, cache_size))
+    try:
+        futures = [pool.submit(_process, path, stage, backend) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
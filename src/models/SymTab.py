@@ -1,7 +1,24 @@
 from src.models import types
 from src.models.types import FunctionType, Int, Bool, Unit
 
-from typing import Generic, TypeVar, Dict, Any
+from typing import Generic, TypeVar, Dict, Any, Protocol
+
+class SymbolTable(Protocol):
+    """The interface the compiler stages use to look up and define names;
+    `SymTab` and `ScopeTable` both provide it."""
+
+    def enter_scope(self) -> None: ...
+
+    def leave_scope(self) -> None: ...
+
+    def lookup_variable(self, name: str) -> Any: ...
+
+    def lookup_variable_type(self, name: str) -> Any: ...
+
+    def update_variable(self, name: str, value: Any) -> None: ...
+
+    def define_variable(self, name: str, value: Any, var_type: Any) -> None: ...
+
 
 # Create a type variable for the SymTab class
 T = TypeVar('T')
@@ -13,13 +30,13 @@ class SymTab(Generic[T]):
         self.scopes = [{}]
 
 
-    def enter_scope(self):
+    def enter_scope(self) -> None:
         self.scopes.append({})
 
-    def leave_scope(self):
+    def leave_scope(self) -> None:
         self.scopes.pop()
 
-    def lookup_variable(self, name):
+    def lookup_variable(self, name: str) -> Any:
         for scope in reversed(self.scopes):
             if name in scope:
                 value = scope[name]
@@ -29,7 +46,7 @@ class SymTab(Generic[T]):
                     return scope[name]
         raise KeyError(f"Variable '{name}' not found.")
 
-    def update_variable(self, name, value):
+    def update_variable(self, name: str, value: Any) -> None:
         # 在现有作用域中更新变量的值，如果变量存在
         for scope in reversed(self.scopes):
             if name in scope:
@@ -37,10 +54,10 @@ class SymTab(Generic[T]):
                 return
         raise KeyError(f"Variable '{name}' not defined.")
 
-    def define_variable(self, name, value, var_type):
+    def define_variable(self, name: str, value: Any, var_type: Any) -> None:
         self.scopes[-1][name] = (value, var_type)
 
-    def lookup_variable_type(self, name):
+    def lookup_variable_type(self, name: str) -> Any:
         # print('sc', self.scopes)
         for scope in reversed(self.scopes):
 
@@ -49,7 +66,7 @@ class SymTab(Generic[T]):
                 return var_type
         raise KeyError(f"Type for variable '{name}' not found.")
 
-def add_builtin_symbols(symtab: SymTab):
+def add_builtin_symbols(symtab: SymbolTable) -> None:
 
     symtab.define_variable("Int", "Int", Int())
     symtab.define_variable("Bool","Bool", Bool())
@@ -75,3 +92,10 @@ def add_builtin_symbols(symtab: SymTab):
     symtab.define_variable("unary_not", lambda a: not a, FunctionType([Bool()], Bool()))
     symtab.define_variable("unary_-", lambda a: -a, FunctionType([Int()], Int()))
     symtab.define_variable("print_int", print, FunctionType([Int()], Unit()))
+
+
+def new_symtab() -> SymTab:
+    """A new symbol table with the builtins of `add_builtin_symbols`."""
+    symtab: SymTab = SymTab()
+    add_builtin_symbols(symtab)
+    return symtab
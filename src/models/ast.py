@@ -1,92 +1,114 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Optional, List
 
 from src.models.types import SourceLocation, Int, Bool
 from src.models.types import Type, Unit
 
-@dataclass
+@dataclass(slots=True)
 class Expression:
     """Base class for AST nodes representing expressions."""
     location: SourceLocation
     type: Type = field(default=Unit(), init=False)
+    # Tokens covered by the node, set by the parser. The offset is relative to
+    # the parent's first token (absolute for the root), so that an edit only
+    # shifts the nodes that follow it on the path from the root.
+    token_offset: int = field(default=0, init=False, compare=False, repr=False)
+    token_count: int = field(default=0, init=False, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class TypeExpr:
     """Base class for type expressions in the AST."""
     location: SourceLocation
 
     type: Type = field(default=Unit(), init=False)
 
-@dataclass
+@dataclass(slots=True)
 class IntTypeExpr(TypeExpr):
     type : Type = field(default=Int(), init=0)
 
-@dataclass
+@dataclass(slots=True)
 class BoolTypeExpr(TypeExpr):
     type : Type = field(default=Bool(), init=False)
 
-@dataclass
-class VarDecl(Expression):
-    name: str
-    type_annotation: Optional[TypeExpr]
-    value: Expression
-
-
-@dataclass
+@dataclass(slots=True)
 class Literal(Expression):
     value: int | bool | None
     # (value=None is used when parsing the keyword `unit`)
 
-@dataclass
+@dataclass(slots=True)
 class Identifier(Expression):
     name: str
+    # Set by the resolver: the block nesting depth and frame slot of the
+    # declaration, or -1 for names that are looked up in the symtab
+    depth: int = field(default=-1, init=False, compare=False, repr=False)
+    slot: int = field(default=-1, init=False, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(Expression):
     """AST node for a binary operation like `A + B`"""
     left: Expression
     op: str
     right: Expression
 
-@dataclass
+@dataclass(slots=True)
 class IfExpr(Expression):
     condition: Expression
     then_branch: Expression
     else_branch: Optional[Expression] = None
 
-@dataclass
+@dataclass(slots=True)
 class FunctionCall(Expression):
     name: str
     arguments: List[Expression]
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(Expression):
     operator: str
     operand: Expression
 
-@dataclass
+@dataclass(slots=True)
 class BlockExpr(Expression):
     expressions: List[Expression]
     result_expression: Optional[Expression] = None
+    # Set by the resolver: the number of variables declared in the block
+    frame_size: int = field(default=-1, init=False, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class VarDecl(Expression):
     name: str
     value: Expression
-    type_annotation : type
+    type_annotation: Optional[TypeExpr]
+    # Set by the resolver: the frame slot of the variable
+    slot: int = field(default=-1, init=False, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class WhileExpr(Expression):
     condition: Expression
     body: Expression
+    # Set by interpret: the iterations the tree walker ran, and once the loop
+    # is hot, (number of enclosing frames, compiled loop)
+    iterations: int = field(default=0, init=False, compare=False, repr=False)
+    compiled: Optional[tuple] = field(default=None, init=False, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class CaseClause:
     pattern: Expression
     expression: Expression
 
-@dataclass
+@dataclass(slots=True)
 class CaseExpr(Expression):
     value: Expression
     clauses: List[CaseClause]
     default: Optional[Expression] = None
+
+
+def children(node: Expression) -> List[Expression]:
+    """The direct sub-expressions of `node`, in source order."""
+    result = []
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if isinstance(value, Expression):
+            result.append(value)
+        elif isinstance(value, list):
+            result.extend(item for item in value if isinstance(item, Expression))
+    return result
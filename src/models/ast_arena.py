@@ -0,0 +1,174 @@
+from array import array
+from dataclasses import fields
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from src.models import ast
+from src.models.types import SourceLocation
+
+# Node classes in the order of their codes in `AstArena.kinds`.
+NODE_CLASSES: Tuple[Type[ast.Expression], ...] = tuple(
+    value for value in vars(ast).values()
+    if isinstance(value, type) and issubclass(value, ast.Expression)
+)
+NODE_CLASS_CODES: Dict[Type[ast.Expression], int] = {cls: code for code, cls in enumerate(NODE_CLASSES)}
+
+# Fields kept in their own arrays rather than among the operands
+_COMMON_FIELDS = frozenset({'location', 'type', 'token_offset', 'token_count'})
+# Interpreter state, which is not stored and starts at the default again
+_TRANSIENT_FIELDS = frozenset({'iterations', 'compiled'})
+_OPERAND_FIELDS: Dict[Type[ast.Expression], Tuple[str, ...]] = {
+    cls: tuple(f.name for f in fields(cls) if f.name not in _COMMON_FIELDS | _TRANSIENT_FIELDS)
+    for cls in NODE_CLASSES
+}
+_TRANSIENT_DEFAULTS: Dict[Type[ast.Expression], Tuple[Tuple[str, Any], ...]] = {
+    cls: tuple((f.name, f.default) for f in fields(cls) if f.name in _TRANSIENT_FIELDS) for cls in NODE_CLASSES
+}
+
+# An operand is `index << 2 | tag`
+_NODE, _CONSTANT, _LIST, _NONE = range(4)
+
+
+class AstArena:
+    """Struct-of-arrays storage for AST nodes, addressed by integer node ids.
+
+    Node `i` has the class `NODE_CLASSES[kinds[i]]`, its location in
+    `file_ids`/`lines`/`columns`, its type in the constant pool and its
+    remaining fields in `operands[operand_starts[i]:operand_starts[i + 1]]`,
+    one operand per field in declaration order. An operand is a child node id,
+    an index into the interned `constants` pool, or a list length followed by
+    that many operands. Nodes are stored in post-order, so children always
+    have smaller ids than their parent and a plain `range` visits them
+    bottom-up. A subtree that occurs several times in a tree is stored once.
+
+    The whole tree is a handful of arrays, which makes it small, quick to
+    pickle at any nesting depth, and fast to walk without touching Python
+    objects."""
+
+    def __init__(self) -> None:
+        self.kinds = array('B')
+        self.operand_starts = array('i', [0])
+        self.operands = array('i')
+        self.file_ids = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.type_ids = array('i')
+        self.token_offsets = array('i')
+        self.token_counts = array('i')
+        self.constants: List[Any] = []
+        self._constant_ids: Dict[Any, int] = {}
+
+    def constant(self, value: Any) -> int:
+        # The type is part of the key so that True and 1 stay apart
+        key: Optional[Tuple[type, Any]]
+        try:
+            key = (type(value), value)
+            constant_id = self._constant_ids.get(key)
+        except TypeError:  # unhashable, e.g. a TypeExpr
+            key = constant_id = None
+        if constant_id is None:
+            constant_id = len(self.constants)
+            self.constants.append(value)
+            if key is not None:
+                self._constant_ids[key] = constant_id
+        return constant_id
+
+    def add(self, root: ast.Expression) -> int:
+        """Stores the tree `root` and returns its node id."""
+        ids: Dict[int, int] = {}
+        stack: List[Tuple[ast.Expression, bool]] = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in ids:
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(ast.children(node)))
+                continue
+            ids[id(node)] = self._append(node, ids)
+        return ids[id(root)]
+
+    def _operand(self, value: Any, ids: Dict[int, int]) -> int:
+        if isinstance(value, ast.Expression):
+            return ids[id(value)] << 2 | _NODE
+        if value is None:
+            return _NONE
+        return self.constant(value) << 2 | _CONSTANT
+
+    def _append(self, node: ast.Expression, ids: Dict[int, int]) -> int:
+        operands = self.operands
+        for name in _OPERAND_FIELDS[type(node)]:
+            value = getattr(node, name)
+            if isinstance(value, list):
+                operands.append(len(value) << 2 | _LIST)
+                operands.extend(self._operand(item, ids) for item in value)
+            else:
+                operands.append(self._operand(value, ids))
+        node_id = len(self.kinds)
+        self.kinds.append(NODE_CLASS_CODES[type(node)])
+        self.operand_starts.append(len(operands))
+        location = node.location
+        self.file_ids.append(self.constant(location.file))
+        self.lines.append(location.line)
+        self.columns.append(location.column)
+        self.type_ids.append(self.constant(node.type))
+        self.token_offsets.append(node.token_offset)
+        self.token_counts.append(node.token_count)
+        return node_id
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind(self, node_id: int) -> Type[ast.Expression]:
+        return NODE_CLASSES[self.kinds[node_id]]
+
+    def location(self, node_id: int) -> SourceLocation:
+        return SourceLocation(file=self.constants[self.file_ids[node_id]],
+                              line=self.lines[node_id], column=self.columns[node_id])
+
+    def _operand_values(self, node_id: int) -> Iterator[Tuple[int, int]]:
+        """Yields `(tag, index)` for the operands of a node; a list yields its
+        length first."""
+        for operand in self.operands[self.operand_starts[node_id]:self.operand_starts[node_id + 1]]:
+            yield operand & 3, operand >> 2
+
+    def children(self, node_id: int) -> List[int]:
+        """The ids of the direct sub-expressions of a node, in source order."""
+        return [index for tag, index in self._operand_values(node_id) if tag == _NODE]
+
+    def to_tree(self, root: int) -> ast.Expression:
+        """Builds the dataclass tree of node `root`; nodes stored once are
+        shared in the result as well."""
+        reachable = {root}
+        stack = [root]
+        while stack:
+            for child in self.children(stack.pop()):
+                if child not in reachable:
+                    reachable.add(child)
+                    stack.append(child)
+
+        nodes: Dict[int, ast.Expression] = {}
+        constants = self.constants
+        for node_id in sorted(reachable):
+            cls = self.kind(node_id)
+            node = object.__new__(cls)
+            values = self._operand_values(node_id)
+
+            def decode(tag: int, index: int) -> Any:
+                if tag == _NODE:
+                    return nodes[index]
+                if tag == _CONSTANT:
+                    return constants[index]
+                if tag == _LIST:
+                    return [decode(*next(values)) for _ in range(index)]
+                return None
+
+            for name in _OPERAND_FIELDS[cls]:
+                setattr(node, name, decode(*next(values)))
+            for name, default in _TRANSIENT_DEFAULTS[cls]:
+                setattr(node, name, default)
+            node.location = self.location(node_id)
+            node.type = constants[self.type_ids[node_id]]
+            node.token_offset = self.token_offsets[node_id]
+            node.token_count = self.token_counts[node_id]
+            nodes[node_id] = node
+        return nodes[root]
@@ -0,0 +1,46 @@
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict, Tuple, TypeVar
+
+from src.models import ast, ir
+
+T = TypeVar('T')
+
+# Fields that differ between occurrences of the same subtree, or that are
+# filled in by later passes
+_IGNORED_FIELDS = frozenset({'location', 'type', 'token_offset', 'token_count', 'depth', 'slot', 'frame_size',
+                             'iterations', 'compiled'})
+
+
+class HashConser:
+    """Returns one shared instance for structurally equal AST nodes or IR
+    instructions.
+
+    Objects must be passed in bottom-up, i.e. their children must already
+    have been returned by the same `HashConser`: children are compared by
+    identity, so structurally equal trees end up being the same object and
+    `a is b` replaces `a == b`. Locations and types are not part of the
+    structure; a shared node keeps the ones of its first occurrence."""
+
+    def __init__(self) -> None:
+        self._table: Dict[Tuple[Any, ...], Any] = {}
+
+    def _part(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return tuple(self._part(item) for item in value)
+        if isinstance(value, ast.TypeExpr):
+            return type(value)
+        if isinstance(value, (ast.Expression, ir.Instruction)) or (is_dataclass(value) and value.__hash__ is None):
+            # A node or instruction that is already shared
+            return id(value)
+        # The type keeps True and 1 apart
+        return type(value), value
+
+    def key(self, obj: Any) -> Tuple[Any, ...]:
+        return (type(obj),) + tuple(self._part(getattr(obj, f.name))
+                                    for f in fields(obj) if f.name not in _IGNORED_FIELDS)
+
+    def __call__(self, obj: T) -> T:
+        return self._table.setdefault(self.key(obj), obj)
+
+    def __len__(self) -> int:
+        return len(self._table)
@@ -0,0 +1,129 @@
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from src.models.SymTab import add_builtin_symbols
+
+# An immutable name -> Symbol mapping, see `ScopeTable.snapshot`
+Snapshot = Mapping[str, 'Symbol']
+
+_EMPTY: Snapshot = MappingProxyType({})
+
+
+class Symbol(NamedTuple):
+    value: Any
+    type: Any
+
+
+class _Layered(Mapping[str, Symbol]):
+    """Entries layered over a shared base mapping, read-only."""
+
+    __slots__ = ('own', 'base')
+
+    def __init__(self, own: Dict[str, Symbol], base: Snapshot):
+        self.own = own
+        self.base = base
+
+    def __getitem__(self, name: str) -> Symbol:
+        symbol = self.own.get(name)
+        return symbol if symbol is not None else self.base[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        symbol = self.own.get(name)
+        return symbol if symbol is not None else self.base.get(name, default)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.own
+        yield from (name for name in self.base if name not in self.own)
+
+    def __len__(self) -> int:
+        return len(self.own) + sum(1 for name in self.base if name not in self.own)
+
+
+class ScopeTable:
+    """A `SymbolTable` like `SymTab` that keeps all visible
+    names in one dict instead of one dict per scope.
+
+    `define_variable` records the entry it shadows in an undo log and
+    `enter_scope` only remembers the length of the log, so entering a scope
+    allocates nothing and `leave_scope` undoes exactly the definitions made in
+    it. Lookups are a single dict access regardless of the nesting depth.
+
+    A table can start from a `Snapshot` (e.g. `builtin_snapshot()`), which it
+    reads through without copying and never modifies; assignments to a
+    snapshot's variables go into the table itself. Entries are immutable, so
+    a snapshot cannot change after it was taken."""
+
+    def __init__(self, base: Snapshot = _EMPTY):
+        self.base = base
+        self._symbols: Dict[str, Symbol] = {}
+        self._undo_log: List[Tuple[str, Optional[Symbol]]] = []
+        self._scope_starts: List[int] = []
+        self._snapshot: Optional[Snapshot] = None
+
+    def enter_scope(self) -> None:
+        self._scope_starts.append(len(self._undo_log))
+
+    def leave_scope(self) -> None:
+        start = self._scope_starts.pop()
+        log = self._undo_log
+        if len(log) == start:
+            return
+        symbols = self._symbols
+        while len(log) > start:
+            name, shadowed = log.pop()
+            if shadowed is None:
+                del symbols[name]
+            else:
+                symbols[name] = shadowed
+        self._snapshot = None
+
+    def lookup_variable(self, name: str) -> Any:
+        symbol = self._symbols.get(name) or self.base.get(name)
+        if symbol is None:
+            raise KeyError(f"Variable '{name}' not found.")
+        return symbol.value
+
+    def lookup_variable_type(self, name: str) -> Any:
+        symbol = self._symbols.get(name) or self.base.get(name)
+        if symbol is None:
+            raise KeyError(f"Type for variable '{name}' not found.")
+        return symbol.type
+
+    def update_variable(self, name: str, value: Any) -> None:
+        symbol = self._symbols.get(name) or self.base.get(name)
+        if symbol is None:
+            raise KeyError(f"Variable '{name}' not defined.")
+        # 不记入撤销日志: 赋值在离开内层作用域后仍然有效
+        self._symbols[name] = Symbol(value, symbol.type)
+        self._snapshot = None
+
+    def define_variable(self, name: str, value: Any, var_type: Any) -> None:
+        self._undo_log.append((name, self._symbols.get(name)))
+        self._symbols[name] = Symbol(value, var_type)
+        self._snapshot = None
+
+    def snapshot(self) -> Snapshot:
+        """The currently visible names as an immutable mapping. Taking it
+        copies the table's own entries once and layers them over the base,
+        which is shared, not copied; it is reused until the table changes.
+        A snapshot of a table that started from a snapshot merges the two
+        layers, so lookups never go through more than two dicts."""
+        if self._snapshot is None:
+            if not self._symbols:
+                self._snapshot = self.base
+            elif isinstance(self.base, _Layered):
+                self._snapshot = _Layered({**self.base.own, **self._symbols}, self.base.base)
+            elif not self.base:
+                self._snapshot = MappingProxyType(dict(self._symbols))
+            else:
+                self._snapshot = _Layered(dict(self._symbols), self.base)
+        return self._snapshot
+
+
+@lru_cache(maxsize=None)
+def builtin_snapshot() -> Snapshot:
+    """The builtins of `add_builtin_symbols`, built once per process."""
+    table = ScopeTable()
+    add_builtin_symbols(table)
+    return table.snapshot()
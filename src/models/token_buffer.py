@@ -0,0 +1,78 @@
+from array import array
+from typing import Dict, Iterator, List
+
+from src.models.types import Token, LineIndex, SourceLocation
+
+# Token types in the order of their codes in `TokenBuffer.kinds`.
+TOKEN_TYPES = ('integer', 'float', 'bool', 'identifier', 'operator', 'punctuation')
+TOKEN_TYPE_CODES: Dict[str, int] = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+
+class TokenBuffer:
+    """Struct-of-arrays storage for the tokens of one source text.
+
+    Token `i` is described by `kinds[i]` (an index into `TOKEN_TYPES`),
+    `starts[i]`/`ends[i]` (character offsets into `source_code`) and
+    `text_ids[i]` (an index into the interned `texts` pool, shared by all
+    occurrences of the same identifier, keyword, operator or literal).
+    `Token` objects are only built when one is indexed or iterated; the
+    parser reads the arrays directly."""
+
+    def __init__(self, source_code: str, file: str = "<unknown>"):
+        self.source_code = source_code
+        self.lines = LineIndex(source_code, file)
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.text_ids = array('l')
+        self.texts: List[str] = []
+        self._text_ids: Dict[str, int] = {}
+
+    def intern(self, text: str) -> int:
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = self._text_ids[text] = len(self.texts)
+            self.texts.append(text)
+        return text_id
+
+    def append(self, token_type: str, start: int, end: int) -> None:
+        self.kinds.append(TOKEN_TYPE_CODES[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.text_ids.append(self.intern(self.source_code[start:end]))
+
+    def splice(self, first: int, last: int, kinds: array, starts: array, ends: array,
+               text_ids: array, delta: int) -> None:
+        """Replaces tokens `first:last` with the given ones and moves the offsets
+        of all later tokens by `delta`. Later tokens keep their kind and text."""
+        for old, new in [(self.kinds, kinds), (self.text_ids, text_ids)]:
+            old[first:last] = new
+        for old, new in [(self.starts, starts), (self.ends, ends)]:
+            if delta:
+                new = new + array('q', map(delta.__add__, old[last:]))
+                old[first:] = new
+            else:
+                old[first:last] = new
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def type(self, i: int) -> str:
+        return TOKEN_TYPES[self.kinds[i]]
+
+    def text(self, i: int) -> str:
+        return self.texts[self.text_ids[i]]
+
+    def location(self, i: int) -> SourceLocation:
+        return self.lines.location(self.starts[i])
+
+    def __getitem__(self, i: int) -> Token:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("token index out of range")
+        return Token(text=self.text(i), type=self.type(i), loc=self.location(i))
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(len(self)):
+            yield self[i]
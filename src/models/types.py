@@ -1,45 +1,114 @@
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import List
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Tuple, TypeVar
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceLocation:
     file: str = "<unknown>"
     line: int = 1
     column: int = 1
-    def __eq__(self, other):
+    def __eq__(self, other: object) -> bool:
         return True  # Consider all source locations equal for testing purposes
 
-@dataclass
+class LineIndex:
+    """Table of line start offsets, built once per source text.
+    Any character offset resolves to a line/column with a binary search."""
+
+    def __init__(self, source_code: str = "", file: str = "<unknown>", first_line: int = 1):
+        self.file = file
+        self.first_line = first_line
+        self.line_starts: List[int] = [0]
+        self.extend(source_code, 0)
+
+    def extend(self, text: str, base: int) -> None:
+        """Records the line breaks of `text`, which starts at offset `base`."""
+        starts = self.line_starts
+        pos = text.find('\n')
+        while pos != -1:
+            starts.append(base + pos + 1)
+            pos = text.find('\n', pos + 1)
+
+    def edit(self, start: int, old_end: int, new_text: str, delta: int) -> None:
+        """Updates the table after the text between line start `start` and
+        `old_end` was replaced by `new_text`; later line starts move by `delta`."""
+        starts = self.line_starts
+        lo = bisect_right(starts, start)
+        hi = bisect_right(starts, old_end)
+        tail = starts[hi:]
+        del starts[lo:]
+        self.extend(new_text, start)
+        starts.extend(map(delta.__add__, tail))
+
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self.line_starts, offset) - 1 + self.first_line
+
+    def location(self, offset: int) -> 'SourceLocation':
+        i = bisect_right(self.line_starts, offset) - 1
+        return SourceLocation(file=self.file, line=i + self.first_line, column=offset - self.line_starts[i] + 1)
+
+@dataclass(slots=True)
 class Token:
     text: str
     type: str
     loc: SourceLocation
-    def __eq__(self, other):
+    def __eq__(self, other: object) -> bool:
         if isinstance(other, Token):
             return self.text == other.text and self.type == other.type
         return NotImplemented
 
+_T = TypeVar('_T', bound='Type')
+
+
 class Type:
-    pass
+    """Types are interned: `Int()`, `Bool()` and `Unit()` always return the
+    same object and `FunctionType` returns one object per signature, so types
+    are compared with `is`."""
+
+    _instance: ClassVar[Optional['Type']]
+
+    def __new__(cls: type[_T]) -> _T:
+        instance = cls.__dict__.get('_instance')
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instance = instance
+        return instance
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Unpickling and copying return the interned instance as well
+        return type(self), ()
 
 class Int(Type):
-    def __repr__(self):
+    def __repr__(self) -> str:
         return "Int"
 
 class Bool(Type):
-    def __repr__(self):
+    def __repr__(self) -> str:
         return "Bool"
 
 class Unit(Type):
-    def __repr__(self):
+    def __repr__(self) -> str:
         return "Unit"
 
 class FunctionType(Type):
-    def __init__(self, param_types: List[Type], return_type: Type):
-        self.param_types = param_types
-        self.return_type = return_type
+    _instances: Dict[Tuple[Tuple[Type, ...], Type], 'FunctionType'] = {}
+
+    param_types: Tuple[Type, ...]
+    return_type: Type
+
+    def __new__(cls, param_types: Sequence[Type], return_type: Type) -> 'FunctionType':
+        # The parameter and return types are interned, so they hash by identity
+        key = (tuple(param_types), return_type)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = object.__new__(cls)
+            instance.param_types, instance.return_type = key
+            cls._instances[key] = instance
+        return instance
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return FunctionType, (self.param_types, self.return_type)
 
-    def __repr__(self):
+    def __repr__(self) -> str:
         param_types_str = ", ".join(repr(t) for t in self.param_types)
         return f"({param_types_str}) => {repr(self.return_type)}"
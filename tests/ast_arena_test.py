@@ -0,0 +1,89 @@
+import pickle
+import unittest
+
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize, tokenize_to_buffer
+from src.models import ast
+from src.models.ast_arena import AstArena
+from src.models.types import SourceLocation, Int
+
+L = SourceLocation()
+
+
+class AstArenaTest(unittest.TestCase):
+    sources = [
+        "1 + 2 * 3",
+        "not not true",
+        "{ var x = 1; f(x, 2); if x then { y = x + 2; } else false }",
+        "while a < 10 do { a = a + 1; }",
+        "{ }",
+    ]
+
+    def test_round_trip(self):
+        for source in self.sources:
+            with self.subTest(source=source):
+                tree = parse(tokenize(source))
+                arena = AstArena()
+                root = arena.add(tree)
+                result = arena.to_tree(root)
+                self.assertEqual(repr(result), repr(tree))
+                self.assertEqual(result.token_count, tree.token_count)
+
+    def test_children_come_before_their_parent(self):
+        arena = AstArena()
+        root = arena.add(parse(tokenize(self.sources[2])))
+        self.assertEqual(root, len(arena) - 1)
+        for node_id in range(len(arena)):
+            self.assertTrue(all(child < node_id for child in arena.children(node_id)))
+        self.assertIs(arena.kind(root), ast.BlockExpr)
+
+    def test_shared_subtrees_are_stored_once(self):
+        shared = ast.BinaryOp(location=L, left=ast.Literal(location=L, value=1), op='+',
+                              right=ast.Identifier(location=L, name='x'))
+        arena = AstArena()
+        root = arena.add(ast.BinaryOp(location=L, left=shared, op='*', right=shared))
+        self.assertEqual(len(arena), 4)
+        result = arena.to_tree(root)
+        self.assertIs(result.left, result.right)
+
+    def test_constants_keep_their_type(self):
+        arena = AstArena()
+        root = arena.add(ast.BinaryOp(location=L, left=ast.Literal(location=L, value=1), op='==',
+                                      right=ast.Literal(location=L, value=True)))
+        result = arena.to_tree(root)
+        self.assertIs(result.left.value, 1)
+        self.assertIs(result.right.value, True)
+
+    def test_types_and_locations(self):
+        node = ast.Identifier(location=SourceLocation(file="a.txt", line=3, column=7), name='x')
+        node.type = Int()
+        arena = AstArena()
+        result = arena.to_tree(arena.add(node))
+        self.assertIs(result.type, node.type)
+        self.assertEqual((result.location.file, result.location.line, result.location.column), ("a.txt", 3, 7))
+
+    def test_pickle_deep_tree(self):
+        depth = 100000
+        tree = parse(tokenize_to_buffer("not " * depth + "x"), explicit_stack=True)
+        arena = AstArena()
+        root = arena.add(tree)
+        result = pickle.loads(pickle.dumps(arena)).to_tree(root)
+        for _ in range(depth):
+            self.assertIsInstance(result, ast.UnaryOp)
+            result = result.operand
+        self.assertEqual(result.name, 'x')
+
+    def test_interpreter_state_is_not_stored(self):
+        tree = parse(tokenize(self.sources[3]))
+        tree.iterations, tree.compiled = 100, (0, print)
+        arena = AstArena()
+        root = arena.add(tree)
+        result = pickle.loads(pickle.dumps(arena)).to_tree(root)
+        self.assertEqual((result.iterations, result.compiled), (0, None))
+
+    def test_nodes_have_no_dict(self):
+        self.assertFalse(hasattr(ast.Literal(location=L, value=1), '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
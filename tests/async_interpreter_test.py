@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from src.compiler.async_interpreter import interpret_async
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models.SymTab import new_symtab
+
+LOOP = "{ var i = 0; var s = 0; while i < 100 do { s = s + i; i = i + 1; } s }"
+
+
+class TestAsyncInterpreter(unittest.IsolatedAsyncioTestCase):
+    async def test_same_result_as_interpret(self):
+        tree = parse(tokenize(LOOP))
+        self.assertEqual(await interpret_async(tree, new_symtab(), yield_every=7), interpret(tree, new_symtab()))
+
+    async def test_programs_take_turns(self):
+        printed = []
+
+        def program(name: str):
+            symtab = new_symtab()
+            symtab.define_variable('print_int', lambda value: printed.append((name, value)), None)
+            tree = parse(tokenize("{ var i = 0; while i < 3 do { print_int(i); i = i + 1; } }"))
+            return interpret_async(tree, symtab, yield_every=1)
+
+        await asyncio.gather(program('a'), program('b'))
+        self.assertEqual(printed, [('a', 0), ('b', 0), ('a', 1), ('b', 1), ('a', 2), ('b', 2)])
+
+    async def test_event_loop_is_not_blocked(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await interpret_async(parse(tokenize(LOOP)), new_symtab(), yield_every=10)
+        task.cancel()
+        self.assertGreaterEqual(ticks, 9)
+
+    async def test_cancellation(self):
+        task = asyncio.create_task(interpret_async(parse(tokenize("while true do { }")), new_symtab()))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_timeout(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(interpret_async(parse(tokenize("while true do { }")), new_symtab()), 0.01)
+
+    async def test_yield_every_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            await interpret_async(parse(tokenize(LOOP)), new_symtab(), yield_every=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
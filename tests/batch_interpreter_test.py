@@ -0,0 +1,64 @@
+import unittest
+
+from src.compiler.batch_interpreter import interpret_batch, np
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models.SymTab import new_symtab
+from src.models.types import Int
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatchInterpreter(unittest.TestCase):
+    programs = [
+        "x * 2 + 1",
+        "if x % 2 == 0 then x / 2 else 3 * x + 1",
+        "x > 3 and x < 8 or x == 0",
+        "{ var s = 0; var i = 0; while i < x do { s = s + i; i = i + 1; } s }",
+        "{ var n = 0; while x != 1 do { x = if x % 2 == 0 then x / 2 else 3 * x + 1; n = n + 1; } n }",
+        "{ var y = 10; if x > 4 then { y = y - x; } y }",
+    ]
+
+    def test_same_results_as_interpret(self):
+        xs = np.arange(1, 12)
+        for source_code in self.programs:
+            with self.subTest(source_code=source_code):
+                expected = []
+                for x in xs.tolist():
+                    symtab = new_symtab()
+                    symtab.define_variable('x', x, Int())
+                    expected.append(interpret(parse(tokenize(source_code)), symtab))
+                result = interpret_batch(parse(tokenize(source_code)), new_symtab(), {'x': xs})
+                self.assertEqual(result.tolist(), expected)
+
+    def test_scalar_result_is_broadcast(self):
+        self.assertEqual(interpret_batch(parse(tokenize("1 + 2")), new_symtab(), {'x': [1, 2, 3]}).tolist(),
+                         [3, 3, 3])
+
+    def test_unit_result(self):
+        self.assertIsNone(interpret_batch(parse(tokenize("while false do 1")), new_symtab(), {'x': [1]}))
+
+    def test_masked_lanes_do_not_divide(self):
+        tree = parse(tokenize("if x != 0 then 10 % x else 0"))
+        self.assertEqual(interpret_batch(tree, new_symtab(), {'x': [0, 3, 4]}).tolist(), [0, 1, 2])
+        with self.assertRaises(ZeroDivisionError):
+            interpret_batch(parse(tokenize("10 % x")), new_symtab(), {'x': [0, 3]})
+
+    def test_symtab_is_unchanged(self):
+        symtab = new_symtab()
+        symtab.define_variable('g', 1, Int())
+        result = interpret_batch(parse(tokenize("{ g = g + x; g }")), symtab, {'x': [1, 2]})
+        self.assertEqual(result.tolist(), [2, 3])
+        self.assertEqual(symtab.lookup_variable('g'), 1)
+
+    def test_inputs_must_have_the_same_length(self):
+        with self.assertRaises(ValueError):
+            interpret_batch(parse(tokenize("x + y")), new_symtab(), {'x': [1, 2], 'y': [1]})
+
+    def test_function_calls_are_rejected(self):
+        with self.assertRaises(TypeError):
+            interpret_batch(parse(tokenize("print_int(x)")), new_symtab(), {'x': [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
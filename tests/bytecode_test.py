@@ -0,0 +1,110 @@
+import pickle
+import tempfile
+import unittest
+
+from src.compiler.bytecode import (
+    BINARY, CALL, JUMP, JUMP_IF_FALSE, MOVE, RETURN, Bytecode, compile_bytecode, execute
+)
+from src.compiler.cache import CompileCache
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models import ast
+from src.models.SymTab import new_symtab
+from src.models.types import SourceLocation
+
+L = SourceLocation()
+
+
+def opcodes(bytecode: Bytecode) -> list:
+    return [line.split()[1] for line in bytecode.disassemble().splitlines()]
+
+
+class TestBytecode(unittest.TestCase):
+    programs = [
+        "1 + 2 * 3 - 4 % 3",
+        "{ var i = 0; var s = 0; while i < 10 do { s = s + i; i = i + 1; } s }",
+        "{ var i = 0; var n = 0; while i < 3 do { var t = 7; t = t + i; n = n + t; i = i + 1; } n }",
+        "{ var x = 1; x + (x = 5) }",
+        "{ var x = 1; { x } + (x = 5) }",
+        "{ var a = 2; { var b = 0; b = a * 3; b } + a }",
+        "{ var x = 10; { var x = 20; x = 30; } x }",
+        "true and false or not false",
+        "false and { 1 / 0 > 1 }",
+        "if 1 < 2 then 3",
+        "if 1 > 2 then 3 else { 4 }",
+        "{ var x = 0; var y = 0; x = y = 3; x + y }",
+    ]
+
+    def test_same_results_as_interpret(self):
+        for source_code in self.programs:
+            with self.subTest(source_code=source_code):
+                tree = parse(tokenize(source_code))
+                self.assertEqual(execute(compile_bytecode(tree), new_symtab()), interpret(tree, new_symtab()))
+
+    def test_loop_code(self):
+        bytecode = compile_bytecode(parse(tokenize("{ var i = 0; while i < 10 do i = i + 1; i }")))
+        # The sum is written straight into the variable's register
+        self.assertEqual(opcodes(bytecode), ['MOVE', 'BINARY', 'JUMP_IF_FALSE', 'BINARY', 'JUMP', 'RETURN'])
+        code = bytecode.code
+        self.assertEqual(code[3], BINARY)
+        self.assertEqual(code[8], JUMP_IF_FALSE)
+        self.assertEqual(code[16], JUMP)
+        # Jumps use absolute offsets
+        self.assertEqual(code[17], 3)
+        self.assertEqual(code[10], 18)
+        self.assertEqual(code[18], RETURN)
+
+    def test_registers(self):
+        bytecode = compile_bytecode(parse(tokenize("{ var a = 1; var b = 2; a + b * 3 }")))
+        self.assertEqual(bytecode.constants, [1, 2, 3])
+        # Constants, two variables, one temporary reused for both results
+        self.assertEqual(bytecode.register_count, 6)
+        self.assertEqual(bytecode.code[:3].tolist(), [MOVE, 3, 0])
+
+    def test_globals(self):
+        symtab = new_symtab()
+        symtab.define_variable('y', 4, None)
+        tree = parse(tokenize("{ y = y + 1; y }"))
+        self.assertEqual(execute(compile_bytecode(tree), symtab), 5)
+        self.assertEqual(symtab.lookup_variable('y'), 5)
+
+    def test_top_level_var_is_defined_in_symtab(self):
+        symtab = new_symtab()
+        tree = ast.VarDecl(location=L, name='q', value=ast.Literal(location=L, value=7), type_annotation=None)
+        self.assertEqual(execute(compile_bytecode(tree), symtab), 7)
+        self.assertEqual(symtab.lookup_variable('q'), 7)
+
+    def test_function_call(self):
+        printed = []
+        symtab = new_symtab()
+        symtab.define_variable('print_int', printed.append, None)
+        bytecode = compile_bytecode(parse(tokenize("{ var i = 0; while i < 3 do { print_int(i * 2); i = i + 1 } }")))
+        self.assertIn('CALL', opcodes(bytecode))
+        self.assertIsNone(execute(bytecode, symtab))
+        self.assertEqual(printed, [0, 2, 4])
+
+    def test_serialization(self):
+        bytecode = compile_bytecode(parse(tokenize(self.programs[1])))
+        loaded = Bytecode.loads(bytecode.dumps())
+        self.assertEqual(loaded, bytecode)
+        self.assertEqual(execute(loaded, new_symtab()), 45)
+        with self.assertRaises(TypeError):
+            Bytecode.loads(pickle.dumps([1, 2]))
+
+    def test_cacheable(self):
+        bytecode = compile_bytecode(parse(tokenize(self.programs[1])))
+        with tempfile.TemporaryDirectory() as directory:
+            cache = CompileCache(directory)
+            key = cache.key(self.programs[1])
+            cache.store(key, 'bytecode', bytecode)
+            self.assertEqual(cache.load(key, 'bytecode'), bytecode)
+
+    def test_disassemble(self):
+        bytecode = compile_bytecode(parse(tokenize("{ print_int(1, 2); 0 }")))
+        self.assertEqual(bytecode.code[0], CALL)
+        self.assertEqual(bytecode.disassemble().splitlines()[0].split(), ['0', 'CALL', '3,', '0,', '2,', '0,', '1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
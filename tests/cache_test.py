@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.compiler.cache import CompileCache
+from src.compiler.parser import parse
+from src.compiler.pipeline import run_stage
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models import ast
+
+
+class CompileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_hits_and_misses(self):
+        cache = CompileCache(self.directory)
+        key = cache.key("1 + 2")
+        self.assertIsNone(cache.load(key, 'asm'))
+        cache.store(key, 'asm', "ret\n")
+        self.assertEqual(cache.load(key, 'asm'), "ret\n")
+        self.assertEqual((cache.hits['asm'], cache.misses['asm']), (1, 1))
+        self.assertEqual(cache.stats(), "asm: 1 hits, 1 misses")
+
+    def test_key_depends_on_source_and_version(self):
+        cache = CompileCache(self.directory, version="1")
+        self.assertNotEqual(cache.key("1 + 2"), cache.key("1 + 3"))
+        self.assertNotEqual(cache.key("1 + 2"), CompileCache(self.directory, version="2").key("1 + 2"))
+
+    def test_ast_round_trip(self):
+        cache = CompileCache(self.directory)
+        tree = parse(tokenize_to_buffer("not " * 50000 + "x"), explicit_stack=True)
+        cache.store("k", 'ast', tree)
+        result = cache.load("k", 'ast')
+        for _ in range(50000):
+            result = result.operand
+        self.assertIsInstance(result, ast.Identifier)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = CompileCache(self.directory, max_bytes=10 ** 6)
+        for name in ["a", "b", "c"]:
+            cache.store(name, 'asm', os.urandom(1000))
+        # Make the access order unambiguous on filesystems with coarse timestamps
+        for i, name in enumerate(["b", "a", "c"]):
+            os.utime(self.directory / f"{name}.asm", ns=(i * 10 ** 9, i * 10 ** 9))
+        self.assertIsNotNone(cache.load("b", 'asm'))  # now the most recently used one
+        cache.max_bytes = 2500
+        cache.evict()
+        self.assertEqual(sorted(path.name for path in self.directory.iterdir()), ["b.asm", "c.asm"])
+
+    def test_damaged_entry_is_a_miss(self):
+        cache = CompileCache(self.directory)
+        (self.directory / "k.ir").write_bytes(b"garbage")
+        self.assertIsNone(cache.load("k", 'ir'))
+        self.assertEqual(cache.misses['ir'], 1)
+        self.assertFalse((self.directory / "k.ir").exists())
+
+    def test_undecodable_entry_is_a_miss(self):
+        cache = CompileCache(self.directory)
+        cache.store("k", 'asm', b"not marshal data")
+        os.replace(self.directory / "k.asm", self.directory / "k.pycode")
+        self.assertIsNone(cache.load("k", 'pycode'))
+        self.assertEqual((cache.hits['pycode'], cache.misses['pycode']), (0, 1))
+        self.assertFalse((self.directory / "k.pycode").exists())
+
+    def test_directory_is_scanned_only_above_the_limit(self):
+        cache = CompileCache(self.directory, max_bytes=10 ** 6)
+        with mock.patch('src.compiler.cache.os.scandir', wraps=os.scandir) as scandir:
+            for name in "abcdefgh":
+                cache.store(name, 'asm', os.urandom(1000))
+            self.assertEqual(scandir.call_count, 1)
+            cache.max_bytes = 2500
+            cache.store("i", 'asm', os.urandom(1000))
+            self.assertEqual(scandir.call_count, 2)
+        self.assertEqual(len(list(self.directory.iterdir())), 2)
+
+    def test_no_temporary_files_are_left(self):
+        cache = CompileCache(self.directory)
+        cache.store("k", 'tokens', tokenize_to_buffer("1 + 2"))
+        self.assertEqual([path.name for path in self.directory.iterdir()], ["k.tokens"])
+
+    def test_pipeline_skips_cached_stages(self):
+        cache = CompileCache(self.directory)
+        first = run_stage("1 + 2 * 3", 'ir', cache)
+        self.assertEqual(sum(cache.hits.values()), 0)
+        self.assertEqual(set(cache.misses), {'tokens', 'ast', 'typed_ast', 'ir'})
+
+        cache = CompileCache(self.directory)
+        self.assertEqual([str(insn) for insn in run_stage("1 + 2 * 3", 'ir', cache)], [str(insn) for insn in first])
+        self.assertEqual(dict(cache.hits), {'ir': 1})
+        self.assertEqual(sum(cache.misses.values()), 0)
+
+        cache = CompileCache(self.directory)
+        run_stage("1 + 2 * 3", 'asm', cache)
+        self.assertEqual((dict(cache.hits), dict(cache.misses)), ({'ir': 1}, {'asm': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
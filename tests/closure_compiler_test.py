@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+
+from src.compiler.closure_compiler import compile_closures
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models.SymTab import new_symtab
+
+
+class TestClosureCompiler(unittest.TestCase):
+    def setUp(self):
+        self.symtab = new_symtab()
+
+    def compile(self, source_code: str):
+        return compile_closures(parse(tokenize(source_code)), self.symtab)
+
+    def test_compiled_program_can_run_again(self):
+        program = self.compile("{ var i = 0; var s = 0; while i < 10 do { s = s + i; i = i + 1; } s }")
+        self.assertEqual(program(), 45)
+        self.assertEqual(program(), 45)
+
+    def test_fresh_variables_per_iteration(self):
+        program = self.compile(
+            "{ var i = 0; var n = 0; while i < 3 do { var t = 7; t = t + i; n = n + t; i = i + 1; } n }")
+        self.assertEqual(program(), 24)
+
+    def test_operators_are_looked_up_once(self):
+        program = self.compile("{ var i = 0; while i < 100 do i = i + 1; i }")
+        with mock.patch.object(self.symtab, 'lookup_variable', side_effect=AssertionError):
+            self.assertEqual(program(), 100)
+
+    def test_symtab_variables(self):
+        self.symtab.define_variable('y', 4, None)
+        program = self.compile("{ y = y + 1; y }")
+        self.assertEqual(program(), 5)
+        self.assertEqual(program(), 6)
+        self.assertEqual(self.symtab.lookup_variable('y'), 6)
+
+    def test_function_call(self):
+        printed = []
+        self.symtab.define_variable('print_int', printed.append, None)
+        self.compile("{ print_int(1 + 2); 0 }")()
+        self.assertEqual(printed, [3])
+
+    def test_if_without_else(self):
+        self.assertIsNone(self.compile("if false then 1")())
+
+    def test_backend_is_selectable(self):
+        tree = parse(tokenize("{ var a = 3; if a > 2 then a * 2 else a }"))
+        self.assertEqual(interpret(tree, self.symtab, backend='closures'), 6)
+        with self.assertRaises(ValueError):
+            interpret(tree, self.symtab, backend='nope')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import re
+import unittest
+
+from src.compiler.ir_generator import generate_ir
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize, tokenize_to_buffer
+from src.models import ast
+from src.models.hashcons import HashConser
+from src.models.types import SourceLocation
+
+L = SourceLocation()
+
+
+def without_locations(expr):
+    # Shared nodes keep the location of their first occurrence
+    return re.sub(r"SourceLocation\([^)]*\)", "", repr(expr))
+
+
+class HashConserTest(unittest.TestCase):
+    source = "{ f(x + 1, x + 1); if i < n then x + 1 else i < n; true == 1; var a = 1; var a = 1; }"
+
+    def test_equal_subtrees_are_shared(self):
+        tree = parse(tokenize(self.source), interner=HashConser())
+        call, if_expr, comparison, first_decl, second_decl = tree.expressions
+        self.assertIs(call.arguments[0], call.arguments[1])
+        self.assertIs(if_expr.then_branch, call.arguments[0])
+        self.assertIs(if_expr.condition, if_expr.else_branch)
+        self.assertIs(first_decl, second_decl)
+        self.assertIsNot(comparison.left, comparison.right)  # true and 1 differ
+
+    def test_same_tree_as_without_interning(self):
+        expected = without_locations(parse(tokenize(self.source)))
+        for explicit_stack in (False, True):
+            tree = parse(tokenize_to_buffer(self.source), explicit_stack=explicit_stack, interner=HashConser())
+            self.assertEqual(without_locations(tree), expected)
+
+    def test_table_is_shared_between_parses(self):
+        interner = HashConser()
+        first = parse(tokenize("a * (b + 1)"), interner=interner)
+        size = len(interner)
+        self.assertIs(parse(tokenize("a*(b+1)"), interner=interner), first)
+        self.assertEqual(len(interner), size)
+
+    def test_children_are_compared_by_identity(self):
+        interner = HashConser()
+        left = ast.Identifier(location=L, name='x')
+        right = ast.Identifier(location=L, name='x')
+        self.assertIs(interner(left), interner(right))
+        # Not built bottom-up: the children are different objects
+        first = interner(ast.UnaryOp(location=L, operator='not', operand=left))
+        second = interner(ast.UnaryOp(location=L, operator='not', operand=right))
+        self.assertIsNot(first, second)
+
+    def test_incremental_reparse_is_rejected(self):
+        buffer = tokenize_to_buffer("{ a }")
+        tree = parse(buffer, interner=HashConser())
+        with self.assertRaises(ValueError):
+            parse(buffer, previous=tree, changed=(1, 2, 2), interner=HashConser())
+
+    def test_pure_ir_instructions(self):
+        interner = HashConser()
+        instructions = generate_ir(parse(tokenize("1 + 2")), interner=interner)
+        self.assertEqual([str(insn) for insn in instructions],
+                         [str(insn) for insn in generate_ir(parse(tokenize("1 + 2")))])
+        again = generate_ir(parse(tokenize("1 + 2")), interner=interner)
+        self.assertIs(again[0], instructions[0])
+        self.assertIsNot(again[-1], instructions[-1])  # print_int is not pure
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-
+from functools import partial
+from unittest import mock
 
 from src.compiler.interpreter import interpret
 from src.compiler.parser import parse
@@ -12,10 +13,18 @@ L = SourceLocation()
 
 
 class TestInterpreter(unittest.TestCase):
+    # Extra arguments of `interpret`, e.g. the backend; the subclasses below
+    # run every test of this class with their own
+    options = {}
+
     def setUp(self):
         # 在每个测试用例开始前初始化符号表和添加内置符号
         self.symtab = SymTab()
         add_builtin_symbols(self.symtab)  # 确保你已经实现了这个函数
+        if self.options:
+            patcher = mock.patch(f"{__name__}.interpret", partial(interpret, **self.options))
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
     def test_arithmetic_operations(self):
         # 测试基本的算术运算
@@ -138,6 +147,72 @@ class TestInterpreter(unittest.TestCase):
         result = interpret(block, self.symtab)
         self.assertEqual(result, 2)
 
+    def test_var_initializer_expression(self):
+        source_code = "{ var x = 3; var y = x * 2 + 1; { var x = y + x; x } }"
+        self.assertEqual(interpret(parse(tokenize(source_code)), self.symtab), 10)
+
+    def test_function_call(self):
+        printed = []
+        self.symtab.define_variable('print_int', printed.append, None)
+        source_code = "{ var i = 0; while i < 3 do { print_int(i * 2); i = i + 1; } i }"
+        self.assertEqual(interpret(parse(tokenize(source_code)), self.symtab), 3)
+        self.assertEqual(printed, [0, 2, 4])
+
+
+class TestClosureInterpreter(TestInterpreter):
+    """All of `TestInterpreter`, run on the closure backend."""
+    options = {'backend': 'closures'}
+
+
+class TestBytecodeInterpreter(TestInterpreter):
+    """All of `TestInterpreter`, run on the bytecode VM."""
+    options = {'backend': 'bytecode'}
+
+
+class TestPythonInterpreter(TestInterpreter):
+    """All of `TestInterpreter`, run as transpiled Python code."""
+    options = {'backend': 'python'}
+
+
+class TestTieredInterpreter(TestInterpreter):
+    """All of `TestInterpreter` with loops compiled after two iterations."""
+    options = {'hot_loop_threshold': 2}
+
+    def test_hot_loop_is_compiled(self):
+        tree = parse(tokenize("{ var i = 0; var s = 0; while i < 10 do { s = s + i; i = i + 1; } s }"))
+        loop = tree.expressions[2]
+        self.assertEqual(interpret(tree, self.symtab), 45)
+        self.assertEqual(loop.iterations, 2)
+        self.assertEqual(loop.compiled[0], 1)
+        # The next run starts in the compiled loop
+        self.assertEqual(interpret(tree, self.symtab), 45)
+        self.assertEqual(loop.iterations, 2)
+
+    def test_disabled_tiering_ignores_compiled_loop(self):
+        tree = parse(tokenize("{ var i = 0; var s = 0; while i < 10 do { s = s + i; i = i + 1; } s }"))
+        loop = tree.expressions[2]
+        self.assertEqual(interpret(tree, self.symtab), 45)
+        compiled = loop.compiled
+        loop.compiled = (compiled[0], mock.Mock(side_effect=AssertionError("compiled loop ran")))
+        self.assertEqual(interpret(tree, self.symtab, hot_loop_threshold=None), 45)
+        self.assertEqual(loop.iterations, 2)
+
+    def test_cold_loop_is_not_compiled(self):
+        tree = parse(tokenize("{ var i = 0; while i < 1 do i = i + 1; i }"))
+        self.assertEqual(interpret(tree, self.symtab), 1)
+        self.assertIsNone(tree.expressions[1].compiled)
+
+    def test_nested_loops(self):
+        source_code = ("{ var i = 0; var n = 0; while i < 4 do { var j = 0; "
+                       "while j < i do { var t = 3; t = t + j; n = n + t * i; j = j + 1; } i = i + 1; } n }")
+        self.assertEqual(interpret(parse(tokenize(source_code)), self.symtab),
+                         interpret(parse(tokenize(source_code)), self.symtab, backend='closures'))
+
+    def test_loop_state_is_shared(self):
+        self.symtab.define_variable('g', 0, None)
+        tree = parse(tokenize("{ var i = 0; while i < 5 do { g = g + i; i = i + 1; } i * 100 + g }"))
+        self.assertEqual(interpret(tree, self.symtab), 510)
+        self.assertEqual(self.symtab.lookup_variable('g'), 10)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import unittest
+
+from src.compiler.ir_executor import IR_BUILTINS, IRProgram, execute_ir
+from src.compiler.ir_generator import generate_ir
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models.ir import Call, CondJump, Copy, IRVar, Jump, Label, LoadBoolConst, LoadIntConst
+from src.models.types import SourceLocation
+
+L = SourceLocation()
+
+
+def counting_loop(n: int) -> list:
+    """IR for `{ var i = 0; var s = 0; while i < n do { s = s + i; i = i + 1 }; s }`."""
+    i, s, n_var, one, cond = IRVar('i'), IRVar('s'), IRVar('n'), IRVar('one'), IRVar('cond')
+    start, body, end = Label(L, 'start'), Label(L, 'body'), Label(L, 'end')
+    return [
+        LoadIntConst(L, 0, i), LoadIntConst(L, 0, s), LoadIntConst(L, n, n_var), LoadIntConst(L, 1, one),
+        start,
+        Call(L, IRVar('<'), [i, n_var], cond),
+        CondJump(L, cond, body, end),
+        body,
+        Call(L, IRVar('+'), [s, i], s),
+        Call(L, IRVar('+'), [i, one], i),
+        Jump(L, start),
+        end,
+    ]
+
+
+class TestIRExecutor(unittest.TestCase):
+    def run_source(self, source_code: str) -> list:
+        """The values the IR of `source_code` prints."""
+        with contextlib.redirect_stdout(io.StringIO()):  # generate_ir prints debug output
+            instructions = generate_ir(parse(tokenize(source_code)))
+        printed = []
+        execute_ir(instructions, dict(IR_BUILTINS, print_int=printed.append, print_bool=printed.append))
+        return printed
+
+    def test_generated_ir(self):
+        tests = [
+            ("1 + 2 * 3", [7]),
+            ("if 1 < 2 then 3 else 4", [3]),
+            ("if 2 < 1 then 3 else 4 + 1", [5]),
+            ("true and false", [False]),
+            ("{ 1 > 2 }", [False]),
+        ]
+        for source_code, expected in tests:
+            with self.subTest(source_code=source_code):
+                self.assertEqual(self.run_source(source_code), expected)
+
+    def test_generated_while_loop_runs(self):
+        self.assertEqual(self.run_source("{ while false do 1; 7 }"), [7])
+
+    def test_loop(self):
+        program = IRProgram(counting_loop(10))
+        self.assertEqual(program.run()[IRVar('s')], 45)
+        # 4 loads, then 5 instructions per iteration and a final comparison and jump
+        self.assertEqual(program.executed, 4 + 10 * 5 + 2)
+
+    def test_program_can_run_again(self):
+        program = IRProgram(counting_loop(5))
+        self.assertEqual(program.run(), program.run())
+
+    def test_integer_division_truncates(self):
+        a, b, q, r = IRVar('a'), IRVar('b'), IRVar('q'), IRVar('r')
+        values = execute_ir([LoadIntConst(L, -7, a), LoadIntConst(L, 2, b),
+                             Call(L, IRVar('/'), [a, b], q), Call(L, IRVar('%'), [a, b], r)])
+        self.assertEqual((values[q], values[r]), (-3, -1))
+
+    def test_copy_and_bool(self):
+        x, y, z = IRVar('x'), IRVar('y'), IRVar('z')
+        values = execute_ir([LoadBoolConst(L, True, x), Copy(L, x, y), Call(L, IRVar('unary_not'), [y], z)])
+        self.assertEqual((values[y], values[z]), (True, False))
+
+    def test_unknown_function(self):
+        with self.assertRaises(ValueError):
+            IRProgram([Call(L, IRVar('f'), [], IRVar('x'))])
+
+    def test_undefined_label(self):
+        with self.assertRaises(ValueError):
+            IRProgram([Jump(L, Label(L, 'nowhere'))])
+
+    def test_duplicate_label(self):
+        with self.assertRaises(ValueError):
+            IRProgram([Label(L, 'a'), Label(L, 'a')])
+
+
+if __name__ == '__main__':
+    unittest.main()
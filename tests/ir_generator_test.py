@@ -1,7 +1,11 @@
 import unittest
+from unittest import mock
 from src.compiler.parser import parse
 from src.compiler.tokenizer import tokenize
+from src.compiler import ir_generator
 from src.compiler.ir_generator import generate_ir
+from src.compiler.type_checker import typecheck
+from src.models.SymTab import SymTab, add_builtin_symbols
 from src.models.ir import (
     LoadIntConst, LoadBoolConst, Call, Copy, Label, Jump, CondJump, IRVar
 )
@@ -115,5 +119,24 @@ class TestIRGeneratorScopes(unittest.TestCase):
 #             print(i)
 
 
+class TestIRGeneratorTypes(unittest.TestCase):
+    def test_typechecks_once(self):
+        ast_root = parse(tokenize("{ { 1 + 2 } }"))
+        with mock.patch.object(ir_generator, 'typecheck', wraps=ir_generator.typecheck) as typecheck:
+            ir_instructions = generate_ir(ast_root)
+        typecheck.assert_called_once()
+        self.assertEqual(ir_instructions[-1].fun, IRVar("print_int"))
+
+    def test_reads_existing_annotations(self):
+        ast_root = parse(tokenize("1 + 2"))
+        symtab = SymTab()
+        add_builtin_symbols(symtab)
+        typecheck(ast_root, symtab)
+        with mock.patch.object(ir_generator, 'typecheck') as patched:
+            ir_instructions = generate_ir(ast_root, typechecked=True)
+        patched.assert_not_called()
+        self.assertEqual(ir_instructions[-1].fun, IRVar("print_int"))
+
+
 if __name__ == '__main__':
     unittest.main()
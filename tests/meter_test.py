@@ -0,0 +1,71 @@
+import json
+import unittest
+
+from src.compiler.interpreter import interpret
+from src.compiler.meter import Meter, StepBudgetExceeded
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.models.SymTab import new_symtab
+
+LOOP = "{ var i = 0; while i < 10 do i = i + 1; i }"
+
+
+class TestMeter(unittest.TestCase):
+    def setUp(self):
+        self.symtab = new_symtab()
+
+    def test_result_is_unchanged(self):
+        self.assertEqual(interpret(parse(tokenize(LOOP)), self.symtab, meter=Meter()), 10)
+
+    def test_hits(self):
+        tree = parse(tokenize(LOOP))
+        meter = Meter()
+        interpret(tree, self.symtab, meter=meter)
+        loop = tree.expressions[1]
+        self.assertEqual(meter.nodes[id(loop)][1].hits, 1)
+        self.assertEqual(meter.nodes[id(loop.condition)][1].hits, 11)
+        self.assertEqual(meter.nodes[id(loop.body)][1].hits, 10)
+        self.assertEqual(meter.steps, sum(stats.hits for _, stats in meter.nodes.values()))
+
+    def test_time_includes_children(self):
+        tree = parse(tokenize(LOOP))
+        meter = Meter()
+        interpret(tree, self.symtab, meter=meter)
+        self.assertGreaterEqual(meter.nodes[id(tree)][1].time, meter.nodes[id(tree.expressions[1])][1].time)
+        self.assertEqual(meter.report()[0]['node'], 'BlockExpr')
+
+    def test_budget(self):
+        tree = parse(tokenize("{ var i = 0; while true do i = i + 1; i }"))
+        meter = Meter(budget=1000)
+        with self.assertRaises(StepBudgetExceeded):
+            interpret(tree, self.symtab, meter=meter)
+        self.assertEqual(meter.steps, 1001)
+
+    def test_budget_is_enough(self):
+        meter = Meter()
+        interpret(parse(tokenize(LOOP)), self.symtab, meter=meter)
+        self.assertEqual(interpret(parse(tokenize(LOOP)), self.symtab, meter=Meter(budget=meter.steps)), 10)
+
+    def test_without_timing(self):
+        meter = Meter(timing=False)
+        interpret(parse(tokenize(LOOP)), self.symtab, meter=meter)
+        self.assertTrue(all(entry['time'] == 0 for entry in meter.report()))
+
+    def test_backends(self):
+        self.assertEqual(interpret(parse(tokenize(LOOP)), self.symtab, backend='closures', meter=Meter()), 10)
+        for backend in ('bytecode', 'python'):
+            with self.subTest(backend=backend), self.assertRaises(ValueError):
+                interpret(parse(tokenize(LOOP)), self.symtab, backend=backend, meter=Meter())
+
+    def test_json(self):
+        meter = Meter(budget=500)
+        interpret(parse(tokenize(LOOP)), self.symtab, meter=meter)
+        data = json.loads(meter.to_json())
+        self.assertEqual(data['steps'], meter.steps)
+        self.assertEqual(data['budget'], 500)
+        self.assertEqual(sum(entry['hits'] for entry in data['nodes']), meter.steps)
+        self.assertEqual(set(data['nodes'][0]), {'node', 'file', 'line', 'column', 'hits', 'time'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 
-from src.compiler.tokenizer import tokenize
+import random
+import re
+
+from src.compiler.tokenizer import tokenize, tokenize_to_buffer, retokenize
 from src.models import ast
 from src.models.ast import IfExpr, FunctionCall, BinaryOp, Identifier, UnaryOp, BlockExpr, VarDecl, Literal
 from src.models.types import Token, SourceLocation
@@ -192,8 +195,13 @@ class TestVarDeclarations(unittest.TestCase):
         self.assertIsInstance(expr, BlockExpr)
         self.assertIsInstance(expr.expressions[0], VarDecl)
         self.assertEqual(expr.expressions[0].name, "x")
-        # self.assertIsInstance(expr.expressions[0].value, Literal)
-        self.assertEqual(expr.expressions[0].value, 123)
+        self.assertIsInstance(expr.expressions[0].value, Literal)
+        self.assertEqual(expr.expressions[0].value.value, 123)
+
+    def test_var_initializer_is_an_expression(self):
+        for explicit_stack in (False, True):
+            expr = parse(tokenize("{ var y = x * 2 + 1; y }"), explicit_stack=explicit_stack)
+            self.assertIsInstance(expr.expressions[0].value, BinaryOp)
 
 class TestFlexibleSemicolons(unittest.TestCase):
     def test_blocks_without_semicolons(self):
@@ -262,5 +270,131 @@ class TestWhileLoop(unittest.TestCase):
 
         self.assertEqual(expr, expected_while_expr)
 
+class TestExplicitStackParser(unittest.TestCase):
+    depth = 100_000
+
+    def test_same_trees_as_recursive_parser(self):
+        sources = [
+            "1 + 2 * 3 - 4 % 5", "a = b = c", "not not x and y or z == 1", "(a + b) * c",
+            "f(x, y + z)", "g()", "if a then b + c else x * y", "1 + if true then 2 else 3",
+            "while x do { x = x - 1 }", "{ var x : Int = 123; }", "{ var x = 1; x }",
+            "{ { a } { b } }", "{ if true then { a }; b }", "{ if true then { a } else { b } 3 }",
+            "x = { { f(a) } { b } }",
+        ]
+        for source_code in sources:
+            with self.subTest(source_code=source_code):
+                expected = parse(tokenize(source_code))
+                self.assertEqual(repr(parse(tokenize(source_code), explicit_stack=True)), repr(expected))
+
+    def test_errors(self):
+        for source_code in ["a + b c", "", "a + ( b", "{ a b }"]:
+            with self.subTest(source_code=source_code):
+                with self.assertRaises(Exception):
+                    parse(tokenize(source_code), explicit_stack=True)
+        with self.assertRaises(ValueError):
+            parse(tokenize("1"), right_associative=True, explicit_stack=True)
+
+    def test_deep_parentheses(self):
+        expr = parse(tokenize_to_buffer("(" * self.depth + "1" + ")" * self.depth), explicit_stack=True)
+        self.assertEqual(expr.value, 1)
+
+    def test_deep_blocks(self):
+        expr = parse(tokenize_to_buffer("{" * self.depth + "1" + "}" * self.depth), explicit_stack=True)
+        for _ in range(self.depth):
+            self.assertIsInstance(expr, BlockExpr)
+            expr = expr.result_expression
+        self.assertEqual(expr.value, 1)
+
+    def test_deep_else_if_chain(self):
+        expr = parse(tokenize_to_buffer("if a then 1 else " * self.depth + "0"), explicit_stack=True)
+        for _ in range(self.depth):
+            self.assertIsInstance(expr, IfExpr)
+            expr = expr.else_branch
+        self.assertEqual(expr.value, 0)
+
+    def test_deep_while_and_unary(self):
+        expr = parse(tokenize_to_buffer("while a do " * self.depth + "not " * self.depth + "x"), explicit_stack=True)
+        for _ in range(self.depth):
+            expr = expr.body
+        for _ in range(self.depth):
+            self.assertIsInstance(expr, UnaryOp)
+            expr = expr.operand
+        self.assertEqual(expr.name, "x")
+
+    def test_deep_right_associative_assignment(self):
+        expr = parse(tokenize_to_buffer(" = ".join(["x"] * self.depth)), explicit_stack=True)
+        for _ in range(self.depth - 1):
+            self.assertEqual(expr.op, "=")
+            expr = expr.right
+        self.assertIsInstance(expr, Identifier)
+
+
+def without_locations(expr):
+    # Reused nodes keep their old line numbers, see `reparse`
+    return re.sub(r"SourceLocation\([^)]*\)", "", repr(expr))
+
+
+class TestIncrementalParser(unittest.TestCase):
+    source = ("{\n  var x = 1;\n  f(x, 2);\n  {\n    y = x + 2;\n    while y < 3 do {\n      y = y + 1;\n    }\n  }\n"
+              "  if x then {\n    z\n  } else {\n    q\n  }\n}\n")
+
+    def edit(self, old, new):
+        buffer = tokenize_to_buffer(self.source)
+        previous = parse(buffer)
+        changed = retokenize(buffer, self.source.index(old), len(old), new)
+        return previous, parse(buffer, previous=previous, changed=changed), buffer
+
+    def test_reuses_statements_outside_of_the_edited_block(self):
+        previous, result, buffer = self.edit("y = x + 2;", "y = x * 3 - 1;")
+        self.assertEqual(without_locations(result), without_locations(parse(buffer)))
+        self.assertIs(result.expressions[0], previous.expressions[0])
+        self.assertIs(result.expressions[1], previous.expressions[1])
+        self.assertIsNot(result.expressions[2], previous.expressions[2])
+        self.assertIs(result.result_expression, previous.result_expression)
+
+    def test_token_ranges_are_updated(self):
+        _, result, buffer = self.edit("f(x, 2);", "f(x, 2, 3 + 4);\n  g();")
+        condition = result.result_expression.condition
+        start = result.token_offset + result.result_expression.token_offset + condition.token_offset
+        self.assertEqual(buffer.text(start), "x")
+        self.assertEqual(result.token_count, len(buffer))
+
+    def test_falls_back_when_braces_change(self):
+        previous, result, buffer = self.edit("  } else {", "  };\n  {")
+        self.assertEqual(without_locations(result), without_locations(parse(buffer)))
+        self.assertIsInstance(result.expressions[-1], IfExpr)
+        self.assertIsNot(result.expressions[0], previous.expressions[0])
+
+    def test_unchanged_tokens(self):
+        buffer = tokenize_to_buffer(self.source)
+        previous = parse(buffer)
+        changed = retokenize(buffer, len(self.source), 0, "// done\n")
+        self.assertEqual(changed[1], changed[2])
+        self.assertIs(parse(buffer, previous=previous, changed=changed), previous)
+
+    def test_random_line_edits(self):
+        lines = ["  a = b * 2;\n", "  {\n", "  }\n", "  if a then b\n", "  else c;\n", "  while a do\n",
+                 "  g(1,\n", "  );\n", "  not a;\n", "  (1 + 2) * 3;\n", "  x\n"]
+        rng = random.Random(7)
+        for explicit_stack in (False, True):
+            for _ in range(300):
+                buffer = tokenize_to_buffer(self.source)
+                tree = parse(buffer, explicit_stack=explicit_stack)
+                for _ in range(3):
+                    source_lines = buffer.source_code.splitlines(keepends=True)
+                    i = rng.randrange(len(source_lines))
+                    offset = sum(map(len, source_lines[:i]))
+                    removed = len(source_lines[i]) if rng.random() < 0.5 else 0
+                    changed = retokenize(buffer, offset, removed, rng.choice(lines))
+                    try:
+                        expected = parse(buffer, explicit_stack=explicit_stack)
+                    except Exception:
+                        with self.assertRaises(Exception):
+                            parse(buffer, explicit_stack=explicit_stack, previous=tree, changed=changed)
+                        break
+                    tree = parse(buffer, explicit_stack=explicit_stack, previous=tree, changed=changed)
+                    self.assertEqual(without_locations(tree), without_locations(expected))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.compiler.__main__ import main
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.profiler import Profile, profile
+from src.compiler.tokenizer import tokenize_to_buffer
+from src.models.SymTab import new_symtab
+
+SOURCE = """{
+    var i = 0;
+    var s = 0;
+    while i < 30000 do {
+        s = s + i % 7;
+        i = i + 1;
+    }
+    s
+}
+"""
+
+
+class TestProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.expected = interpret(parse(tokenize_to_buffer(SOURCE)), new_symtab())
+
+    def profile(self, backend: str, **options):
+        return profile(parse(tokenize_to_buffer(SOURCE, 'loop.txt')), new_symtab(), backend, interval=0.0005,
+                       **options)
+
+    def test_closures(self):
+        value, result = self.profile('closures')
+        self.assertEqual(value, self.expected)
+        self.assertGreater(result.samples, 0)
+        for stack in result.stacks:
+            self.assertEqual(stack[:2], ('BlockExpr loop.txt:1', 'WhileExpr loop.txt:4'))
+        self.assertEqual(result.total_samples['loop.txt', 4], result.samples)
+
+    def test_tree_walker(self):
+        # Without compiling the loop, so that the run is long enough to be sampled
+        value, result = self.profile('tree', hot_loop_threshold=None)
+        self.assertEqual(value, self.expected)
+        self.assertGreater(result.samples, 0)
+        self.assertEqual(result.total_samples['loop.txt', 4], result.samples)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            self.profile('bytecode')
+
+    def test_collapsed_stacks(self):
+        result = Profile()
+        tree = parse(tokenize_to_buffer(SOURCE, 'loop.txt'))
+        loop = tree.expressions[2]
+        result.add([tree, loop, loop.body], compiled=False)
+        result.add([tree, loop, loop.body], compiled=False)
+        result.add([tree, loop], compiled=True)
+        self.assertEqual(result.collapsed(),
+                         "BlockExpr loop.txt:1;WhileExpr loop.txt:4;(compiled loop) 1\n"
+                         "BlockExpr loop.txt:1;WhileExpr loop.txt:4;BlockExpr loop.txt:4 2\n")
+        table = result.hot_lines(SOURCE).splitlines()
+        self.assertEqual(table[1].split(), ['100.0%', '100.0%', '4', 'while', 'i', '<', '30000', 'do', '{'])
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, 'loop.txt')
+            output_path = os.path.join(directory, 'out.folded')
+            with open(source_path, 'w', encoding='utf-8') as file:
+                file.write(SOURCE)
+            stdout = io.StringIO()
+            argv = ['compiler', 'profile', source_path, '--interval', '0.0005', '--flamegraph', output_path]
+            with mock.patch.object(sys, 'argv', argv), contextlib.redirect_stdout(stdout):
+                self.assertEqual(main(), 0)
+            with open(output_path, encoding='utf-8') as file:
+                self.assertTrue(file.read().startswith(f"BlockExpr {source_path}:1;"))
+        self.assertIn("while i < 30000 do {", stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from src.compiler.cache import CompileCache
+from src.compiler.interpreter import interpret
+from src.compiler import pipeline
+from src.compiler.parser import parse
+from src.compiler.pipeline import compile_python_source
+from src.compiler.python_transpiler import compile_python, run_python, transpile
+from src.compiler.tokenizer import tokenize
+from src.models import ast
+from src.models.SymTab import new_symtab
+from src.models.types import SourceLocation
+
+L = SourceLocation()
+
+
+class TestPythonTranspiler(unittest.TestCase):
+    programs = [
+        "1 + 2 * 3 - 4 % 3",
+        "{ var i = 0; var s = 0; while i < 10 do { s = s + i; i = i + 1; } s }",
+        "{ var i = 0; var n = 0; while i < 3 do { var t = 7; t = t + i; n = n + t; i = i + 1; } n }",
+        "{ var x = 1; x + (x = 5) }",
+        "{ var x = 1; x + { while x < 5 do x = x + 1; x } }",
+        "{ var a = 1; a + (if a > 0 then { a = a + 10; a } else 0) }",
+        "{ var i = 0; while { i = i + 1; i < 5 } do { }; i }",
+        "{ var x = 10; { var x = 20; x = 30; } x }",
+        "true and false or not false",
+        "false and { 1 / 0 > 1 }",
+        "1 < 2 or { var y = 3; y > 1 }",
+        "if 1 > 2 then 3",
+        "{ var x = 0; var y = 0; x = y = 3; x + y }",
+    ]
+
+    def run_python(self, tree, symtab=None):
+        return run_python(compile_python(tree), new_symtab() if symtab is None else symtab)
+
+    def test_same_results_as_interpret(self):
+        for source_code in self.programs:
+            with self.subTest(source_code=source_code):
+                tree = parse(tokenize(source_code))
+                self.assertEqual(self.run_python(tree), interpret(tree, new_symtab()))
+
+    def test_variables_are_locals(self):
+        source = transpile(parse(tokenize(self.programs[1])))
+        self.assertIn("while (i_0_0 < 10):", source)
+        self.assertIn("s_0_1 = (s_0_1 + i_0_0)", source)
+        self.assertNotIn("_lookup(", source)
+
+    def test_evaluation_order_is_kept(self):
+        # The left operand is read before the right one assigns it
+        source = transpile(parse(tokenize(self.programs[5])))
+        self.assertLess(source.index("= a_0_0\n"), source.index("if (a_0_0 > 0):"))
+
+    def test_code_is_cached(self):
+        first = compile_python(parse(tokenize(self.programs[1])))
+        self.assertIs(compile_python(parse(tokenize(self.programs[1]))), first)
+
+    def test_symtab_variables(self):
+        symtab = new_symtab()
+        symtab.define_variable('y', 4, None)
+        self.assertEqual(self.run_python(parse(tokenize("{ y = y + 1; y }")), symtab), 5)
+        self.assertEqual(symtab.lookup_variable('y'), 5)
+
+    def test_top_level_var_is_defined_in_symtab(self):
+        symtab = new_symtab()
+        tree = ast.VarDecl(location=L, name='q', value=ast.Literal(location=L, value=7), type_annotation=None)
+        self.assertEqual(self.run_python(tree, symtab), 7)
+        self.assertEqual(symtab.lookup_variable('q'), 7)
+
+    def test_function_call(self):
+        printed = []
+        symtab = new_symtab()
+        symtab.define_variable('print_int', printed.append, None)
+        tree = parse(tokenize("{ var i = 0; while i < 3 do { print_int(i * 2); i = i + 1 } }"))
+        self.assertIsNone(self.run_python(tree, symtab))
+        self.assertEqual(printed, [0, 2, 4])
+
+    def test_cacheable(self):
+        code = compile_python(parse(tokenize(self.programs[1])))
+        with tempfile.TemporaryDirectory() as directory:
+            cache = CompileCache(directory)
+            key = cache.key(self.programs[1])
+            cache.store(key, 'pycode', code)
+            loaded = cache.load(key, 'pycode')
+        self.assertEqual(run_python(loaded, new_symtab()), 45)
+
+    def test_source_is_compiled_once(self):
+        source_code = self.programs[1] + " "
+        with mock.patch.object(pipeline, 'compile_python', wraps=compile_python) as compiled:
+            first = compile_python_source(source_code)
+            self.assertIs(compile_python_source(source_code), first)
+        self.assertEqual(compiled.call_count, 1)
+        self.assertEqual(run_python(first, new_symtab()), 45)
+
+    def test_source_code_in_cache(self):
+        source_code = self.programs[1] + "  "
+        with tempfile.TemporaryDirectory() as directory:
+            compile_python_source(source_code, CompileCache(directory))
+            # A new process: only the cache has the code
+            cache = CompileCache(directory)
+            with mock.patch.dict(pipeline._python_code, clear=True), \
+                    mock.patch.object(pipeline, 'run_stage') as parsed:
+                code = compile_python_source(source_code, cache)
+        parsed.assert_not_called()
+        self.assertEqual(cache.hits['pycode'], 1)
+        self.assertEqual(run_python(code, new_symtab()), 45)
+
+
+if __name__ == '__main__':
+    unittest.main()
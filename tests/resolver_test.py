@@ -0,0 +1,133 @@
+import unittest
+
+from src.compiler.interpreter import BACKENDS, interpret
+from src.compiler.parser import parse
+from src.compiler.resolver import resolve
+from src.compiler.tokenizer import tokenize
+from src.models import ast
+from src.models.hashcons import HashConser
+from src.models.SymTab import new_symtab
+from src.models.types import SourceLocation
+
+L = SourceLocation()
+
+
+def identifiers(node: ast.Expression, name: str) -> list:
+    found = [node] if isinstance(node, ast.Identifier) and node.name == name else []
+    for child in ast.children(node):
+        found.extend(identifiers(child, name))
+    return found
+
+
+class TestResolver(unittest.TestCase):
+    def test_slots_in_declaration_order(self):
+        tree = parse(tokenize("{ var a = 1; var b = 2; a + b }"))
+        resolve(tree)
+        self.assertEqual(tree.frame_size, 2)
+        self.assertEqual([e.slot for e in tree.expressions], [0, 1])
+        self.assertEqual([(i.depth, i.slot) for i in identifiers(tree, 'a') + identifiers(tree, 'b')],
+                         [(0, 0), (0, 1)])
+
+    def test_inner_block_gets_its_own_frame(self):
+        tree = parse(tokenize("{ var a = 1; { var a = 2; a }; a }"))
+        resolve(tree)
+        inner = tree.expressions[1]
+        self.assertEqual(inner.frame_size, 1)
+        self.assertEqual((inner.result_expression.depth, inner.result_expression.slot), (1, 0))
+        self.assertEqual((tree.result_expression.depth, tree.result_expression.slot), (0, 0))
+
+    def test_outer_variable_from_inner_block(self):
+        tree = parse(tokenize("{ var a = 1; var b = 2; while true do { b = a } }"))
+        resolve(tree)
+        assignment = tree.result_expression.body.result_expression
+        self.assertEqual((assignment.left.depth, assignment.left.slot), (0, 1))
+        self.assertEqual((assignment.right.depth, assignment.right.slot), (0, 0))
+
+    def test_redeclaration_reuses_slot(self):
+        tree = parse(tokenize("{ var a = 1; var a = 2; a }"))
+        resolve(tree)
+        self.assertEqual(tree.frame_size, 1)
+        self.assertEqual([e.slot for e in tree.expressions], [0, 0])
+
+    def test_use_before_declaration_refers_to_outer_variable(self):
+        tree = parse(tokenize("{ var a = 1; { a; var a = 2; } }"))
+        resolve(tree)
+        first_use = tree.result_expression.expressions[0]
+        self.assertEqual((first_use.depth, first_use.slot), (0, 0))
+
+    def test_initializer_is_resolved_before_the_name(self):
+        inner = ast.BlockExpr(location=L, expressions=[
+            ast.VarDecl(location=L, name='a', value=ast.Identifier(location=L, name='a'), type_annotation=None)])
+        tree = ast.BlockExpr(location=L, expressions=[
+            ast.VarDecl(location=L, name='a', value=ast.Literal(location=L, value=1), type_annotation=None)],
+            result_expression=inner)
+        resolve(tree)
+        self.assertEqual((inner.expressions[0].value.depth, inner.expressions[0].value.slot), (0, 0))
+        self.assertEqual(inner.expressions[0].slot, 0)
+
+    def test_unknown_names_stay_unresolved(self):
+        tree = parse(tokenize("{ print_int(y); y }"))
+        resolve(tree)
+        self.assertEqual(tree.frame_size, 0)
+        self.assertEqual(tree.result_expression.depth, -1)
+
+    def test_resolver_fields_are_not_part_of_equality(self):
+        resolved = parse(tokenize("{ var a = 1; a }"))
+        resolve(resolved)
+        self.assertEqual(resolved, parse(tokenize("{ var a = 1; a }")))
+        self.assertNotIn('slot', repr(resolved))
+
+
+class TestInterpreterFrames(unittest.TestCase):
+    def setUp(self):
+        self.symtab = new_symtab()
+
+    def run_source(self, source_code: str):
+        return interpret(parse(tokenize(source_code)), self.symtab)
+
+    def test_loop_over_block_variables(self):
+        self.assertEqual(self.run_source(
+            "{ var i = 0; var s = 0; while i < 10 do { s = s + i; i = i + 1; } s }"), 45)
+
+    def test_fresh_frame_per_iteration(self):
+        self.assertEqual(self.run_source(
+            "{ var i = 0; var n = 0; while i < 3 do { var t = 7; t = t + i; n = n + t; i = i + 1; } n }"), 24)
+
+    def test_shadowing_does_not_leak(self):
+        self.assertEqual(self.run_source("{ var x = 1; { var x = 2; x = 3; }; x }"), 1)
+
+    def test_symtab_variables_still_work(self):
+        self.symtab.define_variable('y', 4, None)
+        self.assertEqual(self.run_source("{ var x = 3; y = y + x; y }"), 7)
+        self.assertEqual(self.symtab.lookup_variable('y'), 7)
+
+    def test_same_tree_interpreted_twice(self):
+        tree = parse(tokenize("{ var i = 0; while i < 5 do i = i + 1; i }"))
+        self.assertEqual(interpret(tree, self.symtab), 5)
+        self.assertEqual(interpret(tree, self.symtab), 5)
+
+    def test_shared_nodes_on_every_backend(self):
+        tests = [
+            ("{ { var x = 1; x } + { var y = 5; var x = 1; x } }", 2),
+            # The same hot loop at two depths, with its counter in different slots
+            ("{ var n = 0; { var i = 0; while i < 150 do i = i + 1; n = n + i }; "
+             "{ var z = 1; { var i = 0; while i < 150 do i = i + 1; n = n + i } }; n }", 300),
+        ]
+        for source_code, expected in tests:
+            for backend in ['tree', *BACKENDS]:
+                with self.subTest(source_code=source_code, backend=backend):
+                    tree = parse(tokenize(source_code), interner=HashConser())
+                    self.assertEqual(interpret(tree, self.symtab, backend=backend), expected)
+                    self.assertEqual(interpret(tree, self.symtab, backend=backend), expected)
+
+    def test_shared_node_is_copied(self):
+        tree = parse(tokenize("{ { var x = 1; x } + { var y = 5; var x = 1; x } }"), interner=HashConser())
+        first, second = tree.result_expression.left, tree.result_expression.right
+        self.assertIs(first.expressions[0], second.expressions[1])
+        resolve(tree)
+        self.assertIsNot(first.expressions[0], second.expressions[1])
+        self.assertEqual((first.expressions[0].slot, second.expressions[1].slot), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
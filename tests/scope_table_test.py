@@ -0,0 +1,134 @@
+import unittest
+
+from src.compiler.interpreter import interpret
+from src.compiler.parser import parse
+from src.compiler.tokenizer import tokenize
+from src.compiler.type_checker import typecheck
+from src.models import types
+from src.models.scope_table import ScopeTable, Symbol, builtin_snapshot
+
+
+class TestScopeTable(unittest.TestCase):
+    def test_define_and_lookup(self):
+        table = ScopeTable()
+        table.define_variable('x', 1, types.Int())
+        self.assertEqual(table.lookup_variable('x'), 1)
+        self.assertIs(table.lookup_variable_type('x'), types.Int())
+
+    def test_leave_scope_restores_shadowed_variable(self):
+        table = ScopeTable()
+        table.define_variable('x', 1, types.Int())
+        table.enter_scope()
+        table.define_variable('x', True, types.Bool())
+        table.define_variable('y', 2, types.Int())
+        self.assertEqual(table.lookup_variable('x'), True)
+        table.leave_scope()
+        self.assertEqual(table.lookup_variable('x'), 1)
+        self.assertIs(table.lookup_variable_type('x'), types.Int())
+        with self.assertRaises(KeyError):
+            table.lookup_variable('y')
+
+    def test_redefinition_in_same_scope(self):
+        table = ScopeTable()
+        table.define_variable('x', 1, types.Int())
+        table.enter_scope()
+        table.define_variable('x', 2, types.Int())
+        table.define_variable('x', 3, types.Int())
+        table.leave_scope()
+        self.assertEqual(table.lookup_variable('x'), 1)
+
+    def test_update_survives_leaving_inner_scope(self):
+        table = ScopeTable()
+        table.define_variable('x', 1, types.Int())
+        table.enter_scope()
+        table.update_variable('x', 5)
+        table.leave_scope()
+        self.assertEqual(table.lookup_variable('x'), 5)
+        self.assertIs(table.lookup_variable_type('x'), types.Int())
+
+    def test_update_of_undefined_variable(self):
+        with self.assertRaises(KeyError):
+            ScopeTable().update_variable('x', 1)
+
+    def test_missing_type(self):
+        with self.assertRaises(KeyError):
+            ScopeTable().lookup_variable_type('x')
+
+
+class TestSnapshots(unittest.TestCase):
+    def test_builtins_are_shared(self):
+        base = builtin_snapshot()
+        self.assertIs(builtin_snapshot(), base)
+        first, second = ScopeTable(base), ScopeTable(base)
+        self.assertEqual(first.lookup_variable('+')(2, 3), 5)
+        self.assertIs(second.lookup_variable_type('<'), first.lookup_variable_type('<'))
+
+    def test_snapshot_is_immutable(self):
+        with self.assertRaises(TypeError):
+            builtin_snapshot()['x'] = Symbol(1, types.Int())
+
+    def test_tables_do_not_change_their_base(self):
+        base = builtin_snapshot()
+        table = ScopeTable(base)
+        table.update_variable('true', False)
+        table.define_variable('x', 1, types.Int())
+        self.assertIs(base['true'].value, True)
+        self.assertNotIn('x', base)
+        self.assertIs(ScopeTable(base).lookup_variable('true'), True)
+
+    def test_snapshot_does_not_follow_later_changes(self):
+        table = ScopeTable()
+        table.define_variable('x', 1, types.Int())
+        snapshot = table.snapshot()
+        self.assertIs(table.snapshot(), snapshot)
+        table.update_variable('x', 2)
+        table.define_variable('y', 3, types.Int())
+        self.assertEqual(snapshot['x'].value, 1)
+        self.assertNotIn('y', snapshot)
+        self.assertEqual(table.snapshot()['x'].value, 2)
+
+    def test_snapshot_without_own_entries_is_the_base(self):
+        base = builtin_snapshot()
+        table = ScopeTable(base)
+        table.enter_scope()
+        table.define_variable('x', 1, types.Int())
+        table.leave_scope()
+        self.assertIs(table.snapshot(), base)
+
+    def test_session_continues_from_snapshot(self):
+        session = ScopeTable(builtin_snapshot())
+        session.define_variable('limit', 3, types.Int())
+        saved = session.snapshot()
+        self.assertEqual(ScopeTable(saved).lookup_variable('limit'), 3)
+        self.assertEqual(ScopeTable(saved).lookup_variable('+')(1, 1), 2)
+
+    def test_snapshot_layers_over_the_base(self):
+        first = ScopeTable(builtin_snapshot())
+        first.define_variable('x', 1, types.Int())
+        second = ScopeTable(first.snapshot())
+        second.define_variable('y', 2, types.Int())
+        second.update_variable('x', 3)
+        snapshot = second.snapshot()
+        # Only the entries above the builtins are copied
+        self.assertIs(snapshot.base, builtin_snapshot())
+        self.assertEqual(snapshot.own, {'x': Symbol(3, types.Int()), 'y': Symbol(2, types.Int())})
+        self.assertEqual(snapshot['+'], builtin_snapshot()['+'])
+        self.assertEqual(len(snapshot), len(builtin_snapshot()) + 2)
+        self.assertEqual(set(snapshot), set(builtin_snapshot()) | {'x', 'y'})
+        self.assertEqual(first.snapshot()['x'].value, 1)
+        with self.assertRaises(TypeError):
+            snapshot['x'] = Symbol(0, types.Int())
+
+
+class TestWithCompilerStages(unittest.TestCase):
+    def test_interpret(self):
+        tree = parse(tokenize("{ var i = 0; var s = 0; while i < 5 do { s = s + i; i = i + 1; } s }"))
+        self.assertEqual(interpret(tree, ScopeTable(builtin_snapshot())), 10)
+
+    def test_typecheck(self):
+        tree = parse(tokenize("{ if 1 < 2 then { true } else { false } }"))
+        self.assertIs(typecheck(tree, ScopeTable(builtin_snapshot())), types.Bool())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
+import io
+import mmap
+import random
+import tempfile
 import unittest
 
 from src.compiler.interpreter import interpret
 from src.compiler.parser import parse
-from src.models.types import Token, SourceLocation
-from src.compiler.tokenizer import tokenize
+from src.models import ast
+from src.models.types import Token, SourceLocation, LineIndex
+from src.compiler.tokenizer import tokenize, tokenize_stream, tokenize_to_buffer, retokenize
 
 # Define a special source location for simplified comparison in tests
 L = SourceLocation()
@@ -48,6 +53,148 @@ class TokenizerTest(unittest.TestCase):
                 self.assertEqual(token, expected)
 
 
+class TokenizeStreamTest(unittest.TestCase):
+    source_code = "{\n var x = 1; // 注释\n while x < 10 do {\n  x = x + 2;\n }\n x }  # 结果"
+
+    def assertSameTokens(self, tokens, expected):
+        self.assertEqual(tokens, expected)
+        self.assertEqual([t.loc.line for t in tokens], [t.loc.line for t in expected])
+        self.assertEqual([t.loc.column for t in tokens], [t.loc.column for t in expected])
+
+    def test_locations(self):
+        tokens = tokenize("a\n  bb\n\n c")
+        self.assertEqual([(t.loc.line, t.loc.column) for t in tokens], [(1, 1), (2, 3), (4, 2)])
+
+    def test_comment_after_operator(self):
+        self.assertEqual(tokenize("a *// b"), [Token("a", "identifier", L), Token("*", "operator", L)])
+
+    def test_text_file(self):
+        expected = tokenize(self.source_code)
+        for chunk_size in [1, 3, 7, 1024]:
+            with self.subTest(chunk_size=chunk_size):
+                tokens = list(tokenize_stream(io.StringIO(self.source_code), chunk_size=chunk_size))
+                self.assertSameTokens(tokens, expected)
+
+    def test_binary_file_splits_multibyte_characters(self):
+        expected = tokenize(self.source_code)
+        data = self.source_code.encode('utf-8')
+        for chunk_size in [1, 2, 5]:
+            with self.subTest(chunk_size=chunk_size):
+                tokens = list(tokenize_stream(io.BytesIO(data), chunk_size=chunk_size))
+                self.assertSameTokens(tokens, expected)
+
+    def test_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(self.source_code.encode('utf-8'))
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                tokens = list(tokenize_stream(mapped, chunk_size=4))
+        self.assertSameTokens(tokens, tokenize(self.source_code))
+
+    def test_is_lazy(self):
+        stream = tokenize_stream(io.StringIO("1 + 2\n" * 1000), chunk_size=16)
+        self.assertEqual(next(stream), Token("1", "integer", L))
+
+    def test_parse_stream(self):
+        expr = parse(tokenize_stream(io.StringIO("1 +\n 2 * 3"), chunk_size=2))
+        self.assertIsInstance(expr, ast.BinaryOp)
+        self.assertEqual(expr.op, '+')
+        self.assertEqual(expr.right.op, '*')
+
+
+class TokenBufferTest(unittest.TestCase):
+    source_code = "{ var x = 1;\n  while x < 10 do x = x + 1 # loop\n x }"
+
+    def test_matches_tokenize(self):
+        buffer = tokenize_to_buffer(self.source_code)
+        expected = tokenize(self.source_code)
+        self.assertEqual(len(buffer), len(expected))
+        self.assertEqual(list(buffer), expected)
+        self.assertEqual([(t.loc.line, t.loc.column) for t in buffer],
+                         [(t.loc.line, t.loc.column) for t in expected])
+        self.assertEqual(buffer[-1], Token("}", "punctuation", L))
+
+    def test_texts_are_interned(self):
+        buffer = tokenize_to_buffer(self.source_code)
+        x_ids = {buffer.text_ids[i] for i in range(len(buffer)) if buffer.text(i) == "x"}
+        self.assertEqual(len(x_ids), 1)
+        self.assertEqual(len(buffer.texts), len(set(buffer.texts)))
+        self.assertEqual(buffer.source_code[buffer.starts[2]:buffer.ends[2]], "x")
+
+    def test_parse_buffer(self):
+        expected = parse(tokenize(self.source_code))
+        self.assertEqual(parse(tokenize_to_buffer(self.source_code)), expected)
+
+    def test_parse_buffer_errors(self):
+        for source_code in ["", "a + b c", "a + ( b"]:
+            with self.subTest(source_code=source_code):
+                with self.assertRaises(Exception):
+                    parse(tokenize_to_buffer(source_code))
+
+
+class RetokenizeTest(unittest.TestCase):
+    source_code = "{ var x = 1; # first\n  while x < 10 do {\n    x = x + 1\n  }\n  x }\n"
+
+    def assertSameBuffer(self, buffer, expected):
+        self.assertEqual(buffer.source_code, expected.source_code)
+        self.assertEqual(list(buffer.kinds), list(expected.kinds))
+        self.assertEqual(list(buffer.starts), list(expected.starts))
+        self.assertEqual(list(buffer.ends), list(expected.ends))
+        self.assertEqual([buffer.text(i) for i in range(len(buffer))],
+                         [expected.text(i) for i in range(len(expected))])
+        self.assertEqual(buffer.lines.line_starts, expected.lines.line_starts)
+
+    def test_edit_inside_identifier(self):
+        buffer = tokenize_to_buffer(self.source_code)
+        offset = self.source_code.index("x < 10")
+        first, old_end, new_end = retokenize(buffer, offset, 1, "count")
+        self.assertEqual(buffer.text(first + 1), "count")
+        self.assertEqual(new_end - first, old_end - first)
+        self.assertSameBuffer(buffer, tokenize_to_buffer(buffer.source_code))
+
+    def test_only_edited_lines_are_rescanned(self):
+        buffer = tokenize_to_buffer(self.source_code)
+        offset = self.source_code.index("x + 1")
+        first, old_end, new_end = retokenize(buffer, offset, 0, "y * ")
+        self.assertEqual([buffer.text(i) for i in range(first, new_end)], ["x", "=", "y", "*", "x", "+", "1"])
+        self.assertEqual(old_end - first, 5)
+
+    def test_comment_and_line_break_edits(self):
+        edits = [("1;", 0, "# "), ("first", 0, "\n y"), ("}\n  x", 2, ""), ("{\n", 2, " 2 ")]
+        buffer = tokenize_to_buffer(self.source_code)
+        for anchor, removed, inserted in edits:
+            with self.subTest(anchor=anchor, inserted=inserted):
+                offset = buffer.source_code.index(anchor) + (len(anchor) - removed)
+                retokenize(buffer, offset, removed, inserted)
+                self.assertSameBuffer(buffer, tokenize_to_buffer(buffer.source_code))
+
+    def test_random_edits(self):
+        rng = random.Random(4)
+        pieces = ["x", "1", " ", "\n", "//", "#", "=", "==", "true", "{", "}", ";", "not", ".5"]
+        buffer = tokenize_to_buffer(self.source_code)
+        for _ in range(300):
+            offset = rng.randint(0, len(buffer.source_code))
+            removed = rng.randint(0, min(3, len(buffer.source_code) - offset))
+            inserted = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 3)))
+            retokenize(buffer, offset, removed, inserted)
+            self.assertSameBuffer(buffer, tokenize_to_buffer(buffer.source_code))
+
+    def test_edit_out_of_range(self):
+        buffer = tokenize_to_buffer("1 + 2")
+        with self.assertRaises(ValueError):
+            retokenize(buffer, 4, 5, "")
+
+
+class LineIndexTest(unittest.TestCase):
+    def test_location(self):
+        lines = LineIndex("ab\ncd\n\ne")
+        self.assertEqual(lines.line_starts, [0, 3, 6, 7])
+        for offset, line, column in [(0, 1, 1), (1, 1, 2), (2, 1, 3), (3, 2, 1), (6, 3, 1), (7, 4, 1)]:
+            with self.subTest(offset=offset):
+                loc = lines.location(offset)
+                self.assertEqual((loc.line, loc.column), (line, column))
+                self.assertEqual(lines.line_of(offset), line)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,10 @@
+import copy
+import pickle
 import unittest
 
 from src.compiler.parser import parse
-from src.compiler.tokenizer import tokenize
-from src.compiler.type_checker import typecheck
+from src.compiler.tokenizer import retokenize, tokenize, tokenize_to_buffer
+from src.compiler.type_checker import IncrementalChecker, typecheck
 from src.models import ast, types
 from src.models.SymTab import SymTab, add_builtin_symbols
 from src.models.types import Unit, Int, Bool
@@ -152,6 +154,89 @@ class TestBlockExpr(unittest.TestCase):
         with self.assertRaises(TypeError):
             typecheck(node, self.symtab)
 
+class TestTypeAnnotations(unittest.TestCase):
+    def test_every_node_is_annotated(self):
+        symtab = SymTab()
+        add_builtin_symbols(symtab)
+        node = parse(tokenize("if 1 < 2 then { not true } else false"))
+        self.assertIs(typecheck(node, symtab), Bool())
+        self.assertIs(node.type, Bool())
+        self.assertIs(node.condition.type, Bool())
+        self.assertIs(node.condition.left.type, Int())
+        self.assertIs(node.then_branch.type, Bool())
+        self.assertIs(node.then_branch.result_expression.operand.type, Bool())
+
+
+class TestIncrementalChecker(unittest.TestCase):
+    source = ("{\n  {\n    print_int(1 + 2);\n  }\n  while 1 < 2 do {\n    print_int(3)\n  }\n"
+              "  {\n    if true then {\n      1\n    } else {\n      2\n    }\n  }\n  0\n}\n")
+
+    def setUp(self):
+        self.buffer = tokenize_to_buffer(self.source)
+        self.tree = parse(self.buffer)
+        self.checker = IncrementalChecker()
+        self.checker.check(self.tree)
+
+    def edit(self, old, new):
+        changed = retokenize(self.buffer, self.buffer.source_code.index(old), len(old), new)
+        self.tree = parse(self.buffer, previous=self.tree, changed=changed)
+        return self.tree
+
+    def test_first_check_visits_every_node(self):
+        self.assertEqual((self.checker.checked, self.checker.reused), (8, 0))
+
+    def test_unchanged_tree_is_not_checked_again(self):
+        self.assertIs(self.checker.check(self.tree), Int())
+        self.assertEqual((self.checker.checked, self.checker.reused), (0, 1))
+
+    def test_only_edited_block_and_its_parents_are_checked(self):
+        tree = self.edit("1 + 2", "1 * 2 - 3")
+        self.assertIs(self.checker.check(tree), Int())
+        self.assertEqual((self.checker.checked, self.checker.reused), (2, 2))
+        self.assertIs(tree.expressions[0].expressions[0].arguments[0].type, Int())
+
+    def test_reused_blocks_stay_reusable(self):
+        self.checker.check(self.edit("1 + 2", "1 * 2"))
+        tree = self.edit("print_int(3)", "print_int(4)")
+        self.checker.check(tree)
+        self.assertEqual((self.checker.checked, self.checker.reused), (3, 2))
+
+    def test_types_match_a_full_check(self):
+        tree = self.edit("      1\n", "      5 % 2\n")
+        self.checker.check(tree)
+        expected = parse(tokenize(self.buffer.source_code))
+        symtab = SymTab()
+        add_builtin_symbols(symtab)
+        typecheck(expected, symtab)
+        self.assertEqual(repr(tree), repr(expected))
+
+    def test_error_in_edited_block(self):
+        with self.assertRaises(TypeError):
+            self.checker.check(self.edit("1 + 2", "true + 2"))
+        self.checker.check(self.edit("true + 2", "3 + 2"))
+        self.assertEqual((self.checker.checked, self.checker.reused), (2, 2))
+
+    def test_block_is_checked_again_when_outer_type_changes(self):
+        def declaration(value, type_expr):
+            return ast.VarDecl(location=L, name='x', value=value, type_annotation=type_expr)
+
+        inner = ast.BlockExpr(location=L, expressions=[], result_expression=ast.Identifier(location=L, name='x'))
+        first = ast.BlockExpr(location=L, expressions=[
+            declaration(ast.Literal(location=L, value=1), ast.IntTypeExpr(location=L))], result_expression=inner)
+        self.assertIs(self.checker.check(first), Int())
+
+        same_type = ast.BlockExpr(location=L, expressions=[
+            declaration(ast.Literal(location=L, value=2), ast.IntTypeExpr(location=L))], result_expression=inner)
+        self.assertIs(self.checker.check(same_type), Int())
+        self.assertEqual((self.checker.checked, self.checker.reused), (1, 1))
+
+        other_type = ast.BlockExpr(location=L, expressions=[
+            declaration(ast.Literal(location=L, value=True), ast.BoolTypeExpr(location=L))], result_expression=inner)
+        self.assertIs(self.checker.check(other_type), Bool())
+        self.assertEqual((self.checker.checked, self.checker.reused), (2, 0))
+        self.assertIs(inner.type, Bool())
+
+
 class TestTypes(unittest.TestCase):
     def test_int_type(self):
         int_type = Int()
@@ -172,6 +257,18 @@ class TestTypes(unittest.TestCase):
         self.assertEqual(str(int_type1), str(int_type2))
         self.assertNotEqual(int_type1, bool_type)
 
+    def test_types_are_interned(self):
+        self.assertIs(Int(), Int())
+        self.assertIs(Unit(), Unit())
+        self.assertIsNot(Int(), Bool())
+        self.assertIs(types.FunctionType([Int(), Int()], Bool()), types.FunctionType((Int(), Int()), Bool()))
+        self.assertIsNot(types.FunctionType([Int()], Bool()), types.FunctionType([Bool()], Bool()))
+
+    def test_interned_after_pickling_and_copying(self):
+        function_type = types.FunctionType([Int()], Unit())
+        self.assertIs(pickle.loads(pickle.dumps(function_type)), function_type)
+        self.assertIs(copy.deepcopy(Bool()), Bool())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.compiler.__main__ import main
+from src.compiler.worker_pool import RUN, FileResult, run_batch, source_files
+
+PROGRAMS = {
+    'loop.txt': "{ var i = 0; while i < 1000 do i = i + 1; i }",
+    'print.txt': "{ print_int(7); true }",
+    'bad.txt': "{ 1 + }",
+    'half.txt': "7 / 2",
+}
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        for name, source_code in PROGRAMS.items():
+            with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as file:
+                file.write(source_code)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def run_batch(self, **kwargs) -> dict:
+        results = list(run_batch(source_files(self.directory), workers=2, **kwargs))
+        self.assertEqual(sorted(os.path.basename(result.path) for result in results), sorted(PROGRAMS))
+        return {os.path.basename(result.path): result for result in results}
+
+    def test_run(self):
+        results = self.run_batch()
+        self.assertEqual(results['loop.txt'].value, 1000)
+        self.assertIsNone(results['loop.txt'].error)
+        self.assertGreater(results['loop.txt'].seconds, 0)
+        self.assertEqual((results['print.txt'].value, results['print.txt'].output), (True, "7\n"))
+        self.assertIsNone(results['bad.txt'].value)
+        self.assertIn("unexpected token", results['bad.txt'].error)
+        self.assertEqual(results['half.txt'].value, 3.5)
+
+    def test_backend(self):
+        self.assertEqual(self.run_batch(backend='bytecode')['loop.txt'].value, 1000)
+        results = self.run_batch(backend='python')
+        self.assertEqual((results['loop.txt'].value, results['print.txt'].output), (1000, "7\n"))
+
+    def test_stage(self):
+        results = self.run_batch(stage='tokens')
+        self.assertTrue(results['loop.txt'].value.startswith("punctuation {\n"))
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            next(run_batch([], stage='nope'))
+
+    def test_shared_cache(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+        self.run_batch(cache_dir=cache_dir)
+        entries = {entry.name: entry.inode() for entry in os.scandir(cache_dir)}
+        self.assertEqual(sum(name.endswith('.ast') for name in entries), 3)
+        for name in entries:
+            os.utime(os.path.join(cache_dir, name), (0, 0))
+        # The cache directory is below the programs, but its entries are not programs
+        self.assertEqual(self.run_batch(cache_dir=cache_dir)['loop.txt'].value, 1000)
+        # Nothing was stored again, and a hit refreshes the entry
+        self.assertEqual({entry.name: entry.inode() for entry in os.scandir(cache_dir)}, entries)
+        for name in entries:
+            if name.endswith('.ast'):
+                self.assertGreater(os.stat(os.path.join(cache_dir, name)).st_mtime, 0)
+
+    def test_skipped_files(self):
+        os.makedirs(self.path('.git'))
+        os.makedirs(self.path('cache'))
+        for name in ('.hidden.txt', os.path.join('.git', 'HEAD'), os.path.join('cache', 'entry.txt')):
+            with open(self.path(name), 'w', encoding='utf-8') as file:
+                file.write("1")
+        with open(self.path('data.bin'), 'wb') as file:
+            file.write(b"\x78\x9c\xff\x00\x01")
+        self.assertEqual(source_files(self.directory, exclude=self.path('cache')),
+                         sorted(self.path(name) for name in PROGRAMS))
+
+    def test_manifest(self):
+        manifest = self.path('manifest')
+        with open(manifest, 'w', encoding='utf-8') as file:
+            file.write("# programs\nloop.txt\n\nprint.txt\n")
+        self.assertEqual(source_files(manifest), [self.path('loop.txt'), self.path('print.txt')])
+        self.assertEqual(source_files(self.directory, '*.txt'), sorted(self.path(name) for name in PROGRAMS))
+
+    def test_json(self):
+        result = FileResult('a.txt', 3, "", None, 0.5)
+        self.assertEqual(json.loads(result.to_json()),
+                         {'path': 'a.txt', 'value': 3, 'output': "", 'error': None, 'seconds': 0.5})
+
+    def test_command(self):
+        stdout = io.StringIO()
+        with mock.patch.object(sys, 'argv', ['compiler', 'batch', self.directory, '--workers', '2']), \
+                contextlib.redirect_stdout(stdout):
+            self.assertEqual(main(), 1)  # bad.txt fails
+        results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(sorted(os.path.basename(result['path']) for result in results), sorted(PROGRAMS))
+
+
+if __name__ == '__main__':
+    unittest.main()